@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark many concurrent small requests: one thread per blocking
+translate_single call against the micro-batched async API
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from translation.hunyuan_translator import HunyuanTranslator
+from benchmark_batching import SAMPLE_TEXTS
+
+
+def main():
+    """Compare items/sec for threaded single calls and translate_async"""
+    parser = argparse.ArgumentParser(description="Benchmark the async translation API")
+    parser.add_argument("--model-name", default="./weight/Hunyuan-MT-Chimera-7B-fp8")
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--max-length", type=int, default=256)
+    parser.add_argument("--num-requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--max-wait", type=float, default=0.01)
+    args = parser.parse_args()
+
+    texts = [SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)] for i in range(args.num_requests)]
+
+    translator = HunyuanTranslator(
+        model_name=args.model_name,
+        device=args.device,
+        batch_size=args.batch_size,
+        max_length=args.max_length,
+        async_max_batch_size=args.batch_size,
+        async_max_wait=args.max_wait
+    )
+
+    print("📊 Concurrent request benchmark")
+    print("=" * 50)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(translator.translate_single, texts))
+    baseline = len(texts) / (time.perf_counter() - start)
+    print(f"threads + translate_single : {baseline:8.2f} items/sec")
+
+    async def run():
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def request(text):
+            async with semaphore:
+                return await translator.translate_async(text)
+
+        await asyncio.gather(*[request(text) for text in texts])
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    throughput = len(texts) / (time.perf_counter() - start)
+    stats = translator.batcher.get_stats()
+    translator.close_async()
+    print(f"translate_async            : {throughput:8.2f} items/sec ({throughput / baseline:.2f}x)")
+    print(f"   mean batch size: {stats['mean_batch_size']:.1f}, coalesced requests: {stats['coalesced']}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark batched translation throughput against item-by-item translation
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from translation.hunyuan_translator import HunyuanTranslator
+
+
+SAMPLE_TEXTS = [
+    "Find the number of positive integers n ≤ 1000 such that gcd(n, 1000) = 1.",
+    "Find the remainder when 2^100 is divided by 125.",
+    "In triangle ABC, angle A = 60°, AB = 8, and AC = 6. Find the length of the median from A to side BC.",
+    "What is the capital of France?",
+    "Explain the concept of machine learning.",
+    "A regular hexagon with side length 4 is inscribed in a circle.",
+    "Which of the following compounds is the most acidic?",
+    "The quick brown fox jumps over the lazy dog.",
+]
+
+
+def measure(fn, n_items: int) -> float:
+    """Run fn once and return items/sec"""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return n_items / elapsed if elapsed > 0 else float("inf")
+
+
+def main():
+    """Compare items/sec for sequential and batched translation"""
+    parser = argparse.ArgumentParser(description="Benchmark batched translation")
+    parser.add_argument("--model-name", default="./weight/Hunyuan-MT-Chimera-7B-fp8")
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--max-length", type=int, default=256)
+    parser.add_argument("--num-texts", type=int, default=64)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[4, 8, 16, 32])
+    args = parser.parse_args()
+
+    texts = [SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)] for i in range(args.num_texts)]
+
+    translator = HunyuanTranslator(
+        model_name=args.model_name,
+        device=args.device,
+        batch_size=1,
+        max_length=args.max_length
+    )
+
+    print("📊 Batched translation benchmark")
+    print("=" * 50)
+
+    baseline = measure(
+        lambda: [translator.translate_single(text) for text in texts], len(texts))
+    print(f"sequential      : {baseline:8.2f} items/sec")
+
+    for batch_size in args.batch_sizes:
+        translator.batch_size = batch_size
+        throughput = measure(
+            lambda: translator.translate_batch(texts, show_progress=False), len(texts))
+        print(f"batch_size={batch_size:<5}: {throughput:8.2f} items/sec "
+              f"({throughput / baseline:.2f}x)")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark the CPU execution modes (fp32, bf16, int8) for tokens/sec and
+memory; each mode runs in a fresh process so RSS is not carried over
+"""
+
+import argparse
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from translation.cpu_inference import CPU_MODES
+from benchmark_batching import SAMPLE_TEXTS
+
+
+def run_mode(args, cpu_mode):
+    """Translate the sample texts in one CPU mode and report its statistics"""
+    from translation.hunyuan_translator import HunyuanTranslator
+    from translation.decoding_policy import DecodingPolicy
+
+    translator = HunyuanTranslator(
+        model_name=args.model_name,
+        device="cpu",
+        batch_size=args.batch_size,
+        max_length=args.max_length,
+        decoding_policy=DecodingPolicy(strategy="greedy", max_new_tokens=args.max_length),
+        cpu_mode=cpu_mode,
+        cpu_threads=args.threads
+    )
+    texts = [SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)] for i in range(args.num_texts)]
+    translations = translator.translate_batch(texts, show_progress=False)
+    info = translator.get_model_info()
+    return info["generation"], info["cpu"], translations
+
+
+def main():
+    """Compare tokens/sec and memory across CPU modes"""
+    parser = argparse.ArgumentParser(description="Benchmark CPU inference modes")
+    parser.add_argument("--model-name", default="./weight/Hunyuan-MT-Chimera-7B-fp8")
+    parser.add_argument("--modes", nargs="+", choices=CPU_MODES, default=list(CPU_MODES))
+    parser.add_argument("--max-length", type=int, default=256)
+    parser.add_argument("--num-texts", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    print("📊 CPU mode benchmark")
+    print("=" * 50)
+
+    reference = None
+    for cpu_mode in args.modes:
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as pool:
+            generation, cpu, translations = pool.submit(run_mode, args, cpu_mode).result()
+
+        reference = reference or translations
+        agreement = sum(a == b for a, b in zip(translations, reference)) / len(reference)
+        memory = cpu["memory"]
+        print(f"{cpu_mode:>5}: {generation['tokens_per_sec']:8.1f} tokens/sec, "
+              f"weights {cpu['weights_mb']:8.1f} MiB, RSS {memory['rss_mb']:8.1f} MiB "
+              f"(peak {memory['peak_rss_mb']:.1f}), {cpu['threads']} threads, "
+              f"same output as {args.modes[0]}: {agreement:.0%}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
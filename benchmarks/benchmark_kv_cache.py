@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark KV cache quantization on long outputs: peak KV cache size,
+peak memory and the largest batch that fits a KV memory budget, for
+the full-precision, int8 and int4 caches
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import torch
+from transformers import DynamicCache
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from translation.hunyuan_translator import HunyuanTranslator
+from translation.kv_quantization import KV_CACHE_BITS, QuantizedKVCache, cache_bytes
+from translation.memory import process_memory
+from benchmark_batching import SAMPLE_TEXTS
+
+MODES = ["full"] + list(KV_CACHE_BITS)
+
+
+def run(translator, prompts, mode, max_new_tokens):
+    """Generate max_new_tokens for every prompt and measure the cache"""
+    model = translator.model
+    inputs = translator.tokenizer(prompts, return_tensors="pt", padding=True).to(translator.device)
+    if mode == "full":
+        cache = DynamicCache()
+    else:
+        cache = QuantizedKVCache(model.config, nbits=KV_CACHE_BITS[mode])
+    cuda = str(translator.device).startswith("cuda")
+    if cuda:
+        torch.cuda.reset_peak_memory_stats(translator.device)
+
+    start = time.perf_counter()
+    with torch.no_grad():
+        outputs = model.generate(
+            **inputs,
+            past_key_values=cache,
+            do_sample=False,
+            max_new_tokens=max_new_tokens,
+            min_new_tokens=max_new_tokens,
+            pad_token_id=translator.tokenizer.pad_token_id
+        )
+    seconds = time.perf_counter() - start
+
+    # The full-precision cache only grows, so its final size is its peak
+    kv_bytes = cache.peak_bytes if mode != "full" else cache_bytes(cache)
+    if cuda:
+        peak_mb = torch.cuda.max_memory_allocated(translator.device) / (1024 * 1024)
+    else:
+        peak_mb = process_memory()["peak_rss_mb"]
+    return outputs, kv_bytes, peak_mb, len(prompts) * max_new_tokens / seconds
+
+
+def main():
+    """Compare full-precision and quantized KV caches"""
+    parser = argparse.ArgumentParser(description="Benchmark KV cache quantization")
+    parser.add_argument("--model-name", default="./weight/Hunyuan-MT-Chimera-7B-fp8")
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--max-new-tokens", type=int, default=1024)
+    parser.add_argument("--kv-budget-mb", type=float, default=4096,
+                        help="KV cache memory the largest batch has to fit in")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    args = parser.parse_args()
+
+    translator = HunyuanTranslator(model_name=args.model_name, device=args.device)
+    prompts = [
+        translator._build_prompt(SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)], "en", "vi")
+        for i in range(args.batch_size)
+    ]
+
+    print("📊 KV cache benchmark")
+    print("=" * 50)
+    print(f"batch {args.batch_size}, {args.max_new_tokens} new tokens, KV budget {args.kv_budget_mb:.0f} MiB")
+
+    reference = None
+    for mode in args.modes:
+        outputs, kv_bytes, peak_mb, tokens_per_sec = run(translator, prompts, mode, args.max_new_tokens)
+        if reference is None:
+            reference = outputs
+        agreement = (outputs == reference).float().mean().item()
+
+        # The cache grows linearly with the batch, so its per-sequence size sets the largest batch
+        per_sequence_mb = kv_bytes / args.batch_size / (1024 * 1024)
+        largest_batch = int(args.kv_budget_mb // per_sequence_mb)
+        print(f"{mode:>5}: peak KV {kv_bytes / (1024 * 1024):9.2f} MiB "
+              f"({per_sequence_mb:.2f} MiB/sequence), largest batch {largest_batch:5d}, "
+              f"peak memory {peak_mb:9.1f} MiB, {tokens_per_sec:8.1f} tokens/sec, "
+              f"tokens matching {args.modes[0]}: {agreement:.1%}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
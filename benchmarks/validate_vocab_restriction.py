@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Check that the vocabulary-restricted output head leaves greedy
+translations unchanged on a validation set, and time both heads
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from translation.hunyuan_translator import HunyuanTranslator
+from translation.decoding_policy import DecodingPolicy
+from benchmark_batching import SAMPLE_TEXTS
+
+
+def load_texts(path):
+    """Validation texts from a JSON list, a JSON dataset field or a text file (one per line)"""
+    if path is None:
+        return list(SAMPLE_TEXTS)
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("problems") or data.get("questions") or []
+        return [text for text in data if isinstance(text, str) and text.strip()]
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def translate(translator, texts):
+    """Greedy translations and milliseconds per generated token"""
+    translator.generation_stats = {"generated_tokens": 0, "generate_seconds": 0.0}
+    translations = translator.translate_batch(texts, show_progress=False)
+    return translations, 1000.0 / max(translator.get_generation_stats()["tokens_per_sec"], 1e-9)
+
+
+def main():
+    """Compare greedy output of the full and the restricted output head"""
+    parser = argparse.ArgumentParser(description="Validate the vocabulary-restricted output head")
+    parser.add_argument("--model-name", default="./weight/Hunyuan-MT-Chimera-7B-fp8")
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--texts", default=None,
+                        help="Validation texts: JSON list or dataset output, or a text file")
+    parser.add_argument("--max-length", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=4)
+    args = parser.parse_args()
+
+    texts = load_texts(args.texts)
+    translator = HunyuanTranslator(
+        model_name=args.model_name,
+        device=args.device,
+        batch_size=args.batch_size,
+        max_length=args.max_length,
+        decoding_policy=DecodingPolicy(strategy="greedy", max_new_tokens=args.max_length),
+        restrict_vocabulary=True
+    )
+    restriction = translator.vocab_restriction
+
+    print("📊 Vocabulary restriction check")
+    print("=" * 50)
+
+    restriction.remove()
+    full, full_ms = translate(translator, texts)
+    restriction.install()
+    restricted, restricted_ms = translate(translator, texts)
+
+    stats = restriction.get_stats()
+    mismatches = [i for i, (a, b) in enumerate(zip(full, restricted)) if a != b]
+    print(f"allowed tokens: {stats['allowed_tokens']}/{stats['vocab_size']} "
+          f"({stats['allowed_fraction']:.1%}), mean extra source tokens: {stats['mean_extra_tokens']:.1f}")
+    print(f"full head      : {full_ms:7.2f} ms/token")
+    print(f"restricted head: {restricted_ms:7.2f} ms/token ({full_ms / restricted_ms:.2f}x)")
+    print(f"greedy output unchanged: {len(texts) - len(mismatches)}/{len(texts)}")
+    for i in mismatches:
+        print(f"   ✗ {texts[i][:60]!r}\n     full: {full[i][:80]!r}\n     restricted: {restricted[i][:80]!r}")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Convert the Hunyuan-MT-Chimera-7B-fp8 checkpoint once for this host
+Writes ready-to-run fp32, bf16 or int8 weights to the checkpoint cache,
+which run_translation.py --checkpoint-cache then loads memory-mapped
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.checkpoint_cache import CheckpointCache
+from utils.logging_config import setup_logging
+
+
+def main():
+    """Main function with CLI arguments"""
+
+    parser = argparse.ArgumentParser(
+        description="Convert Hunyuan-MT-Chimera-7B-fp8 into a host-specific checkpoint for fast startup"
+    )
+
+    parser.add_argument(
+        "--model-name",
+        default="./weight/Hunyuan-MT-Chimera-7B-fp8",
+        help="Hunyuan-MT-Chimera-7B-fp8 local model path"
+    )
+    parser.add_argument(
+        "--cpu-mode",
+        choices=["fp32", "bf16", "int8"],
+        default="bf16",
+        help="Weights to convert to (the --cpu-mode of later runs)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default="cache/checkpoints",
+        help="Checkpoint cache directory"
+    )
+    parser.add_argument("--force", action="store_true", help="Convert again if already converted")
+    parser.add_argument(
+        "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        default="INFO",
+        help="Logging level"
+    )
+
+    args = parser.parse_args()
+
+    setup_logging(
+        level=args.log_level,
+        log_file="logs/convert_checkpoint.log",
+        console_output=True
+    )
+
+    cache = CheckpointCache(args.cache_dir)
+    print(f"🔧 Converting {args.model_name} to {args.cpu_mode}...")
+    manifest = cache.convert(args.model_name, args.cpu_mode, force=args.force)
+    print(f"✅ Converted checkpoint: {cache.path(args.model_name, args.cpu_mode)}")
+    print(f"   • Weights: {manifest['weights_mb']:.0f} MiB")
+
+    # A warm startup loads what was just written
+    start_time = time.perf_counter()
+    cache.load(args.model_name, args.cpu_mode)
+    warm_seconds = time.perf_counter() - start_time
+
+    cold_seconds = manifest["source_load_seconds"]
+    print(f"   • Cold startup (source checkpoint + conversion): {cold_seconds:.2f}s")
+    print(f"   • Warm startup (converted, memory-mapped): {warm_seconds:.2f}s "
+          f"({cold_seconds / warm_seconds:.1f}x faster)")
+    print(f"\nUse it with: python run_translation.py <dataset> --device cpu "
+          f"--cpu-mode {args.cpu_mode} --checkpoint-cache {args.cache_dir}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Run a long-lived translation server on localhost
+Loads Hunyuan-MT-Chimera-7B-fp8 once and serves micro-batched requests,
+e.g. from run_translation.py --server
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import yaml
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.hunyuan_translator import HunyuanTranslator
+from translation.translation_cache import TranslationCache
+from translation.segmentation import TextSegmenter
+from translation.math_masking import MathSpanMasker
+from translation.bypass import BypassClassifier
+from translation.decoding_policy import DecodingPolicy
+from translation.server import TranslationServer
+from utils.logging_config import setup_logging
+
+
+def main():
+    """Main function with CLI arguments"""
+
+    parser = argparse.ArgumentParser(
+        description="Serve Hunyuan-MT-Chimera-7B-fp8 translations over HTTP on localhost"
+    )
+
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument(
+        "--model-name",
+        default="./weight/Hunyuan-MT-Chimera-7B-fp8",
+        help="Hunyuan-MT-Chimera-7B-fp8 local model path"
+    )
+    parser.add_argument(
+        "--device",
+        choices=["auto", "cuda", "cpu"],
+        default="auto",
+        help="Device to use for translation"
+    )
+    parser.add_argument("--batch-size", type=int, default=4, help="Batch size of generate calls")
+    parser.add_argument("--max-length", type=int, default=512, help="Maximum prompt length in tokens")
+    parser.add_argument(
+        "--config",
+        default=None,
+        help="YAML config with a generation section (per-field decoding strategy and budgets)"
+    )
+    parser.add_argument("--cache-path", default=None, help="SQLite translation cache path")
+    parser.add_argument(
+        "--warm-from",
+        default=None,
+        help="Pre-warm the cache from the *_translated.json outputs under this directory"
+    )
+    parser.add_argument("--segment", action="store_true", help="Translate sentence by sentence")
+    parser.add_argument("--mask-math", action="store_true", help="Mask formulas and code")
+    parser.add_argument("--bypass", action="store_true", help="Pass untranslatable texts through")
+    parser.add_argument(
+        "--max-wait",
+        type=float,
+        default=0.02,
+        help="Seconds a request waits for its micro-batch to fill"
+    )
+    parser.add_argument(
+        "--max-batch-size",
+        type=int,
+        default=64,
+        help="Distinct texts per micro-batch"
+    )
+    parser.add_argument(
+        "--max-batch-tokens",
+        type=int,
+        default=None,
+        help="Estimated source tokens per micro-batch (default: no limit)"
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=1024,
+        help="Queued texts beyond which requests are refused with 503 (backpressure)"
+    )
+    parser.add_argument(
+        "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        default="INFO",
+        help="Logging level"
+    )
+
+    args = parser.parse_args()
+
+    setup_logging(
+        level=args.log_level,
+        log_file="logs/translation_server.log",
+        console_output=True
+    )
+
+    config = {}
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+    overrides = {}
+    if "max_new_tokens" not in (config.get("generation") or {}):
+        overrides["max_new_tokens"] = args.max_length
+
+    print("📦 Loading Hunyuan-MT-Chimera-7B-fp8 translator from local weights...")
+    translator = HunyuanTranslator(
+        model_name=args.model_name,
+        device=args.device if args.device != "auto" else None,
+        batch_size=args.batch_size,
+        max_length=args.max_length,
+        cache=TranslationCache(args.cache_path) if args.cache_path else None,
+        segmenter=TextSegmenter() if args.segment else None,
+        masker=MathSpanMasker() if args.mask_math else None,
+        bypass=BypassClassifier() if args.bypass else None,
+        decoding_policy=DecodingPolicy.from_config(config, **overrides)
+    )
+    if args.warm_from and Path(args.warm_from).exists():
+        translator.warm_cache(args.warm_from)
+
+    server = TranslationServer(
+        translator,
+        host=args.host,
+        port=args.port,
+        max_batch_size=args.max_batch_size,
+        max_wait=args.max_wait,
+        max_batch_tokens=args.max_batch_tokens,
+        max_pending=args.max_pending
+    )
+    print(f"🚀 Serving on {server.url} (POST /translate, GET /health, GET /metrics)")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⚠️ Shutting down")
+    finally:
+        server.httpd.server_close()
+        server.batcher.close()
+        translator.decoding_policy.save()
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -5,19 +5,138 @@ Supports both GPQA and AIME datasets with command-line arguments
 """
 
 import argparse
+import os
 import sys
 from pathlib import Path
 
+import yaml
+
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from translation.hunyuan_translator import HunyuanTranslator
+from translation.translation_cache import TranslationCache
+from translation.segmentation import TextSegmenter
+from translation.math_masking import MathSpanMasker
+from translation.bypass import BypassClassifier
+from translation.decoding_policy import DecodingPolicy
+from translation.quality_validator import TranslationValidator
+from translation.stopping import RunawayGuard
+from translation.parallel import ParallelTranslator
+from translation.backends import OpenAICompatibleBackend
+from translation.server import TranslationClient
+from translation.checkpoint_cache import CheckpointCache
 from datasets.gpqa_loader import GPQALoader
 from datasets.aime_loader import AIMELoader
 from utils.translation_utils import TranslationPipeline
+from utils.work_queue import LeaseWorkQueue
 from utils.logging_config import setup_logging
 
 
+# config.yaml keys that set the default of a command-line option (section -> key -> option dest)
+CONFIG_OPTIONS = {
+    "model": {
+        "name": "model_name",
+        "batch_size": "batch_size",
+        "max_length": "max_length",
+        "max_batch_tokens": "max_batch_tokens",
+        "device": "device",
+        "use_prefix_cache": "prefix_cache",
+        "compiled_decoding": "compiled_decoding",
+        "compile_cache_dir": "compile_cache_dir",
+        "kv_cache": "kv_cache",
+        "restrict_vocabulary": "restrict_vocab",
+        "draft_model": "draft_model",
+        "num_speculative_tokens": "num_speculative_tokens",
+        "prompt_lookup_max_ngram": "prompt_lookup_max_ngram",
+        "prompt_lookup_num_tokens": "prompt_lookup_num_tokens",
+        "min_acceptance_rate": "min_acceptance_rate",
+        "cpu_mode": "cpu_mode",
+        "cpu_threads": "cpu_threads",
+        "workers": "workers",
+        "worker_devices": "worker_devices",
+        "shard_size": "shard_size",
+        "share_weights": "share_weights",
+        "backend": "backend",
+        "backend_url": "backend_url",
+        "backend_concurrency": "backend_concurrency",
+        "backend_timeout": "backend_timeout",
+        "backend_retries": "backend_retries"
+    },
+    "translation": {
+        "cache_path": "cache_path",
+        "cache_max_entries": "cache_max_entries",
+        "segment_long_fields": "segment",
+        "max_segment_chars": "max_segment_chars",
+        "bypass_untranslatable": "bypass",
+        "mask_math": "mask_math",
+        "adaptive_decoding": "adaptive_decoding",
+        "stop_runaway": "stop_runaway"
+    }
+}
+
+
+def load_config(path: str) -> dict:
+    """Load a config.yaml file"""
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def config_defaults(config: dict) -> dict:
+    """
+    Command-line option defaults set by the model and translation sections of a config
+
+    Args:
+        config: Parsed configuration dictionary
+
+    Returns:
+        Mapping of option dest to default value
+    """
+    defaults = {}
+    for section, options in CONFIG_OPTIONS.items():
+        for key, value in (config.get(section) or {}).items():
+            if key in options:
+                defaults[options[key]] = value
+    return defaults
+
+
+def print_translator_stats(translator: HunyuanTranslator):
+    """Print the optimization statistics of a single-process translator"""
+    if translator.bypass is not None:
+        print(f"   • Model calls saved by bypass: {translator.bypass.get_stats()['model_calls_saved']}")
+    if translator.validator is not None:
+        adaptive = translator.get_escalation_stats()
+        print(f"   • Escalated items: {adaptive['escalated']}/{adaptive['items']} "
+              f"({adaptive['escalation_rate']:.1%}, ~{adaptive['compute_saved']:.0%} decode compute saved)")
+    if translator.runaway_guard is not None:
+        guard_stats = translator.runaway_guard.get_stats()
+        print(f"   • Runaway stops (repetition/length): {guard_stats['repetition_stops']}/"
+              f"{guard_stats['runaway_stops']}, tokens saved: {guard_stats['tokens_saved']}")
+    if translator.backend is not None:
+        backend_stats = translator.backend.get_stats()
+        print(f"   • Backend requests: {backend_stats['requests']} "
+              f"(retries: {backend_stats['retries']}, failures: {backend_stats['failures']}, "
+              f"mean latency: {backend_stats['mean_request_seconds']:.2f}s)")
+    if translator.prompt_lookup is not None:
+        lookup_stats = translator.prompt_lookup.get_stats()
+        print(f"   • Prompt-lookup accepted tokens/step: {lookup_stats['accepted_tokens_per_step']:.2f}")
+    if translator.kv_cache_quantization is not None:
+        kv_stats = translator.get_kv_cache_stats()
+        print(f"   • {kv_stats['quantization']} KV cache: peak {kv_stats['peak_kv_mb']:.1f} MiB "
+              f"(batch of {kv_stats['peak_batch_size']}), peak memory {kv_stats['peak_memory_mb']:.0f} MiB")
+    if translator.vocab_restriction is not None:
+        vocab_stats = translator.vocab_restriction.get_stats()
+        print(f"   • Output vocabulary: {vocab_stats['allowed_tokens']}/{vocab_stats['vocab_size']} tokens "
+              f"(+{vocab_stats['mean_extra_tokens']:.0f} source tokens per batch)")
+    if translator.cpu_mode is not None:
+        startup = translator.startup_stats
+        print(f"   • Model startup: {startup['model_seconds']:.2f}s from the {startup['checkpoint']} checkpoint")
+        cpu_stats = translator.get_model_info()["cpu"]
+        print(f"   • CPU mode {cpu_stats['mode']} ({cpu_stats['threads']} threads): "
+              f"{translator.get_generation_stats()['tokens_per_sec']:.1f} tokens/sec, "
+              f"weights {cpu_stats['weights_mb']:.0f} MiB, RSS {cpu_stats['memory']['rss_mb']:.0f} MiB")
+
+
 def main():
     """Main function with CLI arguments"""
     
@@ -51,6 +170,244 @@ def main():
         help="Maximum sequence length"
     )
     
+    parser.add_argument(
+        "--max-batch-tokens",
+        type=int,
+        default=None,
+        help="Maximum padded prompt tokens per batch (length-bucketed batching)"
+    )
+    
+    parser.add_argument(
+        "--continuous-batching",
+        action="store_true",
+        help="Use iteration-level (continuous) batching with greedy decoding"
+    )
+    
+    parser.add_argument(
+        "--cache-path",
+        default=None,
+        help="SQLite translation cache file (disabled if not set)"
+    )
+    
+    parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=None,
+        help="Maximum cached translations before LRU eviction"
+    )
+    
+    parser.add_argument(
+        "--segment",
+        action="store_true",
+        help="Translate long fields sentence by sentence and reassemble them"
+    )
+    
+    parser.add_argument(
+        "--max-segment-chars",
+        type=int,
+        default=800,
+        help="Split sentences longer than this at clause boundaries"
+    )
+    
+    parser.add_argument(
+        "--mask-math",
+        action="store_true",
+        help="Replace formulas, LaTeX and code with placeholders during generation"
+    )
+    
+    parser.add_argument(
+        "--bypass",
+        action="store_true",
+        help="Pass numeric, symbolic, URL/code-only and Vietnamese texts through without the model"
+    )
+    
+    parser.add_argument(
+        "--prefix-cache",
+        action="store_true",
+        help="Reuse the KV cache of the shared prompt prefix across items"
+    )
+    
+    parser.add_argument(
+        "--compiled-decoding",
+        action="store_true",
+        help="Generate single-beam fields with a preallocated static KV cache and a torch.compile-d decode step"
+    )
+    
+    parser.add_argument(
+        "--compile-cache-dir",
+        default="cache/compile",
+        help="Directory caching compiled kernels across runs (with --compiled-decoding)"
+    )
+    
+    parser.add_argument(
+        "--kv-cache",
+        choices=["int8", "int4"],
+        default=None,
+        help="Store the KV cache quantized, for long outputs and large batches (default: full precision)"
+    )
+    
+    parser.add_argument(
+        "--restrict-vocab",
+        action="store_true",
+        help="Compute output logits only for Latin/Vietnamese letters, digits, math symbols and source tokens"
+    )
+    
+    parser.add_argument(
+        "--backend",
+        choices=["transformers", "openai"],
+        default="transformers",
+        help="Inference backend: in-process transformers, or an OpenAI-compatible server "
+             "(vLLM, llama.cpp server, ...)"
+    )
+    
+    parser.add_argument(
+        "--backend-url",
+        default="http://localhost:8000/v1",
+        help="Base URL of the OpenAI-compatible server"
+    )
+    
+    parser.add_argument(
+        "--backend-model",
+        default=None,
+        help="Model name served by the OpenAI-compatible server (default: --model-name)"
+    )
+    
+    parser.add_argument(
+        "--backend-concurrency",
+        type=int,
+        default=8,
+        help="Requests in flight to the OpenAI-compatible server"
+    )
+    
+    parser.add_argument(
+        "--backend-timeout",
+        type=float,
+        default=120.0,
+        help="Seconds to wait for a server response"
+    )
+    
+    parser.add_argument(
+        "--backend-retries",
+        type=int,
+        default=3,
+        help="Retries of a failed or rate-limited request"
+    )
+    
+    parser.add_argument(
+        "--draft-model",
+        default=None,
+        help="Local path of a small draft model for speculative decoding"
+    )
+    
+    parser.add_argument(
+        "--num-speculative-tokens",
+        type=int,
+        default=4,
+        help="Draft tokens proposed per speculative decoding step"
+    )
+    
+    parser.add_argument(
+        "--min-acceptance-rate",
+        type=float,
+        default=0.3,
+        help="Fall back to regular decoding when fewer speculated tokens are accepted"
+    )
+    
+    parser.add_argument(
+        "--config",
+        default=None,
+        help="config.yaml whose model and translation sections set the defaults of these "
+             "options and whose generation sections set per-field and per-dataset decoding"
+    )
+    
+    parser.add_argument(
+        "--decoding-strategy",
+        choices=["greedy", "sample", "beam"],
+        default=None,
+        help="Default decoding strategy (overrides the config file)"
+    )
+    
+    parser.add_argument(
+        "--adaptive-decoding",
+        action="store_true",
+        help="Translate greedily first and re-translate only flagged items with beam search"
+    )
+    
+    parser.add_argument(
+        "--stop-runaway",
+        action="store_true",
+        help="Stop looping or overlong rows individually and retry them"
+    )
+    
+    parser.add_argument(
+        "--prompt-lookup-fields",
+        nargs="+",
+        default=[],
+        help="Fields decoded with prompt-lookup (n-gram copy) speculation, e.g. problems solutions"
+    )
+    
+    parser.add_argument(
+        "--prompt-lookup-max-ngram",
+        type=int,
+        default=3,
+        help="Longest n-gram matched against the source prompt in prompt-lookup decoding"
+    )
+    
+    parser.add_argument(
+        "--prompt-lookup-num-tokens",
+        type=int,
+        default=10,
+        help="Tokens copied from the source per prompt-lookup step"
+    )
+    
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of translator processes (one model replica each)"
+    )
+    
+    parser.add_argument(
+        "--worker-devices",
+        nargs="+",
+        default=None,
+        help="Devices assigned round-robin to workers, e.g. cuda:0 cuda:1 (default: --device)"
+    )
+    
+    parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=16,
+        help="Records per shard handed to a worker"
+    )
+    
+    parser.add_argument(
+        "--share-weights",
+        action="store_true",
+        help="Load the model once into shared memory and let CPU workers attach to it"
+    )
+    
+    parser.add_argument(
+        "--server",
+        default=None,
+        help="URL of a running run_server.py (e.g. http://127.0.0.1:8765) to send work to "
+             "instead of loading the model"
+    )
+    
+    parser.add_argument(
+        "--work-queue",
+        default=None,
+        help="SQLite work queue on shared storage; every machine running with the same "
+             "queue translates leased chunks and the last one merges the output"
+    )
+    
+    parser.add_argument(
+        "--lease-timeout",
+        type=float,
+        default=600.0,
+        help="Seconds before a chunk leased by a crashed worker is handed out again"
+    )
+    
     parser.add_argument(
         "--sample-size",
         type=int,
@@ -78,6 +435,27 @@ def main():
         help="Device to use for translation"
     )
     
+    parser.add_argument(
+        "--cpu-mode",
+        choices=["fp32", "bf16", "int8"],
+        default=None,
+        help="CPU execution mode with --device cpu: fp32, bf16, or int8 dynamic "
+             "quantization of the linear layers (default: checkpoint dtype)"
+    )
+    
+    parser.add_argument(
+        "--cpu-threads",
+        type=int,
+        default=None,
+        help="Intra-op threads in a CPU mode (default: available cores, or each worker's cores)"
+    )
+    
+    parser.add_argument(
+        "--checkpoint-cache",
+        default=None,
+        help="Load the --cpu-mode checkpoint converted by convert_checkpoint.py from this directory"
+    )
+    
     # GPQA specific arguments
     parser.add_argument(
         "--gpqa-subset",
@@ -94,7 +472,25 @@ def main():
         help="AIME year"
     )
     
+    # Options given on the command line take precedence over the config file
+    config_parser = argparse.ArgumentParser(add_help=False)
+    config_parser.add_argument("--config", default=None)
+    config = {}
+    config_path = config_parser.parse_known_args()[0].config
+    if config_path:
+        config = load_config(config_path)
+        parser.set_defaults(**config_defaults(config))
+    
     args = parser.parse_args()
+    if args.cpu_mode and args.device != "cpu":
+        parser.error("--cpu-mode requires --device cpu")
+    if args.kv_cache and args.compiled_decoding:
+        parser.error("--kv-cache cannot be combined with --compiled-decoding")
+    if args.checkpoint_cache and not args.cpu_mode:
+        parser.error("--checkpoint-cache requires --cpu-mode")
+    if args.backend != "transformers" and args.workers > 1:
+        parser.error("--workers applies to the transformers backend; "
+                     "use --backend-concurrency for a server backend")
     
     # Setup logging
     setup_logging(
@@ -112,15 +508,93 @@ def main():
     print("-" * 60)
     
     try:
-        # Initialize translator
-        print("📦 Initializing Hunyuan-MT-Chimera-7B-fp8 translator from local weights...")
-        translator = HunyuanTranslator(
+        cache = None
+        if args.cache_path:
+            print(f"🗄️ Using translation cache: {args.cache_path}")
+            cache = TranslationCache(args.cache_path, max_entries=args.cache_max_entries)
+        
+        # Per-field decoding strategy and output budgets
+        overrides = {}
+        if "max_new_tokens" not in (config.get("generation") or {}):
+            overrides["max_new_tokens"] = args.max_length
+        if args.decoding_strategy:
+            overrides["strategy"] = args.decoding_strategy
+        elif "strategy" not in (config.get("generation") or {}) and (
+                args.continuous_batching or args.draft_model):
+            # Both only accelerate greedy decoding
+            overrides["strategy"] = "greedy"
+        decoding_policy = DecodingPolicy.from_config(config, dataset=args.dataset, **overrides)
+        for field in args.prompt_lookup_fields:
+            decoding_policy.fields.setdefault(field, {})["prompt_lookup"] = True
+        
+        backend = None
+        if args.backend == "openai":
+            print(f"🌐 Using OpenAI-compatible backend: {args.backend_url}")
+            backend = OpenAICompatibleBackend(
+                args.backend_url,
+                model=args.backend_model or args.model_name,
+                api_key=os.environ.get("OPENAI_API_KEY"),
+                max_concurrency=args.backend_concurrency,
+                timeout=args.backend_timeout,
+                max_retries=args.backend_retries
+            )
+        
+        translator_kwargs = dict(
             model_name=args.model_name,
             device=args.device if args.device != "auto" else None,
             batch_size=args.batch_size,
-            max_length=args.max_length
+            max_length=args.max_length,
+            max_batch_tokens=args.max_batch_tokens,
+            use_continuous_batching=args.continuous_batching,
+            cache=cache,
+            segmenter=TextSegmenter(max_segment_chars=args.max_segment_chars) if args.segment else None,
+            masker=MathSpanMasker() if args.mask_math else None,
+            bypass=BypassClassifier() if args.bypass else None,
+            use_prefix_cache=args.prefix_cache,
+            draft_model_name=args.draft_model,
+            num_speculative_tokens=args.num_speculative_tokens,
+            min_acceptance_rate=args.min_acceptance_rate,
+            prompt_lookup_max_ngram=args.prompt_lookup_max_ngram,
+            prompt_lookup_num_tokens=args.prompt_lookup_num_tokens,
+            decoding_policy=decoding_policy,
+            validator=TranslationValidator() if args.adaptive_decoding else None,
+            runaway_guard=RunawayGuard() if args.stop_runaway else None,
+            backend=backend,
+            cpu_mode=args.cpu_mode,
+            cpu_threads=args.cpu_threads,
+            checkpoint_cache=CheckpointCache(args.checkpoint_cache) if args.checkpoint_cache else None,
+            compiled_decoding=args.compiled_decoding,
+            compile_cache_dir=args.compile_cache_dir,
+            kv_cache_quantization=args.kv_cache,
+            restrict_vocabulary=args.restrict_vocab
         )
         
+        # Initialize translator
+        if args.server:
+            print(f"🔌 Sending work to translation server: {args.server}")
+            translator = TranslationClient(args.server, chunk_size=args.shard_size)
+            print(f"   Server status: {translator.health()['status']}")
+        elif args.workers > 1:
+            print(f"📦 Starting {args.workers} Hunyuan-MT-Chimera-7B-fp8 translator workers...")
+            translator = ParallelTranslator(
+                translator_kwargs,
+                num_workers=args.workers,
+                devices=args.worker_devices,
+                shard_size=args.shard_size,
+                share_weights=args.share_weights
+            )
+        else:
+            print("📦 Initializing Hunyuan-MT-Chimera-7B-fp8 translator from local weights...")
+            # The model loads in the background while the dataset is loaded and tokenized
+            translator = HunyuanTranslator(**translator_kwargs, load_in_background=True)
+        
+        # Pre-warm the cache from earlier pipeline outputs
+        if cache is not None and args.server:
+            print("⚠️ --cache-path is not used with --server: the server keeps its own cache "
+                  "(pre-warm it with run_server.py --warm-from)")
+        elif cache is not None and Path(args.output_dir).exists():
+            translator.warm_cache(args.output_dir, "en", "vi")
+        
         # Dataset-specific initialization
         if args.dataset == "gpqa":
             print(f"📚 Loading GPQA dataset (subset: {args.gpqa_subset})...")
@@ -164,11 +638,33 @@ def main():
         print("🔄 Running translation pipeline...")
         print("This may take a while depending on your hardware and dataset size...")
         
-        results = pipeline.run_full_pipeline(
-            dataset_name=dataset_name,
-            split="train",
-            sample_size=args.sample_size
-        )
+        if args.work_queue:
+            print(f"🗂️ Using work queue: {args.work_queue}")
+            queue = LeaseWorkQueue(args.work_queue, lease_timeout=args.lease_timeout)
+            results = pipeline.run_queue_pipeline(
+                queue,
+                dataset_name=dataset_name,
+                split="train",
+                sample_size=args.sample_size,
+                chunk_size=args.shard_size
+            )
+            queue.close()
+        else:
+            results = pipeline.run_full_pipeline(
+                dataset_name=dataset_name,
+                split="train",
+                sample_size=args.sample_size
+            )
+        
+        # Keep the observed length ratios for the next run's budgets
+        # (the worker pool saves its workers' merged ratios when it closes,
+        # and the server saves its own when it stops)
+        if isinstance(translator, (ParallelTranslator, TranslationClient)):
+            translator.close()
+        else:
+            translator.decoding_policy.save()
+        if backend is not None:
+            backend.close()
         
         # Print results
         print("\n✅ Translation completed!")
@@ -179,11 +675,39 @@ def main():
         print(f"   • Total items: {stats['total_items']}")
         print(f"   • Successful translations: {stats['successful_translations']}")
         print(f"   • Failed translations: {stats['failed_translations']}")
+        if isinstance(translator, ParallelTranslator):
+            parallel_stats = translator.get_model_info()["parallel"]
+            print(f"   • Workers: {translator.num_workers} "
+                  f"({parallel_stats['items_per_sec']:.2f} items/sec, "
+                  f"items per worker: {parallel_stats['per_worker_items']})")
+            for i, worker in enumerate(translator.get_model_info()["workers"]):
+                memory = (worker or {}).get("memory")
+                if memory and memory["pss_mb"] is not None:
+                    print(f"   • Worker {i} memory: RSS {memory['rss_mb']:.0f} MiB, "
+                          f"PSS {memory['pss_mb']:.0f} MiB, shared {memory['shared_mb']:.0f} MiB")
+                elif memory:
+                    print(f"   • Worker {i} memory: RSS {memory['rss_mb']:.0f} MiB")
+            adaptive = translator.get_escalation_stats()
+            if adaptive:
+                print(f"   • Escalated items: {adaptive['escalated']}/{adaptive['items']} "
+                      f"({adaptive['escalation_rate']:.1%}, ~{adaptive['compute_saved']:.0%} decode compute saved)")
+        if isinstance(translator, TranslationClient):
+            print(f"   • Server requests: {translator.stats['requests']} "
+                  f"(refused under backpressure: {translator.stats['refused']})")
+        if isinstance(translator, HunyuanTranslator):
+            if cache is not None:
+                cache_stats = cache.get_stats()
+                print(f"   • Cache hits/misses: {cache_stats['hits']}/{cache_stats['misses']}")
+            print_translator_stats(translator)
+        if "queue" in results:
+            chunks = results["queue"]["chunks"]
+            print(f"   • Work queue: {results['queue']['committed']} chunks committed by this worker, "
+                  f"{chunks['done']}/{chunks['total']} done, {chunks['failed']} failed")
         print(f"   • Duration: {stats['end_time'] - stats['start_time']}")
-        print(f"   • Output: {results['output_path']}")
+        print(f"   • Output: {results['output_path'] or 'merged by another worker'}")
         
         # Show sample if available
-        dataset = results["translated_dataset"]
+        dataset = results["translated_dataset"] or {}
         sample_field = "questions" if "questions" in dataset else "problems"
         
         if sample_field in dataset and len(dataset[sample_field]) > 0:
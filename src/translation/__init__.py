@@ -1,5 +1,22 @@
 """Translation module for Hunyuan-MT model"""
 
 from .hunyuan_translator import HunyuanTranslator
+from .translation_cache import TranslationCache
+from .segmentation import TextSegmenter
+from .math_masking import MathSpanMasker
+from .bypass import BypassClassifier
+from .decoding_policy import DecodingPolicy
+from .parallel import ParallelTranslator
+from .backends import InferenceBackend, OpenAICompatibleBackend
 
-__all__ = ['HunyuanTranslator']
\ No newline at end of file
+__all__ = [
+    'HunyuanTranslator',
+    'TranslationCache',
+    'TextSegmenter',
+    'MathSpanMasker',
+    'BypassClassifier',
+    'DecodingPolicy',
+    'ParallelTranslator',
+    'InferenceBackend',
+    'OpenAICompatibleBackend'
+]
\ No newline at end of file
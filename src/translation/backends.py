@@ -0,0 +1,260 @@
+"""
+Inference backends
+Remote generation for HunyuanTranslator, e.g. a vLLM or llama.cpp server
+exposing the OpenAI chat/completions API, behind a small interface
+"""
+
+import random
+import threading
+from abc import ABC, abstractmethod
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+LANGUAGE_NAMES = {
+    "en": "English",
+    "vi": "Vietnamese",
+    "zh": "Chinese",
+    "fr": "French",
+    "de": "German",
+    "ja": "Japanese",
+    "ko": "Korean"
+}
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUS = (408, 429, 500, 502, 503, 504)
+
+
+class InferenceBackend(ABC):
+    """
+    Generates translations for batches of texts
+
+    HunyuanTranslator's built-in backend is in-process transformers
+    generation (with its batching, prefix cache and speculative paths);
+    an InferenceBackend passed to it replaces that generation while
+    caching, bypass, segmentation, masking and escalation stay in the
+    translator. Subclasses implement translate().
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def translate(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+        max_new_tokens: List[int]
+    ) -> List[Tuple[str, Optional[int]]]:
+        """
+        Translate non-empty texts
+
+        Args:
+            texts: Texts to translate
+            source_lang: Source language code
+            target_lang: Target language code
+            options: Decoding options of the field (see DecodingPolicy.field_options)
+            max_new_tokens: Output token budget of each text
+
+        Returns:
+            (translation, generated token count or None) per text; failed
+            texts come back as empty translations
+        """
+
+    def describe(self) -> str:
+        """Short identifier of the backend and model, used in cache keys"""
+        return self.name
+
+    def get_stats(self) -> Dict:
+        """Get backend statistics"""
+        return {"backend": self.name}
+
+    def close(self):
+        """Release connections and threads"""
+
+
+class OpenAICompatibleBackend(InferenceBackend):
+    """
+    Backend for servers implementing the OpenAI chat/completions API
+
+    Requests are sent concurrently from a thread pool over a pooled
+    keep-alive session; timeouts, connection errors, rate limiting and
+    5xx responses are retried with exponential backoff. Greedy and beam
+    fields are requested with temperature 0 (the API has no beam search),
+    sampled fields with their temperature and top_p.
+    """
+
+    name = "openai"
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        api_key: Optional[str] = None,
+        max_concurrency: int = 8,
+        timeout: float = 120.0,
+        connect_timeout: float = 10.0,
+        max_retries: int = 3,
+        backoff: float = 0.5
+    ):
+        """
+        Initialize the backend
+
+        Args:
+            base_url: Server URL up to the API version, e.g. http://localhost:8000/v1
+            model: Model name the server serves
+            api_key: Bearer token, if the server requires one
+            max_concurrency: Requests in flight (and pooled connections)
+            timeout: Seconds to wait for a response
+            connect_timeout: Seconds to wait for a connection
+            max_retries: Retries of a failed request
+            backoff: Base delay between retries, doubled after each one
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = (connect_timeout, timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self._requests = requests
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        if api_key:
+            self._session.headers["Authorization"] = f"Bearer {api_key}"
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="openai-backend")
+
+        self._lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "failures": 0,
+            "truncated": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "request_seconds": 0.0
+        }
+
+    def describe(self) -> str:
+        """Backend and served model, e.g. "openai:hunyuan-mt" """
+        return f"{self.name}:{self.model}"
+
+    def _build_messages(self, text: str, source_lang: str, target_lang: str) -> List[dict]:
+        """Build the chat messages of one translation"""
+        target = LANGUAGE_NAMES.get(target_lang, target_lang)
+        return [{
+            "role": "user",
+            "content": (
+                f"Translate the following segment into {target}, "
+                f"without additional explanation.\n\n{text}")
+        }]
+
+    def _build_payload(self, text: str, source_lang: str, target_lang: str,
+                       options: dict, max_new_tokens: int) -> dict:
+        """Build the request body of one translation"""
+        payload = {
+            "model": self.model,
+            "messages": self._build_messages(text, source_lang, target_lang),
+            "max_tokens": max_new_tokens,
+            "temperature": 0.0
+        }
+        if options.get("strategy") == "sample":
+            payload["temperature"] = options["temperature"]
+            payload["top_p"] = options["top_p"]
+        return payload
+
+    def _post(self, payload: dict) -> dict:
+        """Send one request, retrying transient failures"""
+        url = f"{self.base_url}/chat/completions"
+        for attempt in range(self.max_retries + 1):
+            start_time = time.perf_counter()
+            try:
+                response = self._session.post(url, json=payload, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    return response.json()
+                error = f"HTTP {response.status_code}"
+            except (self._requests.ConnectionError, self._requests.Timeout) as e:
+                error = repr(e)
+            finally:
+                with self._lock:
+                    self.stats["requests"] += 1
+                    self.stats["request_seconds"] += time.perf_counter() - start_time
+
+            if attempt == self.max_retries:
+                raise RuntimeError(f"Request failed after {attempt + 1} attempts: {error}")
+            with self._lock:
+                self.stats["retries"] += 1
+            # Jitter keeps retrying threads from hitting the server in lockstep
+            delay = self.backoff * (2 ** attempt)
+            time.sleep(delay * (0.5 + random.random() / 2))
+
+    def _translate_one(self, text: str, source_lang: str, target_lang: str,
+                       options: dict, max_new_tokens: int) -> Tuple[str, Optional[int]]:
+        """Translate one text, returning an empty translation on failure"""
+        try:
+            body = self._post(self._build_payload(
+                text, source_lang, target_lang, options, max_new_tokens))
+            choice = body["choices"][0]
+            translation = (choice["message"]["content"] or "").strip()
+        except Exception as e:
+            logger.error(f"Backend translation error for text '{text[:50]}...': {e}")
+            with self._lock:
+                self.stats["failures"] += 1
+            return "", None
+
+        usage = body.get("usage") or {}
+        output_tokens = usage.get("completion_tokens")
+        with self._lock:
+            self.stats["prompt_tokens"] += usage.get("prompt_tokens", 0)
+            self.stats["completion_tokens"] += output_tokens or 0
+            if choice.get("finish_reason") == "length":
+                self.stats["truncated"] += 1
+        return translation, output_tokens
+
+    def translate(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+        max_new_tokens: List[int]
+    ) -> List[Tuple[str, Optional[int]]]:
+        """Translate texts with up to max_concurrency requests in flight"""
+        futures = [
+            self._executor.submit(
+                self._translate_one, text, source_lang, target_lang, options, budget)
+            for text, budget in zip(texts, max_new_tokens)
+        ]
+        return [future.result() for future in futures]
+
+    def get_stats(self) -> Dict:
+        """
+        Get request statistics
+
+        Returns:
+            Dictionary with request, retry, failure and token counts and
+            the mean request latency
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        stats["backend"] = self.name
+        stats["base_url"] = self.base_url
+        stats["mean_request_seconds"] = (
+            stats["request_seconds"] / stats["requests"] if stats["requests"] else 0.0)
+        return stats
+
+    def close(self):
+        """Stop the request threads and close pooled connections"""
+        self._executor.shutdown(wait=True)
+        self._session.close()
@@ -0,0 +1,125 @@
+"""
+Token-budget batch scheduler
+Groups texts of similar tokenized length into batches to reduce padding
+"""
+
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBudgetScheduler:
+    """
+    Build length-bucketed batches under a maximum padded-token budget
+    """
+
+    def __init__(
+        self,
+        max_batch_tokens: Optional[int] = None,
+        max_batch_size: Optional[int] = None
+    ):
+        """
+        Initialize the scheduler
+
+        Args:
+            max_batch_tokens: Maximum padded tokens per batch (rows x longest row).
+                None disables the token budget.
+            max_batch_size: Maximum number of rows per batch (None for unlimited)
+        """
+        if max_batch_tokens is None and max_batch_size is None:
+            raise ValueError("Either max_batch_tokens or max_batch_size must be set")
+
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset accumulated padding statistics"""
+        self.stats = {
+            "batches": 0,
+            "items": 0,
+            "real_tokens": 0,
+            "padded_tokens": 0,
+            "positional_padded_tokens": 0
+        }
+
+    def schedule(self, lengths: List[int]) -> List[List[int]]:
+        """
+        Split items into batches of similar length
+
+        Items are sorted by length (longest first, so an over-budget batch
+        surfaces early) and packed greedily while the padded size of the
+        batch stays within the budget. A single item longer than the budget
+        still gets its own batch.
+
+        Args:
+            lengths: Tokenized length of each item
+
+        Returns:
+            List of batches, each a list of indices into lengths
+        """
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+
+        batches = []
+        current = []
+        current_max = 0
+        for index in order:
+            length = lengths[index]
+            new_max = max(current_max, length)
+            if current and not self._fits(len(current) + 1, new_max):
+                batches.append(current)
+                current = []
+                new_max = length
+            current.append(index)
+            current_max = new_max
+
+        if current:
+            batches.append(current)
+
+        self._record(lengths, batches)
+        return batches
+
+    def _fits(self, n_rows: int, max_length: int) -> bool:
+        """Check whether a batch of n_rows padded to max_length fits"""
+        if self.max_batch_size is not None and n_rows > self.max_batch_size:
+            return False
+        if self.max_batch_tokens is not None and n_rows * max_length > self.max_batch_tokens:
+            return False
+        return True
+
+    def _record(self, lengths: List[int], batches: List[List[int]]):
+        """Accumulate padding statistics for a schedule"""
+        self.stats["batches"] += len(batches)
+        self.stats["items"] += len(lengths)
+        self.stats["real_tokens"] += sum(lengths)
+        self.stats["padded_tokens"] += sum(
+            len(batch) * max(lengths[i] for i in batch) for batch in batches
+        )
+
+        # Cost of the same items grouped by list position, for comparison
+        if not batches:
+            return
+        positional_size = self.max_batch_size or max(len(batch) for batch in batches)
+        for start in range(0, len(lengths), positional_size):
+            chunk = lengths[start:start + positional_size]
+            self.stats["positional_padded_tokens"] += len(chunk) * max(chunk)
+
+    def get_stats(self) -> Dict:
+        """
+        Get padding-waste statistics accumulated since the last reset
+
+        Returns:
+            Dictionary with token counts and padding-waste ratios for the
+            scheduled batches and for plain positional batching
+        """
+        stats = dict(self.stats)
+        padded = stats["padded_tokens"]
+        positional = stats["positional_padded_tokens"]
+        real = stats["real_tokens"]
+
+        stats["padding_waste"] = (padded - real) / padded if padded else 0.0
+        stats["positional_padding_waste"] = (
+            (positional - real) / positional if positional else 0.0)
+        stats["padded_tokens_saved"] = positional - padded
+        return stats
@@ -0,0 +1,152 @@
+"""
+Model-bypass classifier
+Detects strings that do not need translation so they skip the model
+"""
+
+import re
+import unicodedata
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_PATTERN = re.compile(r"^[\s\d.,:;+\-−±%‰$€£¥/()]+$")
+URL_PATTERN = re.compile(r"^(?:https?://|www\.)\S+$", re.IGNORECASE)
+CODE_PATTERN = re.compile(r"^(?:```.*```|`[^`]+`)$", re.DOTALL)
+LATEX_ONLY_PATTERN = re.compile(r"^(?:\$\$.+\$\$|\$[^$]+\$|\\\(.+\\\)|\\\[.+\\\])$", re.DOTALL)
+WORD_PATTERN = re.compile(r"[^\W\d_]{2,}")
+
+# Letter runs that are math notation rather than natural language
+MATH_WORDS = {
+    "sin", "cos", "tan", "cot", "sec", "csc", "log", "exp", "gcd", "lcm",
+    "mod", "max", "min", "lim", "sqrt", "frac", "sum", "prod", "int", "det",
+    "arcsin", "arccos", "arctan", "sinh", "cosh", "tanh", "deg", "pmod"
+}
+
+# Units written the same way in the target language (case-sensitive)
+UNITS = {
+    "mm", "cm", "dm", "km", "mg", "kg", "ml", "mL", "Hz", "kHz", "MHz", "GHz",
+    "kJ", "kW", "kWh", "Pa", "kPa", "mol", "rad"
+}
+
+# Operators that mark a text as a formula, where AB or ABC name points and segments
+FORMULA_PATTERN = re.compile(r"[=+−×÷*/^<>≤≥≠≈∠△⊥∥]")
+
+# Letters that only occur in Vietnamese among Latin-script languages
+VIETNAMESE_CHARS = set(
+    "ăâđêôơưạảấầẩẫậắằẳẵặẹẻẽếềểễệỉịọỏốồổỗộớờởỡợụủứừửữựỳỵỷỹ"
+    "ĂÂĐÊÔƠƯẠẢẤẦẨẪẬẮẰẲẴẶẸẺẼẾỀỂỄỆỈỊỌỎỐỒỔỖỘỚỜỞỠỢỤỦỨỪỬỮỰỲỴỶỸ"
+)
+
+
+class BypassClassifier:
+    """
+    Classify texts that can be passed through without model inference
+    """
+
+    def __init__(self, target_lang: str = "vi", vietnamese_word_ratio: float = 0.4):
+        """
+        Initialize the classifier
+
+        Args:
+            target_lang: Target language code; already-translated detection
+                is only available for Vietnamese
+            vietnamese_word_ratio: Minimum share of words with diacritics
+                for a text to count as Vietnamese
+        """
+        self.target_lang = target_lang
+        self.vietnamese_word_ratio = vietnamese_word_ratio
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset bypass counters"""
+        self.stats = {
+            "checked": 0,
+            "empty": 0,
+            "numeric": 0,
+            "symbolic": 0,
+            "url": 0,
+            "code": 0,
+            "target_language": 0
+        }
+
+    def classify(self, text: Optional[str], target_lang: Optional[str] = None) -> Optional[str]:
+        """
+        Decide whether a text can skip translation
+
+        Args:
+            text: Source text
+            target_lang: Target language code (defaults to the configured one)
+
+        Returns:
+            Bypass reason ("empty", "numeric", "symbolic", "url", "code" or
+            "target_language"), or None if the text needs the model
+        """
+        self.stats["checked"] += 1
+        reason = self._classify(text, target_lang or self.target_lang)
+        if reason is not None:
+            self.stats[reason] += 1
+        return reason
+
+    def _classify(self, text: Optional[str], target_lang: str) -> Optional[str]:
+        """Classification without bookkeeping"""
+        if text is None or not text.strip():
+            return "empty"
+
+        stripped = text.strip()
+        if NUMERIC_PATTERN.match(stripped):
+            return "numeric"
+        if URL_PATTERN.match(stripped):
+            return "url"
+        if CODE_PATTERN.match(stripped):
+            return "code"
+        if LATEX_ONLY_PATTERN.match(stripped):
+            return "symbolic"
+
+        in_formula = bool(FORMULA_PATTERN.search(stripped)) or any(
+            w.lower() in MATH_WORDS for w in WORD_PATTERN.findall(stripped))
+        words = [w for w in WORD_PATTERN.findall(stripped) if not self._is_notation(w, in_formula)]
+        if not words:
+            return "symbolic"
+
+        if target_lang == "vi" and self._is_vietnamese(stripped):
+            return "target_language"
+
+        return None
+
+    @staticmethod
+    def _is_notation(word: str, in_formula: bool) -> bool:
+        """Check whether a letter run is math notation (sin, gcd, cm, AB) rather than a word"""
+        if word.lower() in MATH_WORDS or word in UNITS:
+            return True
+        # Short all-caps runs such as AB or ABC name points and segments in
+        # formulas; elsewhere they are acronyms (DNA, OK, USA) to translate
+        return in_formula and word.isupper() and len(word) <= 3
+
+    def _is_vietnamese(self, text: str) -> bool:
+        """
+        Check whether text looks Vietnamese
+
+        Enough words must carry a diacritic, and at least one letter must be
+        one that only Vietnamese uses (so French or Spanish text is not matched).
+        """
+        text = unicodedata.normalize("NFC", text)
+        if not any(c in VIETNAMESE_CHARS for c in text):
+            return False
+
+        words = re.findall(r"[^\W\d_]+", text)
+        accented = sum(1 for word in words if not word.isascii())
+        return accented / len(words) >= self.vietnamese_word_ratio
+
+    def get_stats(self) -> Dict:
+        """
+        Get bypass statistics accumulated since the last reset
+
+        Returns:
+            Dictionary with per-reason counts and the number of model calls saved
+        """
+        stats = dict(self.stats)
+        stats["model_calls_saved"] = sum(
+            count for reason, count in self.stats.items()
+            if reason not in ("checked", "empty"))
+        return stats
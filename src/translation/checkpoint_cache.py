@@ -0,0 +1,212 @@
+"""
+Converted checkpoint cache
+Converts a source checkpoint once into ready-to-run weights for this
+host (fp32, bf16 or int8) and loads them back through memory-mapped
+tensors, skipping from_pretrained and the dtype conversion at startup
+"""
+
+import hashlib
+import json
+import os
+import platform
+import shutil
+import struct
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Union
+import logging
+
+import torch
+
+from .cpu_inference import load_dtype, prepare_cpu_model, model_size_mb
+
+logger = logging.getLogger(__name__)
+
+WEIGHTS_FILE = "model.pt"
+MANIFEST_FILE = "manifest.json"
+
+
+def source_model_hash(model_name: str) -> str:
+    """
+    Hash identifying a source checkpoint
+
+    Covers the JSON files (config, index, generation config) and, for each
+    weight file, its name, size and safetensors header (tensor names,
+    dtypes, shapes and offsets), so it changes with the weights without
+    reading gigabytes of them.
+
+    Args:
+        model_name: Local model path
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    for path in sorted(Path(model_name).iterdir()):
+        if path.suffix not in (".json", ".safetensors", ".bin"):
+            continue
+        digest.update(f"{path.name}:{path.stat().st_size}\n".encode("utf-8"))
+        if path.suffix == ".json":
+            digest.update(path.read_bytes())
+        elif path.suffix == ".safetensors":
+            with open(path, "rb") as f:
+                header_size = struct.unpack("<Q", f.read(8))[0]
+                digest.update(f.read(header_size))
+    return digest.hexdigest()
+
+
+def host_signature() -> Dict[str, str]:
+    """What a converted checkpoint depends on besides the source weights"""
+    return {
+        "machine": platform.machine(),
+        "torch": torch.__version__,
+        "quantized_engine": torch.backends.quantized.engine
+    }
+
+
+def _swap_quantized_linears(module: torch.nn.Module):
+    """Replace nn.Linear layers by empty dynamically quantized ones to load int8 weights into"""
+    for name, child in module.named_children():
+        if type(child) is torch.nn.Linear:
+            setattr(module, name, torch.ao.nn.quantized.dynamic.Linear(
+                child.in_features, child.out_features,
+                bias_=child.bias is not None, dtype=torch.qint8))
+        else:
+            _swap_quantized_linears(child)
+
+
+class CheckpointCache:
+    """
+    Directory of converted checkpoints
+
+    Each entry is keyed by the source model hash, the CPU mode and the
+    host signature and holds the converted state dict, the model config
+    and a manifest. fp32 and bf16 tensors are memory-mapped on load, so
+    processes loading the same entry share its pages through the page
+    cache; int8 linear weights are repacked for the quantized kernels,
+    the remaining tensors are memory-mapped.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path] = "cache/checkpoints"):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Directory holding the converted checkpoints
+        """
+        self.cache_dir = Path(cache_dir)
+
+    def path(self, model_name: str, mode: str) -> Path:
+        """Directory of the converted checkpoint of a source model and mode"""
+        load_dtype(mode)
+        host = hashlib.sha256(json.dumps(host_signature(), sort_keys=True).encode("utf-8"))
+        return self.cache_dir / f"{source_model_hash(model_name)[:16]}-{mode}-{host.hexdigest()[:8]}"
+
+    def is_converted(self, model_name: str, mode: str) -> bool:
+        """Whether a converted checkpoint exists for the source model and mode"""
+        return (self.path(model_name, mode) / MANIFEST_FILE).exists()
+
+    def convert(self, model_name: str, mode: str, force: bool = False) -> Dict:
+        """
+        Convert a source checkpoint for this host
+
+        Args:
+            model_name: Local source model path
+            mode: CPU mode (fp32, bf16 or int8)
+            force: Convert again even if the checkpoint exists
+
+        Returns:
+            Manifest of the converted checkpoint, including the seconds
+            spent loading and converting the source (a cold startup)
+        """
+        from transformers import AutoModelForCausalLM
+
+        target = self.path(model_name, mode)
+        if self.is_converted(model_name, mode) and not force:
+            logger.info(f"Converted checkpoint already exists: {target}")
+            return self.manifest(model_name, mode)
+
+        logger.info(f"Converting {model_name} to {mode}")
+        start_time = time.perf_counter()
+        model = AutoModelForCausalLM.from_pretrained(
+            model_name,
+            dtype=load_dtype(mode),
+            local_files_only=True
+        )
+        model = prepare_cpu_model(model, mode)
+        load_seconds = time.perf_counter() - start_time
+
+        # Write next to the target and rename, so readers never see a partial entry
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        staging = target.with_name(f"{target.name}.tmp-{os.getpid()}")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir()
+        torch.save(model.state_dict(), staging / WEIGHTS_FILE)
+        model.config.save_pretrained(staging)
+        if model.generation_config is not None:
+            model.generation_config.save_pretrained(staging)
+
+        manifest = {
+            "source": str(Path(model_name).resolve()),
+            "source_hash": source_model_hash(model_name),
+            "mode": mode,
+            "host": host_signature(),
+            "weights_mb": model_size_mb(model),
+            "source_load_seconds": load_seconds,
+            "convert_seconds": time.perf_counter() - start_time,
+            "created": datetime.now().isoformat()
+        }
+        with open(staging / MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(staging, target)
+        logger.info(f"Converted checkpoint written to {target} in {manifest['convert_seconds']:.2f}s")
+        return manifest
+
+    def manifest(self, model_name: str, mode: str) -> Optional[Dict]:
+        """Manifest of a converted checkpoint (None if not converted)"""
+        path = self.path(model_name, mode) / MANIFEST_FILE
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def load(self, model_name: str, mode: str) -> torch.nn.Module:
+        """
+        Load a converted checkpoint
+
+        The model is built without initializing its weights, then the
+        memory-mapped state dict is assigned to it.
+
+        Args:
+            model_name: Local source model path
+            mode: CPU mode the checkpoint was converted for
+
+        Returns:
+            Model in eval mode, as prepare_cpu_model would return it
+        """
+        from accelerate import init_empty_weights
+        from transformers import AutoConfig, AutoModelForCausalLM, GenerationConfig
+
+        path = self.path(model_name, mode)
+        if not (path / MANIFEST_FILE).exists():
+            raise FileNotFoundError(f"No converted {mode} checkpoint of {model_name} in {self.cache_dir}")
+
+        start_time = time.perf_counter()
+        config = AutoConfig.from_pretrained(path)
+        # Parameters stay empty; buffers computed from the config (e.g. rotary
+        # frequencies) are created for real since they are not in the state dict
+        with init_empty_weights(include_buffers=False):
+            model = AutoModelForCausalLM.from_config(config, dtype=load_dtype(mode))
+        if mode == "int8":
+            _swap_quantized_linears(model)
+
+        state_dict = torch.load(path / WEIGHTS_FILE, mmap=True, weights_only=True)
+        model.load_state_dict(state_dict, assign=True)
+        if (path / "generation_config.json").exists():
+            model.generation_config = GenerationConfig.from_pretrained(path)
+        model.eval()
+        logger.info(f"Loaded converted {mode} checkpoint in {time.perf_counter() - start_time:.2f}s")
+        return model
@@ -0,0 +1,377 @@
+"""
+Continuous (iteration-level) batching engine
+Steps greedy decoding one token at a time over a pool of sequence slots,
+evicting finished sequences and admitting queued ones between steps
+"""
+
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+import logging
+import time
+
+import torch
+from transformers import DynamicCache
+from transformers.cache_utils import DynamicLayer
+
+from .vocab_restriction import RestrictedLMHead
+
+logger = logging.getLogger(__name__)
+
+
+def cache_to_layers(cache) -> List[Tuple[torch.Tensor, torch.Tensor]]:
+    """Extract per-layer (key, value) tensors from a HF cache object"""
+    if hasattr(cache, "layers"):
+        return [(layer.keys, layer.values) for layer in cache.layers]
+    if hasattr(cache, "key_cache"):
+        return list(zip(cache.key_cache, cache.value_cache))
+    return [(layer[0], layer[1]) for layer in cache]
+
+
+def layers_to_cache(layers: List[Tuple[torch.Tensor, torch.Tensor]]) -> DynamicCache:
+    """Build a HF DynamicCache from per-layer (key, value) tensors"""
+    cache = DynamicCache()
+    for layer_idx, (key, value) in enumerate(layers):
+        cache.update(key, value, layer_idx)
+    return cache
+
+
+class _Sequence:
+    """Decoding state of one request: its generated tokens and cache row"""
+
+    def __init__(self, request_id: int, prompt_ids: List[int], max_new_tokens: int):
+        self.request_id = request_id
+        self.prompt_ids = prompt_ids
+        self.max_new_tokens = max_new_tokens
+        self.generated: List[int] = []
+        self.start = 0
+        self.finished = False
+
+
+class _SlotLayer(DynamicLayer):
+    """
+    One layer of the engine's batched KV cache
+
+    Keys and values live in preallocated [slots, heads, capacity, head_dim]
+    buffers. Each active row is right-aligned at a shared write position,
+    so a decode step writes the new token of every row into one column in
+    place and attends over views of the buffers, starting at the first
+    column any active row uses.
+    """
+
+    def __init__(self, keys: torch.Tensor, values: torch.Tensor):
+        super().__init__()
+        self.dtype, self.device = keys.dtype, keys.device
+        self.buffer_keys = keys
+        self.buffer_values = values
+        self.is_initialized = True
+        self.select(0, 0, 0)
+
+    def select(self, rows: int, offset: int, length: int):
+        """Expose rows [0, rows) and columns [offset, length) to attention"""
+        self.rows = rows
+        self.offset = offset
+        self.length = length
+        self.keys = self.buffer_keys[:rows, :, offset:length]
+        self.values = self.buffer_values[:rows, :, offset:length]
+
+    def update(self, key_states: torch.Tensor, value_states: torch.Tensor, *args, **kwargs):
+        end = self.length + key_states.shape[-2]
+        self.buffer_keys[:self.rows, :, self.length:end] = key_states
+        self.buffer_values[:self.rows, :, self.length:end] = value_states
+        self.select(self.rows, self.offset, end)
+        return self.keys, self.values
+
+    def get_seq_length(self) -> int:
+        return self.length - self.offset
+
+
+class ContinuousBatchingEngine:
+    """
+    Iteration-level batching for a HF causal LM
+
+    Each decode step runs one forward pass over every active slot. A
+    sequence leaves its slot as soon as it emits EOS or reaches its token
+    budget, and the next queued prompt is prefilled into the free slot, so
+    short rows never wait for the longest one in the batch. The batch
+    shares one KV cache that rows are written into and evicted from in
+    place; it is only shifted or regrown when it runs out of columns.
+    """
+
+    def __init__(
+        self,
+        model,
+        tokenizer,
+        max_batch_size: int = 8,
+        max_new_tokens: int = 256,
+        max_length: Optional[int] = None,
+        device: Optional[str] = None,
+        cache_length: int = 256
+    ):
+        """
+        Initialize the engine
+
+        Args:
+            model: Loaded HF causal language model
+            tokenizer: Matching tokenizer
+            max_batch_size: Number of concurrent sequence slots
+            max_new_tokens: Generated tokens per sequence when generate_ids
+                is not given per-prompt budgets
+            max_length: Maximum prompt plus generated tokens per sequence
+                (None for no limit)
+            device: Device of the model (inferred from the model if None)
+            cache_length: Initial positions of the batch KV cache (it grows
+                when the active rows need more)
+        """
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_batch_size = max_batch_size
+        self.max_new_tokens = max_new_tokens
+        self.max_length = max_length
+        self.device = device or next(model.parameters()).device
+        self.cache_length = cache_length
+        self.eos_token_id = tokenizer.eos_token_id
+        self._layers: List[_SlotLayer] = []
+        self._restricted_head = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset throughput statistics"""
+        self.stats = {
+            "requests": 0,
+            "decode_steps": 0,
+            "prefill_tokens": 0,
+            "generated_tokens": 0,
+            "slot_steps": 0,
+            "cache_shifts": 0,
+            "cache_allocations": 0,
+            "elapsed_seconds": 0.0
+        }
+
+    def generate(self, prompts: List[str]) -> List[str]:
+        """
+        Generate continuations for a list of prompts
+
+        Args:
+            prompts: Prompt strings
+
+        Returns:
+            Decoded continuations in input order
+        """
+        encoded = self.tokenizer(prompts)["input_ids"]
+        outputs = self.generate_ids(encoded)
+        return [
+            self.tokenizer.decode(ids, skip_special_tokens=True).strip()
+            for ids in outputs
+        ]
+
+    def generate_ids(
+        self,
+        prompt_ids: List[List[int]],
+        max_new_tokens: Optional[List[int]] = None
+    ) -> List[List[int]]:
+        """
+        Greedily generate token ids for a list of tokenized prompts
+
+        Args:
+            prompt_ids: Token ids of each prompt
+            max_new_tokens: Token budget of each prompt, e.g. from a
+                decoding policy (default: the engine's max_new_tokens)
+
+        Returns:
+            Generated token ids of each prompt (EOS excluded), in input order
+        """
+        start_time = time.perf_counter()
+        if max_new_tokens is None:
+            max_new_tokens = [self.max_new_tokens] * len(prompt_ids)
+        queue = deque(
+            _Sequence(i, ids, budget)
+            for i, (ids, budget) in enumerate(zip(prompt_ids, max_new_tokens)))
+        results: List[Optional[List[int]]] = [None] * len(prompt_ids)
+        active: List[_Sequence] = []
+
+        # Only the best token is needed, so a restricted head can skip the
+        # full-vocabulary logits and its columns are mapped back to ids
+        head = self.model.get_output_embeddings()
+        self._restricted_head = head if isinstance(head, RestrictedLMHead) else None
+        if self._restricted_head is not None:
+            head.compact = True
+
+        try:
+            self._run(queue, active, results)
+        finally:
+            if self._restricted_head is not None:
+                head.compact = False
+
+        self.stats["requests"] += len(prompt_ids)
+        self.stats["elapsed_seconds"] += time.perf_counter() - start_time
+        return results
+
+    def _run(self, queue: deque, active: List[_Sequence], results: List[Optional[List[int]]]):
+        """Decode until the queue is drained and every sequence finished"""
+        with torch.no_grad():
+            while queue or active:
+                # Admit queued sequences into free slots
+                while queue and len(active) < self.max_batch_size:
+                    self._prefill(queue.popleft(), active)
+
+                # Evict finished sequences before stepping
+                for sequence in [s for s in active if s.finished]:
+                    results[sequence.request_id] = sequence.generated
+                    self._evict(active, active.index(sequence))
+
+                if active:
+                    self._decode_step(active)
+
+        # Release the cache views; the buffers are reused by the next call
+        for layer in self._layers:
+            layer.select(0, 0, 0)
+
+    def _best_tokens(self, logits: torch.Tensor) -> torch.Tensor:
+        """Token ids of the largest logits"""
+        best = logits.argmax(dim=-1)
+        if self._restricted_head is not None:
+            best = self._restricted_head.token_ids[best]
+        return best
+
+    def _prefill(self, sequence: _Sequence, active: List[_Sequence]):
+        """Run the prompt through the model, pick the first token and
+        insert the prompt's KV cache as a new row of the batch cache"""
+        input_ids = torch.tensor([sequence.prompt_ids], device=self.device)
+        outputs = self.model(input_ids=input_ids, use_cache=True)
+        self.stats["prefill_tokens"] += len(sequence.prompt_ids)
+        self._append_token(sequence, int(self._best_tokens(outputs.logits[0, -1])))
+
+        kv = cache_to_layers(outputs.past_key_values)
+        prompt_length = len(sequence.prompt_ids)
+        if not self._layers:
+            self._allocate(kv)
+        # Room for the prompt left of the write position and one decode column
+        length = self._layers[0].length
+        if (prompt_length > length or length + 1 > self._capacity
+                or len(active) == self._layers[0].buffer_keys.shape[0]):
+            self._reserve(active, prompt_length, len(active) + 1)
+
+        row = len(active)
+        length = self._layers[0].length
+        sequence.start = length - prompt_length
+        for layer, (key, value) in zip(self._layers, kv):
+            layer.buffer_keys[row, :, sequence.start:length] = key[0]
+            layer.buffer_values[row, :, sequence.start:length] = value[0]
+        active.append(sequence)
+
+    @property
+    def _capacity(self) -> int:
+        """Columns of the batch cache buffers"""
+        return self._layers[0].buffer_keys.shape[2]
+
+    def _allocate(self, kv: List[Tuple[torch.Tensor, torch.Tensor]], rows: int = 0, capacity: int = 0):
+        """Allocate cache buffers shaped like a prefill's KV cache"""
+        rows = max(rows, self.max_batch_size)
+        capacity = max(capacity, self.cache_length)
+        self._layers = [
+            _SlotLayer(
+                key.new_zeros((rows, key.shape[1], capacity, key.shape[3])),
+                value.new_zeros((rows, value.shape[1], capacity, value.shape[3])))
+            for key, value in kv
+        ]
+        self.stats["cache_allocations"] += 1
+
+    def _reserve(self, active: List[_Sequence], min_length: int, rows: int):
+        """
+        Lay the cache out again with the write position at least at
+        min_length, a free column after it and room for rows rows: drops
+        the leading padding all rows have in common and regrows the
+        buffers if that is not enough
+        """
+        length = self._layers[0].length
+        padding = min((s.start for s in active), default=length)
+        used = length - padding
+        new_length = max(used, min_length)
+        shift = new_length - used
+        old = self._layers
+        if new_length + 1 > self._capacity or rows > old[0].buffer_keys.shape[0]:
+            self._allocate(
+                [(layer.buffer_keys, layer.buffer_values) for layer in old], rows=rows,
+                capacity=max(new_length + 1, 2 * self._capacity))
+        count = len(active)
+        for source, target in zip(old, self._layers):
+            # clone() as source and target columns may overlap
+            target.buffer_keys[:count, :, shift:new_length] = source.buffer_keys[:count, :, padding:length].clone()
+            target.buffer_values[:count, :, shift:new_length] = source.buffer_values[:count, :, padding:length].clone()
+            target.select(count, 0, new_length)
+        for sequence in active:
+            sequence.start += shift - padding
+        self.stats["cache_shifts"] += 1
+
+    def _evict(self, active: List[_Sequence], row: int):
+        """Remove a row from the batch cache by moving the last row into it"""
+        last = len(active) - 1
+        if row != last:
+            moved = active[last]
+            length = self._layers[0].length
+            for layer in self._layers:
+                layer.buffer_keys[row, :, moved.start:length] = layer.buffer_keys[last, :, moved.start:length]
+                layer.buffer_values[row, :, moved.start:length] = layer.buffer_values[last, :, moved.start:length]
+            active[row] = moved
+        active.pop()
+
+    def _decode_step(self, active: List[_Sequence]):
+        """Advance every active sequence by one token in a single forward pass"""
+        if self._layers[0].length + 1 > self._capacity:
+            self._reserve(active, 0, len(active))
+        length = self._layers[0].length
+        offset = min(s.start for s in active)
+        for layer in self._layers:
+            layer.select(len(active), offset, length)
+
+        starts = torch.tensor([s.start for s in active], device=self.device)
+        columns = torch.arange(offset, length + 1, device=self.device)
+        attention_mask = (columns[None, :] >= starts[:, None]).long()
+        input_ids = torch.tensor(
+            [[s.generated[-1]] for s in active], device=self.device)
+        position_ids = (length - starts)[:, None]
+
+        cache = DynamicCache()
+        cache.layers = list(self._layers)
+        outputs = self.model(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            position_ids=position_ids,
+            past_key_values=cache,
+            use_cache=True
+        )
+
+        next_tokens = self._best_tokens(outputs.logits[:, -1]).tolist()
+        for sequence, token_id in zip(active, next_tokens):
+            self._append_token(sequence, token_id)
+
+        self.stats["decode_steps"] += 1
+        self.stats["slot_steps"] += len(active)
+
+    def _append_token(self, sequence: _Sequence, token_id: int):
+        """Record a generated token and mark the sequence finished if done"""
+        if token_id == self.eos_token_id:
+            sequence.finished = True
+            return
+
+        sequence.generated.append(token_id)
+        self.stats["generated_tokens"] += 1
+        if len(sequence.generated) >= sequence.max_new_tokens:
+            sequence.finished = True
+        elif (self.max_length is not None
+              and len(sequence.prompt_ids) + len(sequence.generated) >= self.max_length):
+            sequence.finished = True
+
+    def get_stats(self) -> Dict:
+        """
+        Get throughput statistics accumulated since the last reset
+
+        Returns:
+            Dictionary with token counts, tokens/sec and mean slot occupancy
+        """
+        stats = dict(self.stats)
+        elapsed = stats["elapsed_seconds"]
+        steps = stats["decode_steps"]
+        stats["tokens_per_sec"] = stats["generated_tokens"] / elapsed if elapsed else 0.0
+        stats["mean_active_slots"] = stats["slot_steps"] / steps if steps else 0.0
+        return stats
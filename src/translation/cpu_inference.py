@@ -0,0 +1,86 @@
+"""
+CPU inference modes
+Prepares a model for CPU-only hosts: fp32, bf16 execution, or dynamic
+int8 quantization of the linear layers, with intra-op threads set to
+the cores this process may run on
+"""
+
+import os
+from typing import Optional
+import logging
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+CPU_MODES = ("fp32", "bf16", "int8")
+
+
+def available_cores() -> int:
+    """Number of cores this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def configure_cpu_threads(num_threads: Optional[int] = None) -> int:
+    """
+    Set the intra-op thread count used by CPU kernels
+
+    Args:
+        num_threads: Threads per operator (default: the available cores)
+
+    Returns:
+        Thread count in effect
+    """
+    num_threads = num_threads or available_cores()
+    torch.set_num_threads(num_threads)
+    logger.info(f"CPU inference with {num_threads} intra-op threads")
+    return torch.get_num_threads()
+
+
+def load_dtype(cpu_mode: str) -> torch.dtype:
+    """
+    Dtype to load the checkpoint in for a CPU mode
+
+    int8 quantizes from fp32 weights; bf16 loads straight into bf16 so
+    the fp32 copy never materializes.
+    """
+    if cpu_mode not in CPU_MODES:
+        raise ValueError(f"Unknown CPU mode '{cpu_mode}', expected one of {', '.join(CPU_MODES)}")
+    return torch.bfloat16 if cpu_mode == "bf16" else torch.float32
+
+
+def prepare_cpu_model(model: torch.nn.Module, cpu_mode: str) -> torch.nn.Module:
+    """
+    Convert a loaded model for a CPU mode
+
+    Args:
+        model: Model on CPU
+        cpu_mode: fp32, bf16 or int8
+
+    Returns:
+        Model in eval mode; for int8 the nn.Linear layers are replaced by
+        dynamically quantized ones (int8 weights, activations quantized
+        per call), other layers stay in fp32
+    """
+    # Models loaded in the mode's dtype keep their fp32 buffers (e.g. rotary frequencies)
+    if next(model.parameters()).dtype != load_dtype(cpu_mode):
+        model.to(load_dtype(cpu_mode))
+    model.eval()
+    if cpu_mode == "int8":
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+def model_size_mb(model: torch.nn.Module) -> float:
+    """Size of a model's weights in MiB, counting packed int8 weights"""
+    tensors = list(model.parameters()) + list(model.buffers())
+    total = sum(t.numel() * t.element_size() for t in tensors)
+    for module in model.modules():
+        if isinstance(module, torch.ao.nn.quantized.dynamic.Linear):
+            weight, bias = module._weight_bias()
+            total += weight.numel() * weight.element_size()
+            total += bias.numel() * bias.element_size() if bias is not None else 0
+    return total / (1024 * 1024)
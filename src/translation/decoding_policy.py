@@ -0,0 +1,346 @@
+"""
+Decoding policy
+Chooses the decoding strategy and output token budget per dataset field,
+with length ratios learned from earlier runs
+"""
+
+import copy
+import json
+import math
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("greedy", "sample", "beam")
+
+# Per-field options that override the policy defaults
+FIELD_OPTIONS = (
+    "strategy", "num_beams", "temperature", "top_p",
+    "length_ratio", "length_margin", "budget_scale", "max_new_tokens", "prompt_lookup"
+)
+
+
+class DecodingPolicy:
+    """
+    Per-field decoding strategy and source-length-aware output budget
+
+    The output budget is ceil(scale * (ratio * source tokens + margin)),
+    capped at max_new_tokens. Once a field has enough observed translations, its
+    ratio is the chosen quantile of the observed output/source ratios
+    instead of the configured one. Translations cut off at their budget
+    are observed at budget/source as lower bounds of their ratio (the
+    quantile is a Kaplan-Meier estimate); when they leave the quantile
+    undetermined, the ratio is raised by censored_growth.
+    """
+
+    def __init__(
+        self,
+        strategy: str = "beam",
+        num_beams: int = 4,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        length_ratio: float = 2.0,
+        length_margin: int = 16,
+        budget_scale: float = 1.0,
+        max_new_tokens: int = 512,
+        fields: Optional[Dict[str, dict]] = None,
+        stats_path: Optional[str] = None,
+        min_samples: int = 20,
+        quantile: float = 0.98,
+        max_samples: int = 2000,
+        min_source_tokens: int = 8,
+        censored_growth: float = 1.25
+    ):
+        """
+        Initialize the policy
+
+        Args:
+            strategy: Default strategy ("greedy", "sample" or "beam")
+            num_beams: Beams used by the beam strategy
+            temperature: Sampling temperature of the sample strategy
+            top_p: Nucleus sampling threshold of the sample strategy
+            length_ratio: Output/source token ratio used until one is learned
+            length_margin: Tokens added to every budget (covers short sources)
+            budget_scale: Factor applied to every budget
+            max_new_tokens: Upper bound on any output budget
+            fields: Per-field overrides of the options above, keyed by field
+                name, e.g. {"problems": {"strategy": "greedy", "prompt_lookup": True}}
+            stats_path: JSON file with length ratios observed in earlier runs
+                (None to keep them in memory only)
+            min_samples: Observations needed before a learned ratio is used
+            quantile: Quantile of the observed ratios used as the learned ratio
+            max_samples: Most recent observations kept per field
+            min_source_tokens: Shorter sources are not observed (their ratio
+                is dominated by noise)
+            censored_growth: Factor applied to the largest observed ratio
+                when too many translations were cut off to estimate the
+                quantile, so budgets grow until it can be estimated
+        """
+        self.defaults = {
+            "strategy": strategy,
+            "num_beams": num_beams,
+            "temperature": temperature,
+            "top_p": top_p,
+            "length_ratio": length_ratio,
+            "length_margin": length_margin,
+            "budget_scale": budget_scale,
+            "max_new_tokens": max_new_tokens,
+            "prompt_lookup": False
+        }
+        self.fields = {name: dict(options or {}) for name, options in (fields or {}).items()}
+        for name, options in [(None, self.defaults)] + list(self.fields.items()):
+            self._validate(name, options)
+
+        self.stats_path = Path(stats_path) if stats_path else None
+        self.min_samples = min_samples
+        self.quantile = quantile
+        self.max_samples = max_samples
+        self.min_source_tokens = min_source_tokens
+        self.censored_growth = censored_growth
+        # Per field: (output/source ratio, whether the output was cut off)
+        self._ratios: Dict[str, List[Tuple[float, bool]]] = {}
+        # The same, for observations made since this policy was created (not loaded)
+        self._observed: Dict[str, List[Tuple[float, bool]]] = {}
+        self.load()
+
+    @classmethod
+    def from_config(cls, config: dict, dataset: Optional[str] = None, **overrides) -> "DecodingPolicy":
+        """
+        Build a policy from a parsed config.yaml
+
+        The top-level "generation" section holds the defaults and per-field
+        options; a "generation" section under datasets.<dataset> overrides
+        them for that dataset.
+
+        Args:
+            config: Parsed configuration dictionary
+            dataset: Dataset key under "datasets" (e.g. "aime")
+            **overrides: Constructor arguments that take precedence
+
+        Returns:
+            Configured DecodingPolicy
+        """
+        generation = dict(config.get("generation") or {})
+        dataset_generation = ((config.get("datasets") or {}).get(dataset) or {}).get("generation") or {}
+
+        fields = {name: dict(options or {}) for name, options in (generation.pop("fields", None) or {}).items()}
+        for name, options in (dataset_generation.get("fields") or {}).items():
+            fields.setdefault(name, {}).update(options or {})
+        generation.update({k: v for k, v in dataset_generation.items() if k != "fields"})
+
+        if "length_stats_path" in generation:
+            generation["stats_path"] = generation.pop("length_stats_path")
+        generation.update(overrides)
+        return cls(fields=fields, **generation)
+
+    @staticmethod
+    def _validate(field_name: Optional[str], options: dict):
+        """Reject unknown options and strategies"""
+        unknown = set(options) - set(FIELD_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown decoding options for field {field_name!r}: {sorted(unknown)}")
+        if "strategy" in options and options["strategy"] not in STRATEGIES:
+            raise ValueError(
+                f"Unknown decoding strategy {options['strategy']!r}; "
+                f"expected one of {STRATEGIES}")
+
+    def with_overrides(self, **options) -> "DecodingPolicy":
+        """
+        Derive a policy with options forced for every field
+
+        The derived policy shares this policy's length observations, so
+        what it learns is kept and saved by the original.
+
+        Args:
+            **options: Field options to force, e.g. strategy="greedy"
+
+        Returns:
+            Derived DecodingPolicy
+        """
+        self._validate(None, options)
+        policy = copy.copy(self)
+        policy.defaults = {**self.defaults, **options}
+        policy.fields = {name: {**field, **options} for name, field in self.fields.items()}
+        return policy
+
+    def field_options(self, field_name: Optional[str] = None) -> dict:
+        """Get the effective options of a field (defaults merged with overrides)"""
+        options = dict(self.defaults)
+        options.update(self.fields.get(field_name, {}))
+        return options
+
+    def strategy(self, field_name: Optional[str] = None) -> str:
+        """Get the decoding strategy of a field"""
+        return self.field_options(field_name)["strategy"]
+
+    def uses_prompt_lookup(self, field_name: Optional[str] = None) -> bool:
+        """Whether prompt-lookup decoding is requested for a field"""
+        return bool(self.field_options(field_name)["prompt_lookup"])
+
+    def generation_kwargs(self, field_name: Optional[str] = None) -> dict:
+        """
+        Get model.generate() arguments for a field's strategy
+
+        Args:
+            field_name: Dataset field name
+
+        Returns:
+            Dictionary of decoding arguments (without the token budget)
+        """
+        options = self.field_options(field_name)
+        if options["strategy"] == "beam":
+            return {"num_beams": options["num_beams"], "do_sample": False, "early_stopping": True}
+        if options["strategy"] == "sample":
+            return {
+                "num_beams": 1,
+                "do_sample": True,
+                "temperature": options["temperature"],
+                "top_p": options["top_p"]
+            }
+        return {"num_beams": 1, "do_sample": False}
+
+    def describe(self, field_name: Optional[str] = None) -> str:
+        """Short description of a field's strategy, e.g. "beam4" or "greedy" """
+        options = self.field_options(field_name)
+        if options["strategy"] == "beam":
+            return f"beam{options['num_beams']}"
+        if options["strategy"] == "sample":
+            return f"sample(t={options['temperature']},p={options['top_p']})"
+        return "greedy"
+
+    def length_ratio(self, field_name: Optional[str] = None) -> float:
+        """Get the learned output/source ratio of a field, or the configured one"""
+        ratios = self._ratios.get(self._key(field_name), [])
+        if len(ratios) < self.min_samples:
+            return self.field_options(field_name)["length_ratio"]
+        # Kaplan-Meier estimate of the quantile: a cut-off translation only
+        # tells that its natural ratio is above its bound (uncut ones sort first on ties)
+        ordered = sorted(ratios)
+        at_risk = len(ordered)
+        survival = 1.0
+        for ratio, censored in ordered:
+            if not censored:
+                survival *= 1 - 1 / at_risk
+                if survival <= 1 - self.quantile + 1e-12:
+                    return ratio
+            at_risk -= 1
+        # Too many cut-off translations to place the quantile: grow past them
+        return ordered[-1][0] * self.censored_growth
+
+    def max_new_tokens(self, source_tokens: int, field_name: Optional[str] = None) -> int:
+        """
+        Get the output token budget for a source text
+
+        Args:
+            source_tokens: Token count of the source text (without the prompt prefix)
+            field_name: Dataset field name
+
+        Returns:
+            Maximum number of tokens to generate
+        """
+        options = self.field_options(field_name)
+        budget = math.ceil(options["budget_scale"] * (
+            self.length_ratio(field_name) * source_tokens + options["length_margin"]))
+        return max(1, min(budget, options["max_new_tokens"]))
+
+    def observe(
+        self,
+        source_tokens: int,
+        output_tokens: int,
+        field_name: Optional[str] = None,
+        budget: Optional[int] = None
+    ):
+        """
+        Record the length of a finished translation
+
+        Outputs that used their whole budget were cut off; they are
+        recorded at budget/source, a lower bound of their natural ratio,
+        so cut-off outputs keep the learned ratio from drifting down.
+
+        Args:
+            source_tokens: Token count of the source text
+            output_tokens: Token count of its translation
+            field_name: Dataset field name
+            budget: Token budget the translation was generated with
+        """
+        if source_tokens < self.min_source_tokens or output_tokens <= 0:
+            return
+        censored = budget is not None and output_tokens >= budget
+        if censored:
+            output_tokens = budget
+        self.add_observations({self._key(field_name): [(output_tokens / source_tokens, censored)]})
+
+    def get_observations(self) -> Dict[str, List[Tuple[float, bool]]]:
+        """Get the length ratios observed since this policy was created, per field"""
+        return {key: list(values) for key, values in self._observed.items()}
+
+    def add_observations(self, observations: Dict[str, List[Tuple[float, bool]]]):
+        """
+        Record length ratios observed elsewhere, e.g. by another replica
+
+        Args:
+            observations: Output of another policy's get_observations()
+        """
+        for key, values in observations.items():
+            for store in (self._ratios, self._observed):
+                ratios = store.setdefault(key, [])
+                ratios.extend(tuple(value) for value in values)
+                del ratios[:-self.max_samples]
+
+    @staticmethod
+    def _key(field_name: Optional[str]) -> str:
+        """Storage key of a field's observations"""
+        return field_name or "*"
+
+    def load(self):
+        """Load length ratios observed in earlier runs, if any"""
+        if self.stats_path is None or not self.stats_path.exists():
+            return
+        try:
+            with open(self.stats_path, "r", encoding="utf-8") as f:
+                # Earlier files hold plain ratios of uncut outputs
+                self._ratios = {
+                    key: [(value, False) if isinstance(value, (int, float)) else tuple(value)
+                          for value in values]
+                    for key, values in json.load(f).items()
+                }
+            logger.info(
+                f"Loaded length ratios for {len(self._ratios)} fields from {self.stats_path}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load length ratios from {self.stats_path}: {e}")
+
+    def save(self):
+        """Persist the observed length ratios for later runs"""
+        if self.stats_path is None:
+            return
+        self.stats_path.parent.mkdir(parents=True, exist_ok=True)
+        # Replace the file in one step, so a reader never sees half of it
+        staging = self.stats_path.with_name(f"{self.stats_path.name}.tmp-{os.getpid()}")
+        with open(staging, "w", encoding="utf-8") as f:
+            json.dump({key: [list(value) for value in values] for key, values in self._ratios.items()}, f)
+        os.replace(staging, self.stats_path)
+
+    def get_stats(self) -> Dict:
+        """
+        Get per-field strategies and length ratios
+
+        Returns:
+            Dictionary with the default strategy and, per known field, its
+            strategy, observation count and effective length ratio
+        """
+        names = set(self.fields) | {key for key in self._ratios if key != "*"}
+        return {
+            "default": self.describe(),
+            "fields": {
+                name: {
+                    "strategy": self.describe(name),
+                    "observations": len(self._ratios.get(name, [])),
+                    "censored": sum(censored for _, censored in self._ratios.get(name, [])),
+                    "length_ratio": self.length_ratio(name)
+                }
+                for name in sorted(names)
+            }
+        }
@@ -3,13 +3,37 @@ Hunyuan-MT-Chimera-7B-fp8 Translation Module
 Using local Hunyuan-MT-Chimera-7B-fp8 model for English to Vietnamese translation
 """
 
+import asyncio
+import contextlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM
+from transformers import AutoTokenizer, AutoModelForCausalLM, StoppingCriteriaList
 from typing import List, Optional, Union
 import logging
 from tqdm import tqdm
 import time
 
+from .batch_scheduler import TokenBudgetScheduler
+from .continuous_batching import ContinuousBatchingEngine
+from .translation_cache import TranslationCache
+from .segmentation import TextSegmenter
+from .math_masking import MathSpanMasker
+from .bypass import BypassClassifier
+from .prefix_cache import PromptPrefixCache
+from .speculative import SpeculativeDecoder, DraftModelProposer, PromptLookupProposer
+from .decoding_policy import DecodingPolicy
+from .quality_validator import TranslationValidator, escalation_savings
+from .stopping import RunawayGuard
+from .backends import InferenceBackend
+from .micro_batching import MicroBatcher
+from .cpu_inference import configure_cpu_threads, load_dtype, prepare_cpu_model, model_size_mb
+from .memory import process_memory
+from .checkpoint_cache import CheckpointCache
+from .static_cache import StaticDecoding
+from .kv_quantization import KV_CACHE_BITS, QuantizedKVCache
+from .vocab_restriction import VocabularyRestriction
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,7 +47,35 @@ class HunyuanTranslator:
         model_name: str = "./weight/Hunyuan-MT-Chimera-7B-fp8",
         device: Optional[str] = None,
         batch_size: int = 4,
-        max_length: int = 512
+        max_length: int = 512,
+        max_batch_tokens: Optional[int] = None,
+        use_continuous_batching: bool = False,
+        cache: Optional[TranslationCache] = None,
+        segmenter: Optional[TextSegmenter] = None,
+        masker: Optional[MathSpanMasker] = None,
+        bypass: Optional[BypassClassifier] = None,
+        use_prefix_cache: bool = False,
+        draft_model_name: Optional[str] = None,
+        num_speculative_tokens: int = 4,
+        min_acceptance_rate: float = 0.3,
+        decoding_policy: Optional[DecodingPolicy] = None,
+        prompt_lookup_max_ngram: int = 3,
+        prompt_lookup_num_tokens: int = 10,
+        validator: Optional[TranslationValidator] = None,
+        escalation_options: Optional[dict] = None,
+        runaway_guard: Optional[RunawayGuard] = None,
+        model: Optional[torch.nn.Module] = None,
+        backend: Optional[InferenceBackend] = None,
+        async_max_batch_size: int = 64,
+        async_max_wait: float = 0.01,
+        load_in_background: bool = False,
+        cpu_mode: Optional[str] = None,
+        cpu_threads: Optional[int] = None,
+        checkpoint_cache: Optional[CheckpointCache] = None,
+        compiled_decoding: bool = False,
+        compile_cache_dir: str = "cache/compile",
+        kv_cache_quantization: Optional[str] = None,
+        restrict_vocabulary: bool = False
     ):
         """
         Initialize the Hunyuan-MT-Chimera-7B-fp8 translator
@@ -32,49 +84,312 @@ class HunyuanTranslator:
             model_name: The local model path (default: ./weight/Hunyuan-MT-Chimera-7B-fp8)
             device: Device to run the model on (auto-detect if None)
             batch_size: Batch size for translation
-            max_length: Maximum sequence length
+            max_length: Maximum prompt length in tokens
+            max_batch_tokens: Maximum padded prompt tokens per batch
+                (None to batch by batch_size only)
+            use_continuous_batching: Decode greedy fields with iteration-level
+                batching over batch_size slots instead of static batches
+            cache: Persistent translation cache consulted before the model
+            segmenter: Splits texts into sentences translated as separate
+                units (None to translate whole texts)
+            masker: Replaces formulas, LaTeX and code with placeholders
+                before generation (None to send texts unchanged)
+            bypass: Passes numeric, symbolic, URL/code-only and
+                already-translated texts through without inference
+            use_prefix_cache: Encode the instruction prefix once per language
+                pair and reuse its KV cache for every item
+            draft_model_name: Local path of a small draft model sharing the
+                tokenizer; enables speculative decoding of greedy fields
+            num_speculative_tokens: Draft tokens proposed per decoding step
+            min_acceptance_rate: Fall back to regular batched decoding when
+                the draft acceptance rate drops below this
+            decoding_policy: Per-field decoding strategy, output token budget
+                and prompt-lookup switch (default: beam search with 4 beams,
+                or greedy with continuous batching or a draft model, and a
+                source-length-based budget)
+            prompt_lookup_max_ngram: Longest n-gram matched against the
+                prompt by prompt-lookup decoding
+            prompt_lookup_num_tokens: Tokens copied per prompt-lookup step
+            validator: Enables two-tier decoding: everything is translated
+                greedily first and only translations the validator flags are
+                translated again with escalation_options
+            escalation_options: Decoding options forced for flagged items
+                (default: beam search with 4 beams and twice the token budget)
+            runaway_guard: Stops looping or overlong rows of greedy and
+                sampled batches individually and translates them again
+            model: Already loaded model to use instead of loading model_name
+                (e.g. weights in shared memory attached by a worker process);
+                only the tokenizer is loaded from model_name
+            backend: Generate with this backend (e.g. an OpenAI-compatible
+                server) instead of in-process transformers; no model is
+                loaded, and model_name only provides the tokenizer used for
+                output budgets, if it is available
+            async_max_batch_size: Distinct texts per micro-batch of the
+                async API
+            async_max_wait: Seconds an async request waits for others to
+                join its micro-batch
+            load_in_background: Load the tokenizer right away and the model
+                in a background thread; translation calls wait for it, while
+                the caller can load data and pretokenize() meanwhile
+            cpu_mode: CPU execution mode (device "cpu" only): "fp32", "bf16",
+                or "int8" for dynamically quantized linear layers (None to
+                load the checkpoint dtype as is)
+            cpu_threads: Intra-op threads in a CPU mode (default: the
+                cores this process may run on)
+            checkpoint_cache: Load the cpu_mode checkpoint converted ahead of
+                time (see convert_checkpoint.py) from this cache, through
+                memory-mapped tensors, when it exists
+            compiled_decoding: Generate single-beam fields with a static KV
+                cache preallocated per batch shape and a torch.compile-d
+                decode step (compiled on accelerators, eager on CPU)
+            compile_cache_dir: Directory caching the compiled kernels of
+                compiled_decoding across runs
+            kv_cache_quantization: Store the KV cache of generate calls as
+                "int8" or "int4" (None for full precision)
+            restrict_vocabulary: Compute output logits only for Latin and
+                Vietnamese letters, digits, math symbols and the tokens of
+                the sources being translated
         """
         self.model_name = model_name
         self.batch_size = batch_size
         self.max_length = max_length
+        self.max_batch_tokens = max_batch_tokens
+        self.scheduler = TokenBudgetScheduler(
+            max_batch_tokens=max_batch_tokens,
+            max_batch_size=batch_size
+        )
+        self.use_continuous_batching = use_continuous_batching
+        self.engine = None
+        self.cache = cache
+        self.segmenter = segmenter
+        self.masker = masker
+        self.bypass = bypass
+        self.draft_model_name = draft_model_name
+        self.model = model
+        self.backend = backend
+        self.async_max_batch_size = async_max_batch_size
+        self.async_max_wait = async_max_wait
+        self.batcher = None
+        self.use_prefix_cache = use_prefix_cache
+        self.num_speculative_tokens = num_speculative_tokens
+        self.min_acceptance_rate = min_acceptance_rate
+        self.prompt_lookup_max_ngram = prompt_lookup_max_ngram
+        self.prompt_lookup_num_tokens = prompt_lookup_num_tokens
+        self._prompt_length_memo = {}
+        self._source_count_memo = {}
+        self._model_future = None
+        self._startup_lock = threading.Lock()
+        self.cpu_mode = cpu_mode
+        self.cpu_threads = cpu_threads
+        self.checkpoint_cache = checkpoint_cache
+        self.compiled_decoding = compiled_decoding
+        self.compile_cache_dir = compile_cache_dir
+        if kv_cache_quantization is not None and kv_cache_quantization not in KV_CACHE_BITS:
+            raise ValueError(f"Unknown KV cache quantization '{kv_cache_quantization}', "
+                             f"expected one of {', '.join(KV_CACHE_BITS)}")
+        if kv_cache_quantization is not None and compiled_decoding:
+            raise ValueError("kv_cache_quantization cannot be combined with compiled_decoding")
+        self.kv_cache_quantization = kv_cache_quantization
+        self.restrict_vocabulary = restrict_vocabulary
+        self.kv_cache_stats = {"calls": 0, "peak_kv_bytes": 0, "peak_batch_size": 0}
+        self.generation_stats = {"generated_tokens": 0, "generate_seconds": 0.0}
+        self.startup_stats = {
+            "tokenizer_seconds": 0.0,
+            "model_seconds": 0.0,
+            "model_wait_seconds": 0.0,
+            "checkpoint": None
+        }
+        self.decoding_policy = decoding_policy or DecodingPolicy(
+            strategy="greedy" if use_continuous_batching or draft_model_name else "beam",
+            max_new_tokens=max_length
+        )
+        self.validator = validator
+        self.runaway_guard = runaway_guard
+        self.escalation_options = escalation_options or {
+            "strategy": "beam", "num_beams": 4, "budget_scale": 2.0, "prompt_lookup": False
+        }
+        self.escalation_stats = {
+            "items": 0,
+            "escalated": 0,
+            "resolved": 0,
+            "first_pass_seconds": 0.0,
+            "escalation_seconds": 0.0,
+            # Decode work done, and that of running every item at the escalation setting
+            "decode_cost": 0.0,
+            "full_decode_cost": 0.0
+        }
 
-        # Auto-detect device if not specified
+        # Auto-detect device if not specified (and let accelerate place the model)
+        self.device_map = "auto" if device is None else device
         if device is None:
             self.device = "cuda" if torch.cuda.is_available() else "cpu"
         else:
             self.device = device
 
         logger.info(f"Using device: {self.device}")
+        if cpu_mode is not None:
+            if self.device != "cpu":
+                raise ValueError(f"cpu_mode '{cpu_mode}' requires device 'cpu', got '{self.device}'")
+            load_dtype(cpu_mode)
+        if checkpoint_cache is not None and cpu_mode is None:
+            raise ValueError("checkpoint_cache requires a cpu_mode")
 
         # Initialize model and tokenizer
-        self._load_model()
+        self.prefix_cache = None
+        self.speculative = None
+        self.prompt_lookup = None
+        self.static_decoding = None
+        self.vocab_restriction = None
+        if self.backend is not None:
+            self._load_backend_tokenizer()
+        elif load_in_background:
+            self._load_tokenizer()
+            loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-loader")
+            self._model_future = loader.submit(self._load_model)
+            loader.shutdown(wait=False)
+        else:
+            self._load_model()
+
+    def _init_accelerations(self):
+        """Build the decoding accelerations that drive the loaded model directly"""
+        if self.compiled_decoding:
+            self.static_decoding = StaticDecoding(self.model, self.compile_cache_dir)
+
+        if self.restrict_vocabulary:
+            self.vocab_restriction = VocabularyRestriction(self.model, self.tokenizer)
+
+        if self.use_prefix_cache:
+            self.prefix_cache = PromptPrefixCache(self.model, self.tokenizer, self.device)
+
+        if self.draft_model_name:
+            self.speculative = SpeculativeDecoder(
+                self.model,
+                DraftModelProposer(self.draft_model, self.device),
+                eos_token_id=self.tokenizer.eos_token_id,
+                num_speculative_tokens=self.num_speculative_tokens,
+                min_acceptance_rate=self.min_acceptance_rate,
+                device=self.device
+            )
+
+        if any(self.decoding_policy.uses_prompt_lookup(field) for field in self.decoding_policy.fields):
+            self.prompt_lookup = SpeculativeDecoder(
+                self.model,
+                PromptLookupProposer(max_ngram_size=self.prompt_lookup_max_ngram),
+                eos_token_id=self.tokenizer.eos_token_id,
+                num_speculative_tokens=self.prompt_lookup_num_tokens,
+                min_acceptance_rate=self.min_acceptance_rate,
+                device=self.device
+            )
+
+    def wait_until_ready(self):
+        """
+        Block until a background model load has finished (re-raising its error)
+
+        Safe to call from several threads (e.g. the pipeline and the async
+        API's batching thread): the future is kept, so every caller waits on
+        it and a failed load is raised to each of them.
+        """
+        future = self._model_future
+        if future is None:
+            return
+        if future.done():
+            future.result()
+            return
+        start_time = time.perf_counter()
+        future.result()
+        waited = time.perf_counter() - start_time
+        with self._startup_lock:
+            self.startup_stats["model_wait_seconds"] += waited
+        logger.info(f"Startup: waited {waited:.2f}s for the background model load")
+
+    def is_ready(self) -> bool:
+        """Whether the model is loaded (always true unless loading in the background)"""
+        return self._model_future is None or self._model_future.done()
+
+    def _load_tokenizer(self):
+        """Load the tokenizer from the local model path"""
+        start_time = time.perf_counter()
+        self.tokenizer = AutoTokenizer.from_pretrained(
+            self.model_name,
+            trust_remote_code=True,
+            local_files_only=True
+        )
+
+        # Decoder-only models need left padding for batched generation
+        self.tokenizer.padding_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+
+        self.startup_stats["tokenizer_seconds"] = time.perf_counter() - start_time
+        logger.info(f"Startup: tokenizer loaded in {self.startup_stats['tokenizer_seconds']:.2f}s")
+
+    def _load_backend_tokenizer(self):
+        """Load the tokenizer for budgets of a remote backend, if available"""
+        logger.info(f"Using inference backend: {self.backend.describe()}")
+        try:
+            self._load_tokenizer()
+        except Exception as e:
+            logger.warning(
+                f"No tokenizer at {self.model_name} ({e}); estimating source token counts")
+            self.tokenizer = None
 
     def _load_model(self):
         """Load the Hunyuan-MT-Chimera-7B-fp8 model and tokenizer from local path"""
         try:
             logger.info(f"Loading local model: {self.model_name}")
+            start_time = time.perf_counter()
 
-            # Load tokenizer from local path
-            self.tokenizer = AutoTokenizer.from_pretrained(
-                self.model_name,
-                trust_remote_code=True,
-                local_files_only=True
-            )
-
-            # Load model from local path
-            self.model = AutoModelForCausalLM.from_pretrained(
-                self.model_name,
-                dtype="auto",
-                device_map="auto"
-            )
+            # Load tokenizer from local path (unless loaded before a background load)
+            if getattr(self, "tokenizer", None) is None:
+                self._load_tokenizer()
 
-            # Move model to device
-            self.model.to(self.device)
-            self.model.eval()
+            if self.model is not None:
+                # Weights were loaded by another process; use them as they are
+                logger.info("Using preloaded model weights")
+                self.model.eval()
+                self.startup_stats["checkpoint"] = "preloaded"
+            elif (self.checkpoint_cache is not None
+                    and self.checkpoint_cache.is_converted(self.model_name, self.cpu_mode)):
+                self.model = self.checkpoint_cache.load(self.model_name, self.cpu_mode)
+                self.startup_stats["checkpoint"] = "converted"
+            else:
+                if self.checkpoint_cache is not None:
+                    logger.info(
+                        f"No converted {self.cpu_mode} checkpoint in {self.checkpoint_cache.cache_dir}; "
+                        f"loading the source (run convert_checkpoint.py to skip this next time)")
+                self.startup_stats["checkpoint"] = "source"
+                # Load model from local path; device_map already places it
+                self.model = AutoModelForCausalLM.from_pretrained(
+                    self.model_name,
+                    dtype=load_dtype(self.cpu_mode) if self.cpu_mode else "auto",
+                    device_map=self.device_map
+                )
+                self.model.eval()
+                if self.cpu_mode:
+                    self.model = prepare_cpu_model(self.model, self.cpu_mode)
+            if self.cpu_mode:
+                self.cpu_threads = configure_cpu_threads(self.cpu_threads)
 
             logger.info(
                 "Local Hunyuan-MT-Chimera-7B-fp8 model loaded successfully")
 
+            # Load the draft model for speculative decoding
+            if self.draft_model_name:
+                logger.info(f"Loading draft model: {self.draft_model_name}")
+                self.draft_model = AutoModelForCausalLM.from_pretrained(
+                    self.draft_model_name,
+                    dtype="auto",
+                    local_files_only=True
+                )
+                self.draft_model.to(self.device)
+                self.draft_model.eval()
+                if self.cpu_mode:
+                    self.draft_model = prepare_cpu_model(self.draft_model, self.cpu_mode)
+
+            self._init_accelerations()
+            self.startup_stats["model_seconds"] = time.perf_counter() - start_time
+            logger.info(f"Startup: model loaded in {self.startup_stats['model_seconds']:.2f}s")
+
         except Exception as e:
             logger.error(f"Error loading model: {e}")
             raise
@@ -83,64 +398,509 @@ class HunyuanTranslator:
         self,
         text: str,
         source_lang: str = "en",
-        target_lang: str = "vi"
+        target_lang: str = "vi",
+        field_name: Optional[str] = None
     ) -> str:
         """
         Translate a single text string
 
+        The text takes the same path as in translate_batch (cache, bypass,
+        segmentation, masking and adaptive decoding).
+
         Args:
             text: Text to translate
             source_lang: Source language code
             target_lang: Target language code
+            field_name: Dataset field the text belongs to (selects the
+                per-field generation options)
 
         Returns:
             Translated text
         """
+        return self.translate_batch(
+            [text], source_lang, target_lang, show_progress=False, field_name=field_name)[0]
+
+    def _generate_single(
+        self,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        field_name: Optional[str] = None
+    ) -> str:
+        """Generate the translation of one prepared text, or "" if it fails"""
         if not text.strip():
             return ""
 
         try:
-            # Prepare input with language codes
-            input_text = f"<{source_lang}2{target_lang}> {text}"
+            if self.backend is not None:
+                return self._generate_remote([text], source_lang, target_lang, field_name)[0]
+            return self._generate_batch([text], source_lang, target_lang, field_name)[0]
 
-            # Tokenize input
+        except Exception as e:
+            logger.error(f"Translation error for text '{text[:50]}...': {e}")
+            return ""
+
+    def _get_batcher(self) -> MicroBatcher:
+        """Start the micro-batching thread of the async API on first use"""
+        if self.batcher is None:
+            self.batcher = MicroBatcher(
+                self, max_batch_size=self.async_max_batch_size, max_wait=self.async_max_wait)
+        return self.batcher
+
+    async def translate_async(
+        self,
+        text: str,
+        source_lang: str = "en",
+        target_lang: str = "vi",
+        field_name: Optional[str] = None
+    ) -> str:
+        """
+        Translate a single text without blocking the event loop
+
+        Concurrent calls are translated together in micro-batches, and
+        identical texts in flight share one translation.
+
+        Args:
+            text: Text to translate
+            source_lang: Source language code
+            target_lang: Target language code
+            field_name: Dataset field the text belongs to
+
+        Returns:
+            Translated text
+        """
+        if not text.strip():
+            return ""
+        future = self._get_batcher().submit(text, source_lang, target_lang, field_name)
+        return await asyncio.wrap_future(future)
+
+    async def translate_many_async(
+        self,
+        texts: List[str],
+        source_lang: str = "en",
+        target_lang: str = "vi",
+        field_name: Optional[str] = None
+    ) -> List[str]:
+        """
+        Translate several texts without blocking the event loop
+
+        The texts join the same micro-batches as concurrent single requests.
+
+        Args:
+            texts: List of texts to translate
+            source_lang: Source language code
+            target_lang: Target language code
+            field_name: Dataset field the texts belong to
+
+        Returns:
+            List of translated texts in input order
+        """
+        return list(await asyncio.gather(*[
+            self.translate_async(text, source_lang, target_lang, field_name) for text in texts
+        ]))
+
+    def close_async(self):
+        """Finish queued async requests and stop the micro-batching thread"""
+        if self.batcher is not None:
+            self.batcher.close()
+            self.batcher = None
+
+    def _build_prefix(self, source_lang: str, target_lang: str) -> str:
+        """Build the fixed instruction prefix shared by every prompt of a language pair"""
+        return f"<{source_lang}2{target_lang}>"
+
+    def _build_prompt(self, text: str, source_lang: str, target_lang: str) -> str:
+        """Build the model prompt for a single text"""
+        return f"{self._build_prefix(source_lang, target_lang)} {text}"
+
+    def _encode_with_prefix(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        expand: int = 1
+    ):
+        """
+        Tokenize a batch behind the cached prompt prefix
+
+        Rows are laid out as [prefix][padding][text] so the prefix sits at
+        the same positions in every row and its KV cache can be shared;
+        position ids come from the attention mask, so padding in the middle
+        does not shift the text.
+
+        Returns:
+            Tuple (model inputs, prefix KV cache expanded to len(texts) * expand
+            rows), or None if a prompt tokenizes differently as a whole
+        """
+        prefix = self._build_prefix(source_lang, target_lang)
+        prefix_ids = self.prefix_cache.get_ids(prefix)
+        text_ids = self.tokenizer(
+            [f" {text}" for text in texts],
+            add_special_tokens=False,
+            max_length=max(self.max_length - len(prefix_ids), 1),
+            truncation=True
+        )["input_ids"]
+
+        # Tokens may merge across the join (e.g. SentencePiece-style BPE that
+        # does not split on spaces); the model must see the usual prompt tokens
+        prompt_ids = self.tokenizer(
+            [self._build_prompt(text, source_lang, target_lang) for text in texts],
+            max_length=self.max_length,
+            truncation=True
+        )["input_ids"]
+        if any(prefix_ids + ids != joint for ids, joint in zip(text_ids, prompt_ids)):
+            self.prefix_cache.stats["items_not_served"] += len(texts)
+            return None
+
+        width = max(len(ids) for ids in text_ids)
+        pad_id = self.tokenizer.pad_token_id
+        input_ids = [
+            prefix_ids + [pad_id] * (width - len(ids)) + ids for ids in text_ids
+        ]
+        attention_mask = [
+            [1] * len(prefix_ids) + [0] * (width - len(ids)) + [1] * len(ids)
+            for ids in text_ids
+        ]
+
+        inputs = {
+            "input_ids": torch.tensor(input_ids, device=self.device),
+            "attention_mask": torch.tensor(attention_mask, device=self.device)
+        }
+        return inputs, self.prefix_cache.build(prefix, len(texts), expand=expand)
+
+    def _prompt_lengths(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str
+    ) -> List[int]:
+        """Get the tokenized (truncated) prompt length of each text"""
+        known = [self._prompt_length_memo.get((text, source_lang, target_lang)) for text in texts]
+        missing = [text for text, length in zip(texts, known) if length is None]
+        if missing:
+            prompts = [self._build_prompt(text, source_lang, target_lang) for text in missing]
+            encoded = self.tokenizer(prompts, max_length=self.max_length, truncation=True)
+            computed = iter(len(ids) for ids in encoded["input_ids"])
+        return [length if length is not None else next(computed) for length in known]
+
+    def _source_token_counts(self, texts: List[str]) -> List[int]:
+        """Get the token count of each source text, without the prompt prefix"""
+        if self.tokenizer is None:
+            # Remote backend without a local tokenizer: about 4 characters per token
+            return [len(text) // 4 + 1 for text in texts]
+        known = [self._source_count_memo.get(text) for text in texts]
+        missing = [text for text, count in zip(texts, known) if count is None]
+        if missing:
+            encoded = self.tokenizer(
+                missing, add_special_tokens=False, max_length=self.max_length, truncation=True)
+            computed = iter(len(ids) for ids in encoded["input_ids"])
+        return [count if count is not None else next(computed) for count in known]
+
+    def pretokenize(self, texts: List[str], source_lang: str = "en", target_lang: str = "vi") -> int:
+        """
+        Tokenize the work units of texts ahead of translation
+
+        Meant to run while the model loads in the background: the prompt
+        lengths used for batching and the source token counts used for
+        output budgets are then looked up instead of computed. Units are
+        the texts, or their segments when a segmenter is configured;
+        masked texts are still tokenized when they are translated.
+
+        Args:
+            texts: Texts that will be translated
+            source_lang: Source language code
+            target_lang: Target language code
+
+        Returns:
+            Number of units tokenized
+        """
+        if self.tokenizer is None:
+            return 0
+
+        start_time = time.perf_counter()
+        units = []
+        for text in texts:
+            if not isinstance(text, str):
+                continue
+            if self.segmenter is not None:
+                units.extend(self.segmenter.segment(text)[0])
+            else:
+                units.append(text)
+        units = [
+            unit for unit in dict.fromkeys(units)
+            if unit.strip() and (unit, source_lang, target_lang) not in self._prompt_length_memo
+        ]
+        if not units:
+            return 0
+
+        prompt_lengths = self._prompt_lengths(units, source_lang, target_lang)
+        source_counts = self._source_token_counts(units)
+        for unit, prompt_length, count in zip(units, prompt_lengths, source_counts):
+            self._prompt_length_memo[(unit, source_lang, target_lang)] = prompt_length
+            self._source_count_memo[unit] = count
+        logger.info(
+            f"Startup: pretokenized {len(units)} units in {time.perf_counter() - start_time:.2f}s")
+        return len(units)
+
+    def _output_token_count(self, row: torch.Tensor) -> int:
+        """Count generated tokens in a row up to the first EOS or padding"""
+        stops = {self.tokenizer.eos_token_id, self.tokenizer.pad_token_id}
+        ids = row.tolist()
+        for position, token in enumerate(ids):
+            if token in stops:
+                return position
+        return len(ids)
+
+    def _generate_batch(
+        self,
+        texts: List[str],
+        source_lang: str = "en",
+        target_lang: str = "vi",
+        field_name: Optional[str] = None,
+        retry_budgets: Optional[List[int]] = None
+    ) -> List[str]:
+        """
+        Translate a list of texts with a single padded generate call
+
+        Args:
+            texts: Non-empty texts to translate together
+            source_lang: Source language code
+            target_lang: Target language code
+            field_name: Dataset field the texts belong to
+            retry_budgets: Output budgets of a retry of rows the runaway
+                guard stopped (generated with its retry arguments, never stopped)
+
+        Returns:
+            Translated texts in input order
+        """
+        if self.vocab_restriction is not None:
+            self.vocab_restriction.set_source_texts(texts)
+
+        decoder = self._speculative_decoder(field_name)
+        if decoder is not None:
+            return [
+                self._generate_speculative(decoder, text, source_lang, target_lang, field_name)
+                for text in texts
+            ]
+
+        generation_kwargs = self.decoding_policy.generation_kwargs(field_name)
+        num_beams = generation_kwargs["num_beams"]
+
+        encoded = None
+        if self.prefix_cache is not None:
+            encoded = self._encode_with_prefix(texts, source_lang, target_lang, expand=num_beams)
+        if encoded is not None:
+            inputs, generation_kwargs["past_key_values"] = encoded
+        else:
+            prompts = [self._build_prompt(text, source_lang, target_lang) for text in texts]
+
+            # Tokenize the whole batch (left-padded)
             inputs = self.tokenizer(
-                input_text,
+                prompts,
                 return_tensors="pt",
                 max_length=self.max_length,
                 truncation=True,
                 padding=True
             ).to(self.device)
 
-            # Generate translation
-            with torch.no_grad():
-                outputs = self.model.generate(
-                    **inputs,
-                    max_length=self.max_length,
-                    num_beams=4,
-                    early_stopping=True,
-                    pad_token_id=self.tokenizer.pad_token_id,
-                    eos_token_id=self.tokenizer.eos_token_id
-                )
+        # The output budget follows the longest source in the batch
+        prompt_length = inputs["input_ids"].shape[1]
+        source_counts = self._source_token_counts(texts)
+        budgets = retry_budgets or [
+            self.decoding_policy.max_new_tokens(count, field_name) for count in source_counts
+        ]
+        max_new_tokens = max(budgets)
 
-            # Decode output
-            translated_text = self.tokenizer.decode(
-                outputs[0],
-                skip_special_tokens=True
+        # Preallocated cache and compiled decode step (the prefix cache brings its own cache)
+        kernel_cache = contextlib.nullcontext()
+        if (self.static_decoding is not None and num_beams == 1
+                and "past_key_values" not in generation_kwargs):
+            generation_kwargs.update(self.static_decoding.generation_kwargs(
+                inputs["input_ids"].shape[0], prompt_length, max_new_tokens))
+            kernel_cache = self.static_decoding.kernel_cache()
+
+        kv_cache = None
+        if self.kv_cache_quantization is not None and "past_key_values" not in generation_kwargs:
+            kv_cache = QuantizedKVCache(
+                self.model.config, nbits=KV_CACHE_BITS[self.kv_cache_quantization])
+            generation_kwargs["past_key_values"] = kv_cache
+
+        # Stop looping or overlong rows individually (beam rows are reordered
+        # every step, so only greedy and sampled batches are guarded)
+        criteria = None
+        if self.runaway_guard is not None and retry_budgets is not None:
+            generation_kwargs.update(self.runaway_guard.retry_kwargs(prompt_length))
+        elif self.runaway_guard is not None and num_beams == 1:
+            criteria = self.runaway_guard.criteria(
+                prompt_length, budgets, self.tokenizer.eos_token_id)
+            generation_kwargs["stopping_criteria"] = StoppingCriteriaList([criteria])
+
+        # Generate translations
+        generate_start = time.perf_counter()
+        with torch.no_grad(), kernel_cache:
+            outputs = self.model.generate(
+                **inputs,
+                **generation_kwargs,
+                max_new_tokens=max_new_tokens,
+                pad_token_id=self.tokenizer.pad_token_id,
+                eos_token_id=self.tokenizer.eos_token_id
             )
+        self.generation_stats["generate_seconds"] += time.perf_counter() - generate_start
+        if kv_cache is not None:
+            self.kv_cache_stats["calls"] += 1
+            if kv_cache.peak_bytes > self.kv_cache_stats["peak_kv_bytes"]:
+                self.kv_cache_stats["peak_kv_bytes"] = kv_cache.peak_bytes
+                self.kv_cache_stats["peak_batch_size"] = outputs.shape[0]
+
+        stopped = self.runaway_guard.record(criteria) if criteria is not None else []
+        retries = {}
+        if stopped:
+            retries = self.runaway_guard.retry_budgets(
+                criteria, self.decoding_policy.field_options(field_name)["max_new_tokens"])
 
-            return translated_text.strip()
+        # Decode only the generated continuation of each row
+        translations = []
+        for index, (row, count) in enumerate(zip(outputs[:, prompt_length:], source_counts)):
+            output_tokens = self._output_token_count(row)
+            self.generation_stats["generated_tokens"] += output_tokens
+            if index not in stopped:
+                self.decoding_policy.observe(count, output_tokens, field_name, max_new_tokens)
+            try:
+                translations.append(
+                    self.tokenizer.decode(row, skip_special_tokens=True).strip())
+            except Exception as e:
+                logger.error(f"Decoding error: {e}")
+                translations.append("")
 
+        # Translate the stopped rows again, without the guard
+        if retries:
+            rows = sorted(retries)
+            logger.info(f"Retrying {len(rows)} looping or runaway translations")
+            self.runaway_guard.stats["retried"] += len(rows)
+            retried = self._generate_batch(
+                [texts[i] for i in rows], source_lang, target_lang, field_name,
+                retry_budgets=[retries[i] for i in rows])
+            for i, translation in zip(rows, retried):
+                translations[i] = translation
+
+        return translations
+
+    def _generate_remote(
+        self,
+        texts: List[str],
+        source_lang: str = "en",
+        target_lang: str = "vi",
+        field_name: Optional[str] = None
+    ) -> List[str]:
+        """
+        Translate non-empty texts with the inference backend
+
+        Args:
+            texts: Non-empty texts to translate
+            source_lang: Source language code
+            target_lang: Target language code
+            field_name: Dataset field the texts belong to
+
+        Returns:
+            Translated texts in input order
+        """
+        source_counts = self._source_token_counts(texts)
+        budgets = [
+            self.decoding_policy.max_new_tokens(count, field_name) for count in source_counts
+        ]
+        results = self.backend.translate(
+            texts, source_lang, target_lang,
+            self.decoding_policy.field_options(field_name), budgets)
+
+        translations = []
+        for (translation, output_tokens), count, budget in zip(results, source_counts, budgets):
+            # Server token counts only match the budgets with a local tokenizer
+            if output_tokens is not None and self.tokenizer is not None:
+                self.decoding_policy.observe(count, output_tokens, field_name, budget)
+            translations.append(translation)
+        return translations
+
+    def _speculative_decoder(self, field_name: Optional[str]) -> Optional[SpeculativeDecoder]:
+        """Get the active speculative decoder for a greedy field, if any"""
+        if not self._uses_greedy_decoding(field_name):
+            return None
+        if self._uses_prompt_lookup(field_name):
+            return self.prompt_lookup
+        if self.speculative is not None and self.speculative.enabled:
+            return self.speculative
+        return None
+
+    def _uses_prompt_lookup(self, field_name: Optional[str]) -> bool:
+        """Whether prompt-lookup decoding is switched on for a field"""
+        return (
+            self.decoding_policy.uses_prompt_lookup(field_name)
+            and self.prompt_lookup is not None
+            and self.prompt_lookup.enabled
+        )
+
+    def _generate_speculative(
+        self,
+        decoder: SpeculativeDecoder,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        field_name: Optional[str] = None
+    ) -> str:
+        """Translate one text with greedy speculative decoding"""
+        prompt_ids = self.tokenizer(
+            self._build_prompt(text, source_lang, target_lang),
+            max_length=self.max_length,
+            truncation=True
+        )["input_ids"]
+        source_count = self._source_token_counts([text])[0]
+        budget = self.decoding_policy.max_new_tokens(source_count, field_name)
+        output_ids = decoder.generate_ids(prompt_ids, budget)
+        self.decoding_policy.observe(source_count, len(output_ids), field_name, budget)
+        return self.tokenizer.decode(output_ids, skip_special_tokens=True).strip()
+
+    def _translate_chunk(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        field_name: Optional[str] = None
+    ) -> List[str]:
+        """
+        Translate one batch, isolating failures to the rows that caused them
+
+        Empty texts are skipped without touching the model. If the batched
+        generate call fails, the batch is retried item by item so that a
+        single bad row only blanks its own translation.
+        """
+        results = [""] * len(texts)
+        indices = [i for i, text in enumerate(texts) if text and text.strip()]
+        if not indices:
+            return results
+
+        try:
+            translations = self._generate_batch(
+                [texts[i] for i in indices], source_lang, target_lang, field_name)
         except Exception as e:
-            logger.error(f"Translation error for text '{text[:50]}...': {e}")
-            return ""
+            logger.warning(
+                f"Batched generation failed for {len(indices)} items, "
+                f"retrying individually: {e}")
+            translations = [
+                self._generate_single(texts[i], source_lang, target_lang, field_name)
+                for i in indices
+            ]
+
+        for i, translation in zip(indices, translations):
+            results[i] = translation
+
+        return results
 
     def translate_batch(
         self,
         texts: List[str],
         source_lang: str = "en",
         target_lang: str = "vi",
-        show_progress: bool = True
+        show_progress: bool = True,
+        field_name: Optional[str] = None
     ) -> List[str]:
         """
         Translate a batch of texts
@@ -150,6 +910,8 @@ class HunyuanTranslator:
             source_lang: Source language code
             target_lang: Target language code
             show_progress: Whether to show progress bar
+            field_name: Dataset field the texts belong to (selects the
+                per-field generation options)
 
         Returns:
             List of translated texts
@@ -157,29 +919,376 @@ class HunyuanTranslator:
         if not texts:
             return []
 
+        self.wait_until_ready()
+        start_time = time.perf_counter()
+
+        if self.segmenter is not None:
+            translated_texts = self._translate_segmented(
+                texts, source_lang, target_lang, show_progress, field_name)
+        else:
+            translated_texts = self._translate_units(
+                texts, source_lang, target_lang, show_progress, field_name)
+
+        elapsed = time.perf_counter() - start_time
+        if elapsed > 0:
+            logger.info(
+                f"Translated {len(texts)} items in {elapsed:.2f}s "
+                f"({len(texts) / elapsed:.2f} items/sec, batch_size={self.batch_size})")
+
+        return translated_texts
+
+    def _translate_segmented(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        show_progress: bool,
+        field_name: Optional[str] = None
+    ) -> List[str]:
+        """
+        Translate texts sentence by sentence and reassemble each text
+
+        Every segment is translated (and cached) as its own unit. A text
+        whose segments did not all translate is returned empty, like any
+        other failed item.
+        """
+        layouts = []
+        units = []
+        for text in texts:
+            segments, separators = self.segmenter.segment(text or "")
+            layouts.append((len(units), len(segments), separators))
+            units.extend(segments)
+
+        logger.info(f"Split {len(texts)} texts into {len(units)} segments")
+        unit_translations = self._translate_units(
+            units, source_lang, target_lang, show_progress, field_name)
+
         translated_texts = []
+        for start, count, separators in layouts:
+            segments = unit_translations[start:start + count]
+            sources = units[start:start + count]
+            if any(source.strip() and not segment for source, segment in zip(sources, segments)):
+                translated_texts.append("")
+            else:
+                translated_texts.append(
+                    self.segmenter.reassemble(segments, separators).strip())
+
+        return translated_texts
+
+    def _translate_units(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        show_progress: bool,
+        field_name: Optional[str] = None
+    ) -> List[str]:
+        """Translate texts through the cache and the configured batching path"""
+        translated_texts = [""] * len(texts)
+        indices = [i for i, text in enumerate(texts) if text and text.strip()]
+
+        # Pass through strings that do not need the model
+        if self.bypass is not None:
+            remaining = []
+            for i in indices:
+                if self.bypass.classify(texts[i], target_lang) is None:
+                    remaining.append(i)
+                else:
+                    translated_texts[i] = texts[i]
+            if len(remaining) < len(indices):
+                logger.info(
+                    f"Passed {len(indices) - len(remaining)} of {len(indices)} "
+                    f"texts through without translation")
+            indices = remaining
+
+        # Serve what we can from the translation cache
+        if self.cache is not None:
+            context = self.get_cache_context(field_name)
+            keys = {
+                i: self.cache.make_key(texts[i], source_lang, target_lang, context)
+                for i in indices
+            }
+            cached = self.cache.get_many(list(keys.values()))
+            for i in indices:
+                if keys[i] in cached:
+                    translated_texts[i] = cached[keys[i]]
+            indices = [i for i in indices if keys[i] not in cached]
+
+        if self.validator is None:
+            self._translate_pass(
+                texts, indices, translated_texts, source_lang, target_lang,
+                show_progress, field_name)
+        else:
+            self._translate_tiered(
+                texts, indices, translated_texts, source_lang, target_lang,
+                show_progress, field_name)
+
+        if self.cache is not None:
+            self.cache.put_many({
+                keys[i]: (texts[i], translated_texts[i])
+                for i in indices if translated_texts[i]
+            })
+
+        return translated_texts
+
+    def _translate_pass(
+        self,
+        texts: List[str],
+        indices: List[int],
+        translated_texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        show_progress: bool,
+        field_name: Optional[str] = None
+    ):
+        """Translate texts[indices] with or without formula masking, in place"""
+        if self.masker is None:
+            self._translate_indices(
+                texts, indices, translated_texts, source_lang, target_lang,
+                show_progress, field_name)
+        else:
+            self._translate_masked(
+                texts, indices, translated_texts, source_lang, target_lang,
+                show_progress, field_name)
+
+    def _translate_tiered(
+        self,
+        texts: List[str],
+        indices: List[int],
+        translated_texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        show_progress: bool,
+        field_name: Optional[str] = None
+    ):
+        """
+        Translate texts[indices] greedily, then escalate flagged items, in place
+
+        Items the validator flags are translated again with the escalation
+        options; the escalated translation replaces the first one unless it
+        came back empty.
+        """
+        if not indices:
+            return
+
+        policy = self.decoding_policy
+        try:
+            start_time = time.perf_counter()
+            self.decoding_policy = policy.with_overrides(strategy="greedy")
+            self._translate_pass(
+                texts, indices, translated_texts, source_lang, target_lang,
+                show_progress, field_name)
+            self.escalation_stats["first_pass_seconds"] += time.perf_counter() - start_time
+
+            flagged = [
+                i for i in indices
+                if self.validator.check(texts[i], translated_texts[i], target_lang)
+            ]
+            first_cost = self._pass_cost(self.decoding_policy, field_name)
+            escalation_cost = self._pass_cost(policy.with_overrides(**self.escalation_options), field_name)
+            self.escalation_stats["items"] += len(indices)
+            self.escalation_stats["escalated"] += len(flagged)
+            self.escalation_stats["decode_cost"] += len(indices) * first_cost + len(flagged) * escalation_cost
+            self.escalation_stats["full_decode_cost"] += len(indices) * escalation_cost
+            if not flagged:
+                return
+
+            logger.info(
+                f"Escalating {len(flagged)} of {len(indices)} flagged translations "
+                f"to {policy.with_overrides(**self.escalation_options).describe(field_name)}")
+            start_time = time.perf_counter()
+            self.decoding_policy = policy.with_overrides(**self.escalation_options)
+            escalated = [""] * len(texts)
+            self._translate_pass(
+                texts, flagged, escalated, source_lang, target_lang,
+                show_progress=False, field_name=field_name)
+            self.escalation_stats["escalation_seconds"] += time.perf_counter() - start_time
+        finally:
+            self.decoding_policy = policy
+
+        for i in flagged:
+            if escalated[i]:
+                translated_texts[i] = escalated[i]
+                if not self.validator.find_issues(texts[i], escalated[i], target_lang):
+                    self.escalation_stats["resolved"] += 1
+
+    @staticmethod
+    def _pass_cost(policy: DecodingPolicy, field_name: Optional[str]) -> float:
+        """Relative decode work of one item: beams times the budget scale"""
+        return policy.generation_kwargs(field_name)["num_beams"] * policy.field_options(field_name)["budget_scale"]
+
+    def get_escalation_stats(self) -> dict:
+        """
+        Get two-tier decoding statistics
+
+        compute_saved estimates the decode work avoided compared with
+        running every item at the escalation setting, weighting each item
+        of a pass by its beams times its budget scale. When escalating
+        costs no more than the greedy first pass (e.g. greedy escalation at
+        the same budget scale), or so many items escalate that the two
+        passes cost more than escalating everything, nothing is saved and
+        compute_saved is 0.
+        """
+        stats = dict(self.escalation_stats)
+        items = stats["items"]
+        stats["escalation_rate"] = stats["escalated"] / items if items else 0.0
+        stats["compute_saved"] = escalation_savings(stats["decode_cost"], stats["full_decode_cost"])
+        stats["validator"] = self.validator.get_stats() if self.validator else None
+        return stats
+
+    def _translate_indices(
+        self,
+        texts: List[str],
+        indices: List[int],
+        translated_texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        show_progress: bool,
+        field_name: Optional[str] = None
+    ):
+        """Translate texts[indices] with the configured batching path, in place"""
+        if self.backend is not None:
+            indices = [i for i in indices if texts[i] and texts[i].strip()]
+            if indices:
+                translations = self._generate_remote(
+                    [texts[i] for i in indices], source_lang, target_lang, field_name)
+                for i, translation in zip(indices, translations):
+                    translated_texts[i] = translation
+        elif (self.use_continuous_batching and self._uses_greedy_decoding(field_name)
+                and not self._uses_prompt_lookup(field_name)):
+            translations = self._translate_continuous(
+                [texts[i] for i in indices], source_lang, target_lang, field_name)
+            for i, translation in zip(indices, translations):
+                translated_texts[i] = translation
+        else:
+            self._translate_scheduled(
+                texts, indices, translated_texts, source_lang, target_lang,
+                show_progress, field_name)
+
+    def _translate_masked(
+        self,
+        texts: List[str],
+        indices: List[int],
+        translated_texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        show_progress: bool,
+        field_name: Optional[str] = None
+    ):
+        """
+        Translate texts[indices] with formulas replaced by placeholders, in place
+
+        Translations that do not give back every placeholder exactly once
+        are translated again without masking.
+        """
+        masked_texts = list(texts)
+        spans = {}
+        for i in indices:
+            masked_texts[i], spans[i] = self.masker.mask(texts[i])
+
+        self._translate_indices(
+            masked_texts, indices, translated_texts, source_lang, target_lang,
+            show_progress, field_name)
 
-        # Process in batches
-        iterator = range(0, len(texts), self.batch_size)
+        retry = []
+        for i in indices:
+            if not spans[i] or not translated_texts[i]:
+                continue
+            restored, ok = self.masker.unmask(translated_texts[i], spans[i])
+            if ok:
+                translated_texts[i] = restored
+            else:
+                retry.append(i)
+
+        if retry:
+            logger.warning(
+                f"{len(retry)} translations lost formula placeholders, "
+                f"retranslating them unmasked")
+            self._translate_indices(
+                texts, retry, translated_texts, source_lang, target_lang,
+                show_progress=False, field_name=field_name)
+
+    def _translate_scheduled(
+        self,
+        texts: List[str],
+        indices: List[int],
+        translated_texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        show_progress: bool,
+        field_name: Optional[str] = None
+    ):
+        """Translate texts[indices] in length-bucketed static batches, in place"""
+        if not indices:
+            return
+
+        # Bucket non-empty texts by prompt length under the token budget
+        lengths = self._prompt_lengths(
+            [texts[i] for i in indices], source_lang, target_lang)
+        self.scheduler.max_batch_size = self.batch_size
+        batches = self.scheduler.schedule(lengths)
+
+        iterator = batches
         if show_progress:
             iterator = tqdm(iterator, desc="Translating batches")
 
-        for i in iterator:
-            batch_texts = texts[i:i + self.batch_size]
-            batch_translations = []
+        for batch in iterator:
+            batch_indices = [indices[j] for j in batch]
+            translations = self._translate_chunk(
+                [texts[i] for i in batch_indices], source_lang, target_lang, field_name)
 
-            for text in batch_texts:
-                translation = self.translate_single(
-                    text, source_lang, target_lang)
-                batch_translations.append(translation)
+            # Put results back in their original positions
+            for i, translation in zip(batch_indices, translations):
+                translated_texts[i] = translation
 
-                # Small delay to prevent overwhelming the GPU
-                if self.device == "cuda":
-                    time.sleep(0.01)
+    def _translate_continuous(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        field_name: Optional[str] = None
+    ) -> List[str]:
+        """Translate non-empty texts with the continuous batching engine"""
+        if not texts:
+            return []
+
+        if self.engine is None:
+            # Token budgets come from the decoding policy with every call
+            self.engine = ContinuousBatchingEngine(
+                self.model,
+                self.tokenizer,
+                max_batch_size=self.batch_size,
+                device=self.device
+            )
+        self.engine.max_batch_size = self.batch_size
+        if self.vocab_restriction is not None:
+            self.vocab_restriction.set_source_texts(texts)
 
-            translated_texts.extend(batch_translations)
+        prompts = [self._build_prompt(text, source_lang, target_lang) for text in texts]
+        prompt_ids = self.tokenizer(
+            prompts, max_length=self.max_length, truncation=True)["input_ids"]
+        source_counts = self._source_token_counts(texts)
+        budgets = [
+            self.decoding_policy.max_new_tokens(count, field_name) for count in source_counts
+        ]
 
-        return translated_texts
+        try:
+            outputs = self.engine.generate_ids(prompt_ids, max_new_tokens=budgets)
+        except Exception as e:
+            logger.warning(
+                f"Continuous batching failed, falling back to static batches: {e}")
+            translations = [""] * len(texts)
+            self._translate_scheduled(
+                texts, list(range(len(texts))), translations,
+                source_lang, target_lang, show_progress=False, field_name=field_name)
+            return translations
+
+        for count, ids, budget in zip(source_counts, outputs, budgets):
+            self.decoding_policy.observe(count, len(ids), field_name, budget)
+        return [
+            self.tokenizer.decode(ids, skip_special_tokens=True).strip()
+            for ids in outputs
+        ]
 
     def translate_dataset_field(
         self,
@@ -216,13 +1325,70 @@ class HunyuanTranslator:
             texts = [texts]
 
         # Translate
-        translations = self.translate_batch(texts, source_lang, target_lang)
+        translations = self.translate_batch(
+            texts, source_lang, target_lang, field_name=field_name)
 
         # Add to dataset
         dataset_dict[output_field] = translations
 
         return dataset_dict
 
+    def _uses_greedy_decoding(self, field_name: Optional[str] = None) -> bool:
+        """Whether a field is decoded greedily (the strategy speculation and
+        continuous batching apply to)"""
+        return self.decoding_policy.strategy(field_name) == "greedy"
+
+    def warm_cache(self, directory: str, source_lang: str = "en", target_lang: str = "vi") -> int:
+        """
+        Pre-warm the translation cache from earlier pipeline outputs
+
+        Entries are keyed like this translator's lookups: with each field's
+        cache context, and per segment when a segmenter is configured.
+
+        Args:
+            directory: Directory holding *_translated.json files
+            source_lang: Source language code of the files
+            target_lang: Target language code of the files
+
+        Returns:
+            Number of translations loaded (0 without a cache)
+        """
+        if self.cache is None:
+            return 0
+        return self.cache.warm_from_directory(
+            directory, source_lang, target_lang, self.get_cache_context, segmenter=self.segmenter)
+
+    def get_cache_context(self, field_name: Optional[str] = None) -> dict:
+        """Model and generation settings that determine a translation"""
+        context = {
+            "model_name": self.backend.describe() if self.backend else self.model_name,
+            "max_length": self.max_length,
+            "decoding": self.decoding_policy.describe(field_name),
+            "math_masking": self.masker is not None
+        }
+        if self.validator is not None:
+            escalation = self.decoding_policy.with_overrides(**self.escalation_options)
+            context["decoding"] = "greedy"
+            context["escalation"] = escalation.describe(field_name)
+        return context
+
+    def get_generation_stats(self) -> dict:
+        """Tokens generated by batched generate calls and their throughput"""
+        stats = dict(self.generation_stats)
+        seconds = stats["generate_seconds"]
+        stats["tokens_per_sec"] = stats["generated_tokens"] / seconds if seconds else 0.0
+        return stats
+
+    def get_kv_cache_stats(self) -> dict:
+        """KV cache quantization mode, its largest cache and the peak memory of the process"""
+        stats = dict(self.kv_cache_stats, quantization=self.kv_cache_quantization)
+        stats["peak_kv_mb"] = stats.pop("peak_kv_bytes") / (1024 * 1024)
+        if str(self.device).startswith("cuda"):
+            stats["peak_memory_mb"] = torch.cuda.max_memory_allocated(self.device) / (1024 * 1024)
+        else:
+            stats["peak_memory_mb"] = process_memory()["peak_rss_mb"]
+        return stats
+
     def get_model_info(self) -> dict:
         """Get information about the loaded model"""
         return {
@@ -230,5 +1396,32 @@ class HunyuanTranslator:
             "device": self.device,
             "batch_size": self.batch_size,
             "max_length": self.max_length,
-            "vocab_size": len(self.tokenizer) if hasattr(self, 'tokenizer') else None
+            "max_batch_tokens": self.max_batch_tokens,
+            "decoding_policy": self.decoding_policy.get_stats(),
+            "scheduling": self.scheduler.get_stats(),
+            "continuous_batching": self.engine.get_stats() if self.engine else None,
+            "cache": self.cache.get_stats() if self.cache else None,
+            "math_masking": self.masker.get_stats() if self.masker else None,
+            "bypass": self.bypass.get_stats() if self.bypass else None,
+            "prefix_cache": self.prefix_cache.get_stats() if self.prefix_cache else None,
+            "adaptive_decoding": self.get_escalation_stats() if self.validator else None,
+            "runaway_guard": self.runaway_guard.get_stats() if self.runaway_guard else None,
+            "speculative": self.speculative.get_stats() if self.speculative else None,
+            "prompt_lookup": self.prompt_lookup.get_stats() if self.prompt_lookup else None,
+            "compiled_decoding": self.static_decoding.get_stats() if self.static_decoding else None,
+            "kv_cache": self.get_kv_cache_stats() if self.kv_cache_quantization else None,
+            "vocab_restriction": self.vocab_restriction.get_stats() if self.vocab_restriction else None,
+            "backend": self.backend.get_stats() if self.backend else None,
+            "micro_batching": self.batcher.get_stats() if self.batcher else None,
+            "startup": dict(self.startup_stats),
+            "generation": self.get_generation_stats(),
+            "cpu": {
+                "mode": self.cpu_mode,
+                "threads": self.cpu_threads,
+                "weights_mb": model_size_mb(self.model),
+                "memory": process_memory()
+            } if self.cpu_mode and self.model is not None else None,
+            "shared_weights": (
+                all(p.is_shared() for p in self.model.parameters()) if self.model else False),
+            "vocab_size": len(self.tokenizer) if getattr(self, 'tokenizer', None) else None
         }
@@ -0,0 +1,122 @@
+"""
+KV cache quantization
+Stores the keys and values of generate calls as int8 or packed int4
+groups with a small full-precision window of recent tokens, so long
+outputs and large batches fit in less memory
+"""
+
+from typing import Dict, List, Optional
+import logging
+
+import torch
+from transformers.cache_utils import Cache, QuantizedLayer
+
+logger = logging.getLogger(__name__)
+
+KV_CACHE_BITS = {"int8": 8, "int4": 4}
+
+
+def tensor_bytes(tensors: List[Optional[torch.Tensor]]) -> int:
+    """Total storage of the given tensors in bytes (None entries count as 0)"""
+    return sum(t.numel() * t.element_size() for t in tensors if t is not None)
+
+
+def cache_bytes(cache: Cache) -> int:
+    """
+    Bytes held by a KV cache
+
+    Counts the quantized groups with their scales and the full-precision
+    keys and values of every layer; works for regular caches as well.
+    """
+    total = 0
+    for layer in cache.layers:
+        total += tensor_bytes([getattr(layer, "keys", None), getattr(layer, "values", None)])
+        for quantized in (getattr(layer, "_quantized_keys", None), getattr(layer, "_quantized_values", None)):
+            if quantized is not None:
+                total += tensor_bytes([quantized["data"], quantized["scale"], quantized["offset"]])
+    return total
+
+
+class GroupQuantizedLayer(QuantizedLayer):
+    """
+    Cache layer quantizing groups of q_group_size values along the head
+    dimension to nbits (8, or 4 packed two per byte), asymmetric with a
+    float16 scale and offset per group, in plain torch
+    """
+
+    def __init__(self, nbits: int = 8, q_group_size: int = 64, residual_length: int = 64):
+        if nbits not in KV_CACHE_BITS.values():
+            raise ValueError(f"nbits must be one of {sorted(KV_CACHE_BITS.values())}, got {nbits}")
+        super().__init__(
+            nbits=nbits,
+            axis_key=-1,
+            axis_value=-1,
+            q_group_size=q_group_size,
+            residual_length=residual_length
+        )
+
+    def _quantize(self, tensor: torch.Tensor, axis: int) -> Dict:
+        """Quantize a [batch, heads, tokens, head_dim] tensor group-wise"""
+        head_dim = tensor.shape[-1]
+        group_size = self.q_group_size if head_dim % self.q_group_size == 0 else head_dim
+        groups = tensor.float().reshape(*tensor.shape[:-1], head_dim // group_size, group_size)
+
+        low = groups.amin(dim=-1, keepdim=True)
+        high = groups.amax(dim=-1, keepdim=True)
+        levels = 2 ** self.nbits - 1
+        scale = ((high - low) / levels).clamp_min(1e-8)
+        data = ((groups - low) / scale).round_().clamp_(0, levels).to(torch.uint8)
+        if self.nbits == 4:
+            data = data[..., 0::2] | (data[..., 1::2] << 4)
+        return {
+            "data": data,
+            "scale": scale.to(torch.float16),
+            "offset": low.to(torch.float16),
+            "shape": tensor.shape,
+            "dtype": tensor.dtype
+        }
+
+    def _dequantize(self, quantized: Dict) -> torch.Tensor:
+        """Restore the full-precision tensor of _quantize"""
+        data = quantized["data"]
+        if self.nbits == 4:
+            data = torch.stack([data & 0x0F, data >> 4], dim=-1).flatten(-2)
+        groups = data.float() * quantized["scale"].float() + quantized["offset"].float()
+        return groups.reshape(quantized["shape"]).to(quantized["dtype"])
+
+
+class QuantizedKVCache(Cache):
+    """
+    KV cache of a generate call stored in int8 or int4
+
+    Each layer keeps at most residual_length recent tokens in full
+    precision; the rest is quantized (see transformers' QuantizedLayer).
+    The prompt is quantized right after prefill. peak_bytes records the
+    largest footprint seen after a full forward step.
+    """
+
+    def __init__(self, config, nbits: int = 8, q_group_size: int = 64, residual_length: int = 64):
+        """
+        Initialize the cache
+
+        Args:
+            config: Model config (full-attention layers only)
+            nbits: 8 or 4 bits per cached value
+            q_group_size: Values sharing one scale and offset
+            residual_length: Recent tokens kept in full precision
+        """
+        config = config.get_text_config(decoder=True)
+        layer_types = getattr(config, "layer_types", None) or ["full_attention"]
+        if set(layer_types) != {"full_attention"}:
+            raise ValueError(f"KV cache quantization needs full-attention layers, found {set(layer_types)}")
+        super().__init__(layers=[
+            GroupQuantizedLayer(nbits, q_group_size, residual_length)
+            for _ in range(config.num_hidden_layers)
+        ])
+        self.peak_bytes = 0
+
+    def update(self, key_states: torch.Tensor, value_states: torch.Tensor, layer_idx: int, *args, **kwargs):
+        keys, values = super().update(key_states, value_states, layer_idx, *args, **kwargs)
+        if layer_idx == len(self.layers) - 1:
+            self.peak_bytes = max(self.peak_bytes, cache_bytes(self))
+        return keys, values
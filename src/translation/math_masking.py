@@ -0,0 +1,231 @@
+"""
+Math, code and LaTeX span masking
+Replaces spans the model should copy verbatim with short placeholders
+before generation and restores them afterwards
+"""
+
+import re
+from typing import Dict, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_TEMPLATE = "[M{}]"
+
+# Tolerates spacing the model may add inside a placeholder, e.g. "[ M 3 ]"
+PLACEHOLDER_PATTERN = re.compile(r"\[\s*M\s*(\d+)\s*\]")
+
+# Spans that are always masked, in priority order
+DELIMITED_SPAN_PATTERN = re.compile(
+    r"\$\$.+?\$\$"                                  # display math
+    r"|\$[^$\n]+\$"                                 # inline math
+    r"|\\\(.+?\\\)|\\\[.+?\\\]"                     # \( \) and \[ \]
+    r"|\\begin\{(\w+\*?)\}.+?\\end\{\1\}"           # LaTeX environments
+    r"|```.+?```|`[^`\n]+`"                         # code
+    r"|https?://\S+[^\s.,;:!?)\]]"                  # URLs
+    r"|\\[A-Za-z]+(?:\{[^{}]*\})*",                 # bare LaTeX commands
+    re.DOTALL
+)
+
+# Characters that only appear in formulas
+OPERATOR_CHARS = set("=<>≤≥≠≈≡+*/^×÷√±∑∏∫∞∈∉⊂⊆∪∩→←↔∠°²³¹⁰⁴⁵⁶⁷⁸⁹₀₁₂₃₄₅₆₇₈₉_|")
+
+# A whitespace-separated token that can be part of a plain-text formula
+MATH_TOKEN_PATTERN = re.compile(
+    r"^[\w()\[\]{}=<>≤≥≠≈≡+\-−*/^×÷√±∑∏∫∞∈∉⊂⊆∪∩→←↔∠°²³¹⁰⁴⁵⁶⁷⁸⁹₀₁₂₃₄₅₆₇₈₉πφθαβγδλμσω'.,:!|]+$"
+)
+
+TRAILING_PUNCTUATION = ".,;:!?"
+
+# Prose abbreviations whose dots would otherwise pass as formula characters
+ABBREVIATIONS = {"e.g.", "i.e.", "etc.", "cf.", "vs.", "viz.", "resp."}
+
+# Single-letter articles, told apart from variables a and A by their neighbours
+ARTICLES = {"a", "A"}
+
+
+class MathSpanMasker:
+    """
+    Mask formulas, LaTeX, code and URLs with numbered placeholders
+    """
+
+    def __init__(self, min_span_chars: int = 4):
+        """
+        Initialize the masker
+
+        Args:
+            min_span_chars: Plain-text formulas shorter than this are left
+                for the model (a placeholder would not save anything)
+        """
+        self.min_span_chars = min_span_chars
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset masking statistics"""
+        self.stats = {
+            "texts_masked": 0,
+            "spans_masked": 0,
+            "chars_masked": 0,
+            "placeholder_chars": 0,
+            "restore_failures": 0
+        }
+
+    def mask(self, text: str) -> Tuple[str, List[str]]:
+        """
+        Replace maskable spans with placeholders
+
+        Args:
+            text: Source text
+
+        Returns:
+            Tuple (masked text, spans) where spans[i] is the original text
+            of placeholder i
+        """
+        # Never mask text that already contains placeholder-like markers
+        if not text or PLACEHOLDER_PATTERN.search(text):
+            return text, []
+
+        ranges = [m.span() for m in DELIMITED_SPAN_PATTERN.finditer(text)]
+        ranges.extend(self._formula_ranges(text, ranges))
+        ranges.sort()
+
+        spans = []
+        parts = []
+        cursor = 0
+        for start, end in ranges:
+            if start < cursor:
+                continue
+            parts.append(text[cursor:start])
+            parts.append(PLACEHOLDER_TEMPLATE.format(len(spans)))
+            spans.append(text[start:end])
+            cursor = end
+        parts.append(text[cursor:])
+
+        masked = "".join(parts)
+        if spans:
+            self.stats["texts_masked"] += 1
+            self.stats["spans_masked"] += len(spans)
+            self.stats["chars_masked"] += sum(len(span) for span in spans)
+            self.stats["placeholder_chars"] += sum(
+                len(PLACEHOLDER_TEMPLATE.format(i)) for i in range(len(spans)))
+        return masked, spans
+
+    def unmask(self, text: str, spans: List[str]) -> Tuple[str, bool]:
+        """
+        Restore placeholders in a translation
+
+        Args:
+            text: Translated text containing placeholders
+            spans: Spans returned by mask()
+
+        Returns:
+            Tuple (restored text, ok) where ok is False unless every
+            placeholder appeared exactly once and no unknown ones appeared
+        """
+        if not spans:
+            return text, True
+
+        seen: Dict[int, int] = {}
+
+        def replace(match):
+            index = int(match.group(1))
+            seen[index] = seen.get(index, 0) + 1
+            return spans[index] if index < len(spans) else match.group(0)
+
+        restored = PLACEHOLDER_PATTERN.sub(replace, text)
+        ok = all(seen.get(i) == 1 for i in range(len(spans))) and len(seen) == len(spans)
+        if not ok:
+            self.stats["restore_failures"] += 1
+        return restored, ok
+
+    def _formula_ranges(self, text: str, excluded: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Find runs of formula-like tokens in plain text"""
+        tokens = [
+            m for m in re.finditer(r"\S+", text)
+            if not any(lo < m.end() and m.start() < hi for lo, hi in excluded)
+        ]
+
+        ranges = []
+        run = []
+        for index, token in enumerate(tokens):
+            word = token.group(0)
+            is_math = self._is_math_token(word) and not self._is_article(tokens, index)
+            contiguous = not run or text[run[-1].end():token.start()].strip() == ""
+            if contiguous and is_math:
+                run.append(token)
+                continue
+            ranges.extend(self._close_run(text, run))
+            run = [token] if is_math else []
+        ranges.extend(self._close_run(text, run))
+        return ranges
+
+    @staticmethod
+    def _is_article(tokens: List, index: int) -> bool:
+        """Check whether "a"/"A" is an article rather than a variable"""
+        if tokens[index].group(0) not in ARTICLES:
+            return False
+        # A variable sits next to an operator: "a = 3", "x = a + 1", "2 * a"
+        before = tokens[index - 1].group(0) if index > 0 else ""
+        after = tokens[index + 1].group(0) if index + 1 < len(tokens) else ""
+        return not (before and before[-1] in OPERATOR_CHARS | {"-", "−"}) and \
+            not (after and after[0] in OPERATOR_CHARS | {"-", "−"})
+
+    def _close_run(self, text: str, run: List) -> List[Tuple[int, int]]:
+        """Turn a run of candidate tokens into a masked range if it is a formula"""
+        # Trim plain words (letters only, longer than one char) from both ends
+        while run and self._is_word(run[0].group(0)):
+            run = run[1:]
+        while run and self._is_word(run[-1].group(0).rstrip(TRAILING_PUNCTUATION)):
+            run = run[:-1]
+        if not run:
+            return []
+
+        start = run[0].start()
+        end = run[-1].end()
+        span = text[start:end]
+
+        # Leave sentence punctuation outside the span
+        stripped = span.rstrip(TRAILING_PUNCTUATION)
+        end -= len(span) - len(stripped)
+        span = stripped
+
+        if len(span) < self.min_span_chars or not any(c in OPERATOR_CHARS for c in span):
+            return []
+        return [(start, end)]
+
+    @staticmethod
+    def _is_math_token(word: str) -> bool:
+        """Check whether a token can belong to a formula"""
+        if not MATH_TOKEN_PATTERN.match(word) or word.rstrip(",;:").lower() in ABBREVIATIONS:
+            return False
+        core = word.strip("()[]{}" + TRAILING_PUNCTUATION)
+        if MathSpanMasker._is_word(core):
+            # Plain words only count inside function calls such as gcd(n,
+            return "(" in word and not word.startswith("(")
+        return True
+
+    @staticmethod
+    def _is_word(word: str) -> bool:
+        """Check whether a token is an ordinary word rather than a symbol"""
+        core = word.strip("()[]{}")
+        if "(" in word:
+            return False
+        # Slash- and underscore-joined words (his/her, and/or, max_length) are
+        # prose; single letters such as a/b or m_a are not
+        parts = re.split(r"[/_]", core)
+        if not all(part.isalpha() and len(part) >= 2 for part in parts):
+            return False
+        # Short all-caps tokens such as AB or BC are point/segment names
+        return not all(part.isupper() and len(part) <= 3 for part in parts)
+
+    def get_stats(self) -> Dict:
+        """
+        Get masking statistics accumulated since the last reset
+
+        Returns:
+            Dictionary with masked span counts, characters removed from
+            prompts and placeholder restore failures
+        """
+        stats = dict(self.stats)
+        stats["chars_saved"] = stats["chars_masked"] - stats["placeholder_chars"]
+        return stats
@@ -0,0 +1,46 @@
+"""
+Process memory reporting
+Resident and proportional memory of the current process, so shared
+model weights show up as shared rather than per-process
+"""
+
+import resource
+import sys
+from typing import Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+SMAPS_ROLLUP = "/proc/self/smaps_rollup"
+
+
+def process_memory() -> Dict[str, float]:
+    """
+    Get memory usage of the current process in MiB
+
+    Returns:
+        Dictionary with rss_mb (resident), pss_mb (resident with shared
+        pages divided among the processes mapping them), shared_mb
+        (resident pages shared with other processes) and peak_rss_mb.
+        pss_mb and shared_mb are only available on Linux.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+    usage = {"rss_mb": None, "pss_mb": None, "shared_mb": None, "peak_rss_mb": peak_mb}
+    try:
+        with open(SMAPS_ROLLUP, "r") as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[1].isdigit():
+                    fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    except OSError:
+        usage["rss_mb"] = peak_mb
+        return usage
+
+    usage["rss_mb"] = fields.get("Rss")
+    usage["pss_mb"] = fields.get("Pss")
+    usage["shared_mb"] = fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0)
+    return usage
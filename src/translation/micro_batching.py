@@ -0,0 +1,243 @@
+"""
+Request micro-batching
+Collects single translation requests from concurrent callers into
+batches for one background thread, coalescing identical in-flight texts
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+RequestKey = Tuple[str, str, str, Optional[str]]
+
+
+class QueueFullError(RuntimeError):
+    """Raised when admitting a request would exceed the queue capacity"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text (about 4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+class MicroBatcher:
+    """
+    Batches concurrent translate requests for a translator
+
+    A request waits at most max_wait seconds for others to join its batch;
+    a batch is dispatched early once it holds max_batch_size distinct
+    texts or max_batch_tokens source tokens. Requests that would grow the
+    queue beyond max_pending texts are rejected. A text already queued or
+    being translated for the same language pair and field is not
+    translated again: its caller gets the future of the first request.
+    Only the background thread calls the translator, so it must not be
+    used from other threads meanwhile.
+    """
+
+    def __init__(
+        self,
+        translator,
+        max_batch_size: int = 64,
+        max_wait: float = 0.01,
+        max_batch_tokens: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        token_counter: Callable[[str], int] = estimate_tokens
+    ):
+        """
+        Start the batching thread
+
+        Args:
+            translator: Translator with translate_batch(texts, source_lang,
+                target_lang, show_progress, field_name)
+            max_batch_size: Distinct texts per dispatched batch
+            max_wait: Seconds the oldest queued request waits for a batch to fill
+            max_batch_tokens: Source tokens per dispatched batch (None for
+                no token limit)
+            max_pending: Queued texts beyond which requests are rejected
+                with QueueFullError (None for an unbounded queue)
+            token_counter: Counts the tokens of a text for max_batch_tokens
+        """
+        self.translator = translator
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_batch_tokens = max_batch_tokens
+        self.max_pending = max_pending
+        self.token_counter = token_counter
+
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[RequestKey, float, int]] = []
+        self._pending_tokens = 0
+        self._inflight: Dict[RequestKey, Future] = {}
+        self._closed = False
+        self.stats = {
+            "requests": 0,
+            "coalesced": 0,
+            "rejected": 0,
+            "batches": 0,
+            "batched_texts": 0,
+            "batched_tokens": 0
+        }
+
+        self._thread = threading.Thread(target=self._loop, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(
+        self,
+        text: str,
+        source_lang: str = "en",
+        target_lang: str = "vi",
+        field_name: Optional[str] = None
+    ) -> Future:
+        """
+        Queue one text for translation
+
+        Args:
+            text: Text to translate
+            source_lang: Source language code
+            target_lang: Target language code
+            field_name: Dataset field the text belongs to
+
+        Returns:
+            Future resolving to the translation
+        """
+        return self.submit_many([text], source_lang, target_lang, field_name)[0]
+
+    def submit_many(
+        self,
+        texts: List[str],
+        source_lang: str = "en",
+        target_lang: str = "vi",
+        field_name: Optional[str] = None
+    ) -> List[Future]:
+        """
+        Queue several texts, admitting all of them or none
+
+        Args:
+            texts: Texts to translate
+            source_lang: Source language code
+            target_lang: Target language code
+            field_name: Dataset field the texts belong to
+
+        Returns:
+            Future resolving to the translation of each text
+
+        Raises:
+            QueueFullError: If the new texts do not fit under max_pending
+        """
+        keys = [(text, source_lang, target_lang, field_name) for text in texts]
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            new_keys = list(dict.fromkeys(key for key in keys if key not in self._inflight))
+            if (self.max_pending is not None
+                    and len(self._pending) + len(new_keys) > self.max_pending):
+                self.stats["rejected"] += len(keys)
+                raise QueueFullError(
+                    f"Translation queue is full ({len(self._pending)} of {self.max_pending} texts queued)")
+
+            now = time.monotonic()
+            for key in new_keys:
+                tokens = self.token_counter(key[0])
+                self._inflight[key] = Future()
+                self._pending.append((key, now, tokens))
+                self._pending_tokens += tokens
+            self.stats["requests"] += len(keys)
+            self.stats["coalesced"] += len(keys) - len(new_keys)
+            self._cond.notify()
+            return [self._inflight[key] for key in keys]
+
+    def _batch_ready(self) -> bool:
+        """Whether the queue already fills a batch"""
+        if len(self._pending) >= self.max_batch_size:
+            return True
+        return self.max_batch_tokens is not None and self._pending_tokens >= self.max_batch_tokens
+
+    def _next_batch(self) -> List[RequestKey]:
+        """Wait until a batch is full or its oldest request waited max_wait"""
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return []
+
+            deadline = self._pending[0][1] + self.max_wait
+            while not self._batch_ready() and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            # Oldest first, up to the size and token limits (at least one text)
+            size = 0
+            tokens = 0
+            for _, _, count in self._pending[:self.max_batch_size]:
+                if size and self.max_batch_tokens is not None and tokens + count > self.max_batch_tokens:
+                    break
+                size += 1
+                tokens += count
+            batch = [key for key, _, _ in self._pending[:size]]
+            del self._pending[:size]
+            self._pending_tokens -= tokens
+            self.stats["batched_tokens"] += tokens
+            return batch
+
+    def _loop(self):
+        """Dispatch batches until closed and drained"""
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[RequestKey]):
+        """Translate one batch, one translate_batch call per language pair and field"""
+        groups: Dict[Tuple[str, str, Optional[str]], List[RequestKey]] = {}
+        for key in batch:
+            groups.setdefault(key[1:], []).append(key)
+
+        self.stats["batches"] += 1
+        self.stats["batched_texts"] += len(batch)
+        for (source_lang, target_lang, field_name), keys in groups.items():
+            try:
+                translations = self.translator.translate_batch(
+                    [key[0] for key in keys], source_lang, target_lang,
+                    show_progress=False, field_name=field_name)
+                outcomes = [(key, translation, None) for key, translation in zip(keys, translations)]
+            except Exception as e:
+                logger.error(f"Micro-batch of {len(keys)} texts failed: {e}")
+                outcomes = [(key, None, e) for key in keys]
+
+            with self._cond:
+                futures = [self._inflight.pop(key) for key, _, _ in outcomes]
+            for future, (_, translation, error) in zip(futures, outcomes):
+                if error is None:
+                    future.set_result(translation)
+                else:
+                    future.set_exception(error)
+
+    def close(self):
+        """Translate what is queued, then stop the batching thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def get_stats(self) -> Dict:
+        """
+        Get batching statistics
+
+        Returns:
+            Dictionary with request, coalesced, rejected and batch counts,
+            the queue depth and the mean number of distinct texts per batch
+        """
+        with self._cond:
+            stats = dict(self.stats)
+            stats["queued"] = len(self._pending)
+            stats["queued_tokens"] = self._pending_tokens
+        stats["mean_batch_size"] = (
+            stats["batched_texts"] / stats["batches"] if stats["batches"] else 0.0)
+        return stats
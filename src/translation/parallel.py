@@ -0,0 +1,558 @@
+"""
+Data-parallel translation
+Runs several translator replicas in worker processes, each pinned to a
+device or a CPU core set, and hands them record shards dynamically.
+CPU replicas can share one copy of the model weights.
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import time
+from typing import Dict, List, Optional, Sequence
+import logging
+
+from tqdm import tqdm
+
+from .memory import process_memory
+from .quality_validator import escalation_savings
+
+logger = logging.getLogger(__name__)
+
+
+def split_cores(num_workers: int, cores: Optional[Sequence[int]] = None) -> List[List[int]]:
+    """
+    Split CPU cores into one contiguous set per worker
+
+    Args:
+        num_workers: Number of workers
+        cores: Cores to split (default: the cores this process may run on)
+
+    Returns:
+        Core set of each worker; with fewer cores than workers, cores are
+        shared round-robin
+    """
+    if cores is None and hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    elif cores is None:
+        cores = list(range(os.cpu_count() or 1))
+    cores = list(cores)
+    if len(cores) < num_workers:
+        return [[cores[i % len(cores)]] for i in range(num_workers)]
+
+    size, extra = divmod(len(cores), num_workers)
+    sets = []
+    start = 0
+    for i in range(num_workers):
+        end = start + size + (1 if i < extra else 0)
+        sets.append(cores[start:end])
+        start = end
+    return sets
+
+
+def _worker_main(worker_id, translator_class, translator_kwargs, device, cores, tasks, results):
+    """Load one translator replica and translate shards until told to stop"""
+    try:
+        if cores:
+            if hasattr(os, "sched_setaffinity"):
+                os.sched_setaffinity(0, cores)
+            import torch
+            torch.set_num_threads(len(cores))
+
+        kwargs = dict(translator_kwargs)
+        if device is not None:
+            kwargs["device"] = device
+        translator = translator_class(**kwargs)
+        results.put(("ready", worker_id, _worker_info(translator)))
+    except Exception as e:
+        results.put(("failed", worker_id, repr(e)))
+        return
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        if task[0] == "warm":
+            _, directory, source_lang, target_lang = task
+            try:
+                results.put(("warmed", worker_id, translator.warm_cache(directory, source_lang, target_lang)))
+            except Exception as e:
+                logger.warning(f"Worker {worker_id} could not pre-warm the translation cache: {e!r}")
+                results.put(("warmed", worker_id, 0))
+            continue
+        shard_id, texts, source_lang, target_lang, field_name = task
+        results.put(("started", worker_id, shard_id))
+        try:
+            translations = translator.translate_batch(
+                texts, source_lang, target_lang, show_progress=False, field_name=field_name)
+            error = None
+        except Exception as e:
+            translations, error = [""] * len(texts), repr(e)
+        # Fresh statistics with every shard, so reports made before close() are current
+        results.put(("done", worker_id, (shard_id, translations, error, _worker_info(translator))))
+
+    # Hand what this replica learned about output lengths to the parent,
+    # which merges every replica's observations and saves them once
+    policy = getattr(translator, "decoding_policy", None)
+    observations = policy.get_observations() if policy is not None else {}
+    results.put(("stopped", worker_id, (_worker_info(translator), observations)))
+
+
+def _worker_info(translator) -> dict:
+    """Model info of a replica plus the memory of its process"""
+    info = translator.get_model_info()
+    info["memory"] = process_memory()
+    return info
+
+
+def merge_escalation_stats(infos: List[Optional[dict]]) -> Optional[dict]:
+    """
+    Combine the two-tier decoding statistics of several replicas
+
+    Args:
+        infos: Model info of each replica (None for replicas not started)
+
+    Returns:
+        Summed counts, timings and decode costs with the rates recomputed
+        over all replicas, or None if no replica uses adaptive decoding
+    """
+    stats = [info["adaptive_decoding"] for info in infos if info and info.get("adaptive_decoding")]
+    if not stats:
+        return None
+
+    merged = {
+        key: sum(s[key] for s in stats)
+        for key in ("items", "escalated", "resolved", "first_pass_seconds", "escalation_seconds",
+                    "decode_cost", "full_decode_cost")
+    }
+    items = merged["items"]
+    merged["escalation_rate"] = merged["escalated"] / items if items else 0.0
+    merged["compute_saved"] = escalation_savings(merged["decode_cost"], merged["full_decode_cost"])
+
+    validator = {}
+    for counts in (s["validator"] for s in stats if s.get("validator")):
+        for reason, count in counts.items():
+            if reason != "flag_rate":
+                validator[reason] = validator.get(reason, 0) + count
+    if validator:
+        validator["flag_rate"] = validator["flagged"] / validator["checked"] if validator["checked"] else 0.0
+    merged["validator"] = validator or None
+    return merged
+
+
+def load_shared_model(model_name: str, cpu_mode: Optional[str] = None):
+    """
+    Load a model on CPU with its weights in shared memory
+
+    Worker processes receiving the model (through spawn pickling or fork)
+    attach to the same pages read-only instead of copying the weights.
+
+    Args:
+        model_name: Local model path
+        cpu_mode: "fp32" or "bf16" to load the weights in that dtype (None
+            for the checkpoint dtype)
+
+    Returns:
+        Model in eval mode with shared parameters and buffers
+    """
+    from transformers import AutoModelForCausalLM
+    from .cpu_inference import load_dtype, prepare_cpu_model
+
+    if cpu_mode == "int8":
+        # Packed int8 weights are not tensors and cannot be placed in shared memory
+        raise ValueError("share_weights does not support cpu_mode 'int8'")
+
+    start_time = time.perf_counter()
+    model = AutoModelForCausalLM.from_pretrained(
+        model_name,
+        dtype=load_dtype(cpu_mode) if cpu_mode else "auto",
+        local_files_only=True
+    )
+    model.eval()
+    if cpu_mode:
+        model = prepare_cpu_model(model, cpu_mode)
+    model.share_memory()
+    logger.info(f"Loaded shared model weights in {time.perf_counter() - start_time:.2f}s")
+    return model
+
+
+class ParallelTranslator:
+    """
+    Translator-compatible front end over a pool of translator processes
+
+    Texts are cut into shards of shard_size; idle workers pull the next
+    shard from a shared queue, so fast workers take more of them, and
+    the results are merged back in input order. A worker that dies is
+    restarted (up to max_restarts times) and the shards of the current
+    call that have no result and are not running elsewhere are queued
+    again; shard ids are unique per call, so a late or repeated result is
+    never merged twice or into a later call.
+    """
+
+    def __init__(
+        self,
+        translator_kwargs: dict,
+        num_workers: int = 2,
+        devices: Optional[List[str]] = None,
+        cpu_cores: Optional[List[List[int]]] = None,
+        shard_size: int = 16,
+        translator_class=None,
+        start_method: str = "spawn",
+        worker_timeout: float = 600.0,
+        share_weights: bool = False,
+        max_restarts: int = 2
+    ):
+        """
+        Start the worker processes
+
+        Args:
+            translator_kwargs: Picklable keyword arguments of each replica
+            num_workers: Number of replicas
+            devices: Device of each replica (e.g. ["cuda:0", "cuda:1"]);
+                devices are assigned round-robin
+            cpu_cores: Core set of each replica; defaults to an even split
+                of the available cores for CPU replicas
+            shard_size: Texts per shard
+            translator_class: Translator to replicate (default: HunyuanTranslator)
+            start_method: multiprocessing start method
+            worker_timeout: Seconds to wait for a replica to load
+            share_weights: Load the model once in this process, in shared
+                memory, and let every replica attach to it (CPU replicas only)
+            max_restarts: Worker deaths tolerated (each dead worker is
+                restarted) before translation fails
+        """
+        if translator_class is None:
+            from .hunyuan_translator import HunyuanTranslator
+            translator_class = HunyuanTranslator
+
+        self.num_workers = num_workers
+        self.shard_size = shard_size
+        self.batch_size = translator_kwargs.get("batch_size", 4)
+        self.devices = [
+            devices[i % len(devices)] if devices else translator_kwargs.get("device")
+            for i in range(num_workers)
+        ]
+        if cpu_cores is None and all(d in (None, "cpu") for d in self.devices):
+            cpu_cores = split_cores(num_workers)
+        self.cpu_cores = cpu_cores or [None] * num_workers
+
+        self.share_weights = share_weights
+        self._shared_model = None
+        if share_weights:
+            if any(d not in (None, "cpu") for d in self.devices):
+                raise ValueError("share_weights requires CPU workers")
+            # Registers the shared-memory tensor reducers used to pickle the model
+            import torch.multiprocessing  # noqa: F401
+            self._shared_model = load_shared_model(
+                translator_kwargs.get("model_name", "./weight/Hunyuan-MT-Chimera-7B-fp8"),
+                cpu_mode=translator_kwargs.get("cpu_mode"))
+            translator_kwargs = dict(translator_kwargs, model=self._shared_model, device="cpu")
+        self.parent_memory = process_memory()
+
+        self.max_restarts = max_restarts
+        self._translator_class = translator_class
+        self._translator_kwargs = translator_kwargs
+        self.decoding_policy = translator_kwargs.get("decoding_policy")
+        self._context = mp.get_context(start_method)
+        self._tasks = self._context.Queue()
+        self._results = self._context.Queue()
+        self._processes = [self._create_worker(i) for i in range(num_workers)]
+        # Shard ids are (call number, shard index); _in_flight maps a worker to its current shard
+        self._call = 0
+        self._in_flight: Dict[int, tuple] = {}
+
+        self.worker_info: Dict[int, dict] = {}
+        self.stats = {
+            "shards": 0,
+            "items": 0,
+            "shard_errors": 0,
+            "worker_restarts": 0,
+            "stale_results": 0,
+            "elapsed_seconds": 0.0,
+            "per_worker_shards": [0] * num_workers,
+            "per_worker_items": [0] * num_workers
+        }
+
+        start_time = time.perf_counter()
+        for process in self._processes:
+            process.start()
+        try:
+            self._wait_ready(worker_timeout)
+        except Exception:
+            self.close()
+            raise
+        logger.info(
+            f"Started {num_workers} translator workers in {time.perf_counter() - start_time:.2f}s "
+            f"(devices={self.devices}, cores={self.cpu_cores})")
+
+    def _create_worker(self, worker_id: int):
+        """Create the process of one replica"""
+        return self._context.Process(
+            target=_worker_main,
+            args=(worker_id, self._translator_class, self._translator_kwargs,
+                  self.devices[worker_id], self.cpu_cores[worker_id], self._tasks, self._results),
+            daemon=True
+        )
+
+    def _wait_ready(self, timeout: float):
+        """Block until every replica has loaded its model"""
+        deadline = time.monotonic() + timeout
+        while len(self.worker_info) < self.num_workers:
+            kind, worker_id, payload = self._get_result(deadline - time.monotonic())
+            if kind == "failed":
+                raise RuntimeError(f"Translator worker {worker_id} failed to start: {payload}")
+            if kind == "ready":
+                self.worker_info[worker_id] = payload
+
+    def _get_result(self, timeout: Optional[float] = None):
+        """
+        Get the next worker message
+
+        Workers that died are restarted, which is reported as a
+        ("restarted", None, dead worker ids) message.
+        """
+        deadline = None if timeout is None else time.monotonic() + max(timeout, 0)
+        while True:
+            try:
+                return self._results.get(timeout=1.0)
+            except queue.Empty:
+                dead = [i for i, p in enumerate(self._processes) if not p.is_alive()]
+                if dead:
+                    self._restart(dead)
+                    return "restarted", None, dead
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError("Timed out waiting for translator workers")
+
+    def _restart(self, dead: List[int]):
+        """Replace dead workers with fresh replicas"""
+        if self.stats["worker_restarts"] + len(dead) > self.max_restarts:
+            raise RuntimeError(f"Translator workers {dead} exited unexpectedly")
+        for worker_id in dead:
+            logger.warning(f"Translator worker {worker_id} exited unexpectedly; restarting it")
+            self._processes[worker_id].join(timeout=5)
+            self._processes[worker_id] = self._create_worker(worker_id)
+            self._processes[worker_id].start()
+            self._in_flight.pop(worker_id, None)
+            self.stats["worker_restarts"] += 1
+
+    def warm_cache(self, directory: str, source_lang: str = "en", target_lang: str = "vi") -> int:
+        """
+        Pre-warm the workers' shared translation cache from earlier pipeline outputs
+
+        One worker loads the files, keying them with its replica's cache
+        context and segmenter, so the entries match the workers' lookups.
+
+        Args:
+            directory: Directory holding *_translated.json files
+            source_lang: Source language code of the files
+            target_lang: Target language code of the files
+
+        Returns:
+            Number of translations loaded
+        """
+        task = ("warm", directory, source_lang, target_lang)
+        self._tasks.put(task)
+        while True:
+            kind, worker_id, payload = self._get_result()
+            if kind == "warmed":
+                return payload
+            if kind == "failed":
+                raise RuntimeError(f"Translator worker {worker_id} failed to restart: {payload}")
+            if kind == "ready":
+                self.worker_info[worker_id] = payload
+            elif kind == "restarted":
+                # Warming again is harmless if the dead worker had already finished
+                self._tasks.put(task)
+
+    def translate_batch(
+        self,
+        texts: List[str],
+        source_lang: str = "en",
+        target_lang: str = "vi",
+        show_progress: bool = True,
+        field_name: Optional[str] = None
+    ) -> List[str]:
+        """
+        Translate texts across the worker pool
+
+        Args:
+            texts: List of texts to translate
+            source_lang: Source language code
+            target_lang: Target language code
+            show_progress: Whether to show a progress bar over shards
+            field_name: Dataset field the texts belong to
+
+        Returns:
+            List of translated texts in input order
+        """
+        if not texts:
+            return []
+
+        start_time = time.perf_counter()
+        self._call += 1
+        starts = list(range(0, len(texts), self.shard_size))
+        tasks = [
+            ((self._call, index), list(texts[start:start + self.shard_size]),
+             source_lang, target_lang, field_name)
+            for index, start in enumerate(starts)
+        ]
+        for task in tasks:
+            self._tasks.put(task)
+
+        shards: Dict[int, List[str]] = {}
+        progress = tqdm(total=len(starts), desc="Translating shards") if show_progress else None
+        while len(shards) < len(starts):
+            kind, worker_id, payload = self._get_result()
+            if kind == "failed":
+                raise RuntimeError(f"Translator worker {worker_id} failed to restart: {payload}")
+            if kind == "ready":
+                self.worker_info[worker_id] = payload
+            elif kind == "started":
+                self._in_flight[worker_id] = payload
+            elif kind == "restarted":
+                # A dead worker may have taken a shard without its "started"
+                # message getting through, so queue every shard that is not
+                # finished or running; duplicates are dropped below
+                running = set(self._in_flight.values())
+                for task in tasks:
+                    if task[0][1] not in shards and task[0] not in running:
+                        self._tasks.put(task)
+            if kind != "done":
+                continue
+            (call, shard_id), translations, error, self.worker_info[worker_id] = payload
+            if self._in_flight.get(worker_id) == (call, shard_id):
+                del self._in_flight[worker_id]
+            if call != self._call or shard_id in shards:
+                # Left over from an earlier call, or a shard queued again after a restart
+                self.stats["stale_results"] += 1
+                continue
+            if error:
+                logger.error(f"Worker {worker_id} failed on shard {shard_id}: {error}")
+                self.stats["shard_errors"] += 1
+            shards[shard_id] = translations
+            self.stats["per_worker_shards"][worker_id] += 1
+            self.stats["per_worker_items"][worker_id] += len(translations)
+            if progress is not None:
+                progress.update(1)
+        if progress is not None:
+            progress.close()
+
+        self.stats["shards"] += len(starts)
+        self.stats["items"] += len(texts)
+        self.stats["elapsed_seconds"] += time.perf_counter() - start_time
+
+        merged = []
+        for shard_id in range(len(starts)):
+            merged.extend(shards[shard_id])
+        return merged
+
+    def translate_single(
+        self,
+        text: str,
+        source_lang: str = "en",
+        target_lang: str = "vi",
+        field_name: Optional[str] = None
+    ) -> str:
+        """Translate a single text string on one of the workers"""
+        return self.translate_batch(
+            [text], source_lang, target_lang, show_progress=False, field_name=field_name)[0]
+
+    def translate_dataset_field(
+        self,
+        dataset_dict: dict,
+        field_name: str,
+        output_field: Optional[str] = None,
+        source_lang: str = "en",
+        target_lang: str = "vi"
+    ) -> dict:
+        """
+        Translate a specific field in a dataset dictionary
+
+        Args:
+            dataset_dict: Dictionary containing dataset
+            field_name: Name of field to translate
+            output_field: Name of output field (default: field_name + "_vi")
+            source_lang: Source language code
+            target_lang: Target language code
+
+        Returns:
+            Updated dataset dictionary with translations
+        """
+        if field_name not in dataset_dict:
+            raise ValueError(f"Field '{field_name}' not found in dataset")
+
+        if output_field is None:
+            output_field = f"{field_name}_{target_lang}"
+
+        texts = dataset_dict[field_name]
+        if isinstance(texts, str):
+            texts = [texts]
+
+        dataset_dict[output_field] = self.translate_batch(
+            texts, source_lang, target_lang, field_name=field_name)
+        return dataset_dict
+
+    def close(self):
+        """
+        Stop the workers and collect their final statistics
+
+        The output lengths observed by the workers are merged into the
+        decoding policy of translator_kwargs, which is then saved.
+        """
+        if not self._processes:
+            return
+        for process in self._processes:
+            if process.is_alive():
+                self._tasks.put(None)
+
+        stopped = 0
+        alive = sum(1 for p in self._processes if p.is_alive())
+        deadline = time.monotonic() + 30
+        while stopped < alive and time.monotonic() < deadline:
+            try:
+                kind, worker_id, payload = self._results.get(timeout=1.0)
+            except queue.Empty:
+                if not any(p.is_alive() for p in self._processes):
+                    break
+                continue
+            if kind == "stopped":
+                self.worker_info[worker_id], observations = payload
+                if self.decoding_policy is not None:
+                    self.decoding_policy.add_observations(observations)
+                stopped += 1
+
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        self._shared_model = None
+        if self.decoding_policy is not None:
+            self.decoding_policy.save()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def get_escalation_stats(self) -> Optional[dict]:
+        """Get the two-tier decoding statistics of all workers combined"""
+        return merge_escalation_stats(list(self.worker_info.values()))
+
+    def get_model_info(self) -> dict:
+        """Get pool statistics and the latest model info of every worker"""
+        stats = dict(self.stats)
+        elapsed = stats["elapsed_seconds"]
+        stats["items_per_sec"] = stats["items"] / elapsed if elapsed else 0.0
+        return {
+            "adaptive_decoding": self.get_escalation_stats(),
+            "num_workers": self.num_workers,
+            "devices": self.devices,
+            "cpu_cores": self.cpu_cores,
+            "shard_size": self.shard_size,
+            "share_weights": self.share_weights,
+            "parent_memory": self.parent_memory,
+            "parallel": stats,
+            "workers": [self.worker_info.get(i) for i in range(self.num_workers)]
+        }
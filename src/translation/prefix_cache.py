@@ -0,0 +1,91 @@
+"""
+Shared prompt-prefix KV cache
+Encodes the fixed instruction prefix of each language pair once and
+reuses its KV cache for every item
+"""
+
+from typing import Dict, List, Tuple
+import logging
+
+import torch
+
+from .continuous_batching import cache_to_layers, layers_to_cache
+
+logger = logging.getLogger(__name__)
+
+
+class PromptPrefixCache:
+    """
+    KV cache of fixed prompt prefixes, computed once per prefix
+    """
+
+    def __init__(self, model, tokenizer, device: str):
+        """
+        Initialize the prefix cache
+
+        Args:
+            model: Loaded HF causal language model
+            tokenizer: Matching tokenizer
+            device: Device of the model
+        """
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self._entries: Dict[str, Tuple[List[int], List[Tuple[torch.Tensor, torch.Tensor]]]] = {}
+        # items_not_served: items whose prompt does not tokenize as prefix + text
+        self.stats = {"prefixes_encoded": 0, "items_served": 0, "items_not_served": 0, "prefill_tokens_saved": 0}
+
+    def _entry(self, prefix: str) -> Tuple[List[int], List[Tuple[torch.Tensor, torch.Tensor]]]:
+        """Get (token ids, per-layer KV) for a prefix, encoding it on first use"""
+        if prefix not in self._entries:
+            prefix_ids = self.tokenizer(prefix)["input_ids"]
+            with torch.no_grad():
+                outputs = self.model(
+                    input_ids=torch.tensor([prefix_ids], device=self.device),
+                    use_cache=True
+                )
+            self._entries[prefix] = (prefix_ids, cache_to_layers(outputs.past_key_values))
+            self.stats["prefixes_encoded"] += 1
+            logger.info(f"Encoded prompt prefix {prefix!r} ({len(prefix_ids)} tokens)")
+        return self._entries[prefix]
+
+    def get_ids(self, prefix: str) -> List[int]:
+        """
+        Get the token ids of a prefix
+
+        Args:
+            prefix: Prompt prefix
+
+        Returns:
+            Token ids (including any BOS token the tokenizer adds)
+        """
+        return self._entry(prefix)[0]
+
+    def build(self, prefix: str, n_items: int, expand: int = 1):
+        """
+        Build a fresh cache holding the prefix for a batch
+
+        Args:
+            prefix: Prompt prefix
+            n_items: Number of items in the batch
+            expand: Rows per item (e.g. the number of beams)
+
+        Returns:
+            DynamicCache with n_items * expand identical rows
+        """
+        prefix_ids, layers = self._entry(prefix)
+        rows = n_items * expand
+        self.stats["items_served"] += n_items
+        self.stats["prefill_tokens_saved"] += n_items * len(prefix_ids)
+        return layers_to_cache([
+            (key.repeat(rows, 1, 1, 1), value.repeat(rows, 1, 1, 1))
+            for key, value in layers
+        ])
+
+    def clear(self):
+        """Drop all cached prefixes (e.g. after the model changes)"""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """Get prefix reuse statistics"""
+        return dict(self.stats)
@@ -0,0 +1,153 @@
+"""
+Heuristic translation validator
+Cheap checks that flag suspect outputs of a fast first decoding pass
+so only those are re-translated at a more expensive setting
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List
+import logging
+
+from .bypass import VIETNAMESE_CHARS
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_END = ".!?"
+
+# Characters a complete translation of a finished sentence may end with
+CLOSING_CHARS = ".!?…:;)]}\"'”’»$"
+
+REASONS = ("empty", "truncated", "length_ratio", "no_diacritics", "repetition")
+
+
+def escalation_savings(decode_cost: float, full_decode_cost: float) -> float:
+    """
+    Fraction of decode work two-tier decoding saved
+
+    Args:
+        decode_cost: Work of the first pass plus the escalated items
+        full_decode_cost: Work of running every item at the escalation setting
+
+    Returns:
+        1 - decode_cost / full_decode_cost, or 0 if nothing was saved
+    """
+    if not full_decode_cost:
+        return 0.0
+    return max(0.0, 1 - decode_cost / full_decode_cost)
+
+
+class TranslationValidator:
+    """
+    Flag empty, truncated, wrongly sized, undiacritized or looping translations
+    """
+
+    def __init__(
+        self,
+        min_length_ratio: float = 0.5,
+        max_length_ratio: float = 3.0,
+        min_source_chars: int = 20,
+        min_words_for_diacritics: int = 4,
+        ngram_size: int = 3,
+        max_ngram_repeats: int = 3
+    ):
+        """
+        Initialize the validator
+
+        Args:
+            min_length_ratio: Smallest acceptable translation/source character ratio
+            max_length_ratio: Largest acceptable translation/source character ratio
+            min_source_chars: Sources shorter than this skip the length ratio check
+            min_words_for_diacritics: Vietnamese translations with at least
+                this many words must contain a Vietnamese diacritic
+            ngram_size: Word n-gram size of the repetition check
+            max_ngram_repeats: An n-gram repeated this often (and more often
+                than in the source) counts as a generation loop
+        """
+        self.min_length_ratio = min_length_ratio
+        self.max_length_ratio = max_length_ratio
+        self.min_source_chars = min_source_chars
+        self.min_words_for_diacritics = min_words_for_diacritics
+        self.ngram_size = ngram_size
+        self.max_ngram_repeats = max_ngram_repeats
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset validation counters"""
+        self.stats = {"checked": 0, "flagged": 0}
+        self.stats.update({reason: 0 for reason in REASONS})
+
+    def check(self, source: str, translation: str, target_lang: str = "vi") -> List[str]:
+        """
+        Check one translation
+
+        Args:
+            source: Source text
+            translation: Translated text
+            target_lang: Target language code; the diacritics check only
+                applies to Vietnamese
+
+        Returns:
+            Reasons the translation looks wrong (empty list if it passed)
+        """
+        self.stats["checked"] += 1
+        reasons = self.find_issues(source, translation, target_lang)
+        if reasons:
+            self.stats["flagged"] += 1
+            for reason in reasons:
+                self.stats[reason] += 1
+        return reasons
+
+    def find_issues(self, source: str, translation: str, target_lang: str = "vi") -> List[str]:
+        """Same checks as check(), without updating the statistics"""
+        source = source.strip()
+        translation = (translation or "").strip()
+        if not source:
+            return []
+        if not translation:
+            return ["empty"]
+
+        reasons = []
+        if source[-1] in SENTENCE_END and translation[-1] not in CLOSING_CHARS:
+            reasons.append("truncated")
+
+        if len(source) >= self.min_source_chars:
+            ratio = len(translation) / len(source)
+            if not self.min_length_ratio <= ratio <= self.max_length_ratio:
+                reasons.append("length_ratio")
+
+        if target_lang == "vi" and not self._has_diacritics(translation):
+            reasons.append("no_diacritics")
+
+        if self._max_repeats(translation) >= self.max_ngram_repeats > self._max_repeats(source):
+            reasons.append("repetition")
+
+        return reasons
+
+    def _has_diacritics(self, text: str) -> bool:
+        """Check whether text carries Vietnamese diacritics (short texts always pass)"""
+        words = re.findall(r"[^\W\d_]{2,}", text)
+        if len(words) < self.min_words_for_diacritics:
+            return True
+        return any(c in VIETNAMESE_CHARS for c in unicodedata.normalize("NFC", text))
+
+    def _max_repeats(self, text: str) -> int:
+        """Largest number of occurrences of any word n-gram"""
+        words = text.lower().split()
+        ngrams = Counter(
+            tuple(words[i:i + self.ngram_size])
+            for i in range(len(words) - self.ngram_size + 1)
+        )
+        return max(ngrams.values(), default=0)
+
+    def get_stats(self) -> Dict:
+        """
+        Get validation statistics accumulated since the last reset
+
+        Returns:
+            Dictionary with checked/flagged counts and per-reason counts
+        """
+        stats = dict(self.stats)
+        stats["flag_rate"] = stats["flagged"] / stats["checked"] if stats["checked"] else 0.0
+        return stats
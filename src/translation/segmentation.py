@@ -0,0 +1,208 @@
+"""
+Text segmentation for long dataset fields
+Splits text into paragraphs and sentences that can be translated as
+independent units and reassembled with the original layout
+"""
+
+import re
+from typing import List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Abbreviations whose trailing period does not end a sentence
+ABBREVIATIONS = {
+    "e.g", "i.e", "etc", "vs", "cf", "al", "approx", "resp", "fig", "figs",
+    "eq", "eqs", "ref", "refs", "no", "vol", "ch", "sec", "dr", "mr", "mrs",
+    "ms", "prof", "st", "jr", "sr", "inc", "ltd", "co", "corp", "min", "max",
+    "deg", "mol", "aq", "ca"
+}
+
+# Math spans that must never be split: $...$, $$...$$, \(...\), \[...\]
+MATH_SPAN_PATTERN = re.compile(
+    r"\$\$.+?\$\$|\$[^$\n]+\$|\\\(.+?\\\)|\\\[.+?\\\]", re.DOTALL)
+
+# Sentence-final punctuation, optional closing quote/bracket, then whitespace
+SENTENCE_END_PATTERN = re.compile(r"[.!?][\"')\]]*(\s+)")
+
+PARAGRAPH_PATTERN = re.compile(r"(\n\s*\n|\n)")
+
+
+class TextSegmenter:
+    """
+    Paragraph and sentence splitter with math and abbreviation awareness
+    """
+
+    def __init__(self, max_segment_chars: int = 800, min_segment_chars: int = 20):
+        """
+        Initialize the segmenter
+
+        Args:
+            max_segment_chars: Sentences longer than this are split further
+                at clause boundaries
+            min_segment_chars: Sentences shorter than this are merged into
+                the following sentence of the same paragraph
+        """
+        self.max_segment_chars = max_segment_chars
+        self.min_segment_chars = min_segment_chars
+
+    def segment(self, text: str) -> Tuple[List[str], List[str]]:
+        """
+        Split text into translatable segments
+
+        Args:
+            text: Text to split
+
+        Returns:
+            Tuple (segments, separators) where separators has one more item
+            than segments and text == separators[0] + segments[0] +
+            separators[1] + ... + segments[-1] + separators[-1]
+        """
+        segments: List[str] = []
+        separators: List[str] = [""]
+
+        pieces = PARAGRAPH_PATTERN.split(text)
+        for index, piece in enumerate(pieces):
+            if index % 2 == 1:
+                # Paragraph break
+                separators[-1] += piece
+                continue
+
+            stripped = piece.strip()
+            if not stripped:
+                separators[-1] += piece
+                continue
+
+            leading = piece[:len(piece) - len(piece.lstrip())]
+            trailing = piece[len(piece.rstrip()):]
+            separators[-1] += leading
+
+            sentences, gaps = self._split_sentences(stripped)
+            for position, sentence in enumerate(sentences):
+                segments.append(sentence)
+                separators.append(gaps[position] if position < len(gaps) else "")
+            separators[-1] += trailing
+
+        return segments, separators
+
+    @staticmethod
+    def reassemble(segments: List[str], separators: List[str]) -> str:
+        """
+        Join (translated) segments back together with the original separators
+
+        Args:
+            segments: Segments in order
+            separators: Separators returned by segment()
+
+        Returns:
+            Reassembled text
+        """
+        parts = [separators[0]]
+        for segment, separator in zip(segments, separators[1:]):
+            parts.append(segment)
+            parts.append(separator)
+        return "".join(parts)
+
+    def _split_sentences(self, paragraph: str) -> Tuple[List[str], List[str]]:
+        """Split one paragraph into sentences and the whitespace between them"""
+        protected = [m.span() for m in MATH_SPAN_PATTERN.finditer(paragraph)]
+
+        sentences = []
+        gaps = []
+        start = 0
+        for match in SENTENCE_END_PATTERN.finditer(paragraph):
+            end = match.start(1)
+            if self._is_boundary(paragraph, match.start(), end, protected):
+                sentences.append(paragraph[start:end])
+                gaps.append(match.group(1))
+                start = match.end()
+        sentences.append(paragraph[start:])
+
+        sentences, gaps = self._merge_short(sentences, gaps)
+
+        # Split overly long sentences at clause boundaries
+        result_sentences = []
+        result_gaps = []
+        for position, sentence in enumerate(sentences):
+            parts, part_gaps = self._split_long(sentence)
+            result_sentences.extend(parts)
+            result_gaps.extend(part_gaps)
+            if position < len(gaps):
+                result_gaps.append(gaps[position])
+
+        return result_sentences, result_gaps
+
+    def _is_boundary(self, text: str, punct_pos: int, end: int, protected: List[Tuple[int, int]]) -> bool:
+        """Decide whether the punctuation at punct_pos ends a sentence"""
+        if any(lo <= punct_pos < hi for lo, hi in protected):
+            return False
+
+        # The next sentence should start with an uppercase letter, digit,
+        # opening quote/bracket or math delimiter
+        following = text[end:].lstrip()
+        if not following or not (following[0].isupper() or following[0].isdigit()
+                                  or following[0] in "\"'([$\\"):
+            return False
+
+        if text[punct_pos] == ".":
+            word_match = re.search(r"([A-Za-z.]+)$", text[:punct_pos])
+            if word_match:
+                word = word_match.group(1).lower().strip(".")
+                if word in ABBREVIATIONS:
+                    return False
+
+        return True
+
+    def _merge_short(self, sentences: List[str], gaps: List[str]) -> Tuple[List[str], List[str]]:
+        """Merge sentences shorter than min_segment_chars into the next one"""
+        merged = []
+        merged_gaps = []
+        carry = ""
+        for position, sentence in enumerate(sentences):
+            gap = gaps[position] if position < len(gaps) else None
+            candidate = carry + sentence
+            if gap is not None and len(candidate) < self.min_segment_chars:
+                carry = candidate + gap
+                continue
+            merged.append(candidate)
+            carry = ""
+            if gap is not None:
+                merged_gaps.append(gap)
+        return merged, merged_gaps
+
+    def _split_long(self, sentence: str) -> Tuple[List[str], List[str]]:
+        """
+        Split a sentence longer than max_segment_chars at ';' or ',' then
+        spaces, never inside a math span
+
+        Returns:
+            Tuple (chunks, whitespace between consecutive chunks)
+        """
+        if len(sentence) <= self.max_segment_chars:
+            return [sentence], []
+
+        protected = [m.span() for m in MATH_SPAN_PATTERN.finditer(sentence)]
+        for pattern in (r"(?<=;)\s+", r"(?<=,)\s+", r"\s+"):
+            breaks = [
+                m.span() for m in re.finditer(pattern, sentence)
+                if not any(lo < m.end() and m.start() < hi for lo, hi in protected)
+            ]
+            if not breaks:
+                continue
+
+            chunks = []
+            gaps = []
+            start = 0
+            for position, (gap_start, gap_end) in enumerate(breaks):
+                next_break = breaks[position + 1][0] if position + 1 < len(breaks) else len(sentence)
+                # Keep going while the next piece still fits in the current chunk
+                if next_break - start <= self.max_segment_chars:
+                    continue
+                chunks.append(sentence[start:gap_start])
+                gaps.append(sentence[gap_start:gap_end])
+                start = gap_end
+            chunks.append(sentence[start:])
+            if all(len(chunk) <= self.max_segment_chars for chunk in chunks):
+                return chunks, gaps
+
+        return [sentence], []
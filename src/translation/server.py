@@ -0,0 +1,382 @@
+"""
+Translation server
+Keeps a translator warm behind a localhost HTTP/JSON API, gathering
+concurrent requests into micro-batches, and a client that lets the
+pipeline send its work there
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+import logging
+
+from tqdm import tqdm
+
+from .micro_batching import MicroBatcher, QueueFullError, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler dispatching to the owning TranslationServer"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        app = self.server.app
+        if self.path == "/health":
+            self._send_json(200, app.health())
+        elif self.path == "/metrics":
+            self._send_json(200, app.metrics())
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/translate":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            self._send_json(400, {"error": f"Invalid JSON body: {e}"})
+            return
+        status, body, headers = self.server.app.handle_translate(request)
+        self._send_json(status, body, headers)
+
+    def _send_json(self, status: int, body: dict, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class TranslationServer:
+    """
+    HTTP front end of a warm translator
+
+    POST /translate takes {"texts": [...], "source_lang", "target_lang",
+    "field_name"} (or a single "text") and answers with the translations.
+    Texts of concurrent requests are batched by a MicroBatcher under its
+    max-wait / max-batch-size / max-batch-tokens policy. A request that
+    does not fit in the queue is refused with 503 and a Retry-After
+    header, so clients back off instead of piling up. GET /health and
+    GET /metrics report liveness, queue depth, latencies and the
+    translator's statistics.
+    """
+
+    def __init__(
+        self,
+        translator,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        max_batch_size: int = 64,
+        max_wait: float = 0.02,
+        max_batch_tokens: Optional[int] = None,
+        max_pending: int = 1024,
+        request_timeout: float = 600.0,
+        retry_after: int = 1
+    ):
+        """
+        Initialize the server (call serve_forever() or start() to run it)
+
+        Args:
+            translator: Loaded translator (e.g. HunyuanTranslator)
+            host: Interface to listen on
+            port: Port to listen on (0 for a free port)
+            max_batch_size: Distinct texts per micro-batch
+            max_wait: Seconds a request waits for its micro-batch to fill
+            max_batch_tokens: Estimated source tokens per micro-batch (None for no limit)
+            max_pending: Queued texts beyond which requests are refused
+            request_timeout: Seconds a request waits for its translations
+            retry_after: Seconds clients are told to wait when refused
+        """
+        self.translator = translator
+        self.request_timeout = request_timeout
+        self.retry_after = retry_after
+
+        # Batch tokens are estimated from characters: the tokenizer belongs
+        # to the batching thread and is not safe to share with handler threads
+        self.batcher = MicroBatcher(
+            translator,
+            max_batch_size=max_batch_size,
+            max_wait=max_wait,
+            max_batch_tokens=max_batch_tokens,
+            max_pending=max_pending,
+            token_counter=estimate_tokens
+        )
+
+        self.httpd = ThreadingHTTPServer((host, port), _RequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.app = self
+        self.host, self.port = self.httpd.server_address[:2]
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self._thread = None
+        self.started = time.time()
+        self.stats = {"requests": 0, "texts": 0, "rejected": 0, "timeouts": 0, "errors": 0}
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server"""
+        return f"http://{self.host}:{self.port}"
+
+    def handle_translate(self, request: dict):
+        """
+        Translate the texts of one request
+
+        Returns:
+            Tuple (HTTP status, JSON body, extra headers)
+        """
+        single = "text" in request
+        texts = [request["text"]] if single else request.get("texts")
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            return 400, {"error": "Expected a 'text' string or a 'texts' list of strings"}, {}
+        if len(texts) > self.batcher.max_pending:
+            return 413, {"error": f"At most {self.batcher.max_pending} texts per request"}, {}
+
+        start_time = time.perf_counter()
+        results = [""] * len(texts)
+        indices = [i for i, text in enumerate(texts) if text.strip()]
+        try:
+            futures = self.batcher.submit_many(
+                [texts[i] for i in indices],
+                request.get("source_lang", "en"),
+                request.get("target_lang", "vi"),
+                request.get("field_name")
+            )
+        except QueueFullError as e:
+            with self._lock:
+                self.stats["rejected"] += 1
+            return 503, {"error": str(e)}, {"Retry-After": str(self.retry_after)}
+
+        deadline = time.monotonic() + self.request_timeout
+        try:
+            for i, future in zip(indices, futures):
+                results[i] = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            with self._lock:
+                self.stats["timeouts"] += 1
+            return 504, {"error": "Timed out waiting for translations"}, {}
+        except Exception as e:
+            with self._lock:
+                self.stats["errors"] += 1
+            return 500, {"error": repr(e)}, {}
+
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["texts"] += len(texts)
+            self._latencies.append(time.perf_counter() - start_time)
+        body = {"translation": results[0]} if single else {"translations": results}
+        return 200, body, {}
+
+    def health(self) -> dict:
+        """Liveness and queue depth"""
+        batching = self.batcher.get_stats()
+        return {
+            "status": "ok",
+            "model_name": getattr(self.translator, "model_name", None),
+            "uptime_seconds": time.time() - self.started,
+            "queued": batching["queued"],
+            "max_pending": self.batcher.max_pending
+        }
+
+    def metrics(self) -> dict:
+        """Request counts, latency percentiles, batching and translator statistics"""
+        with self._lock:
+            stats = dict(self.stats)
+            latencies = sorted(self._latencies)
+        if latencies:
+            stats["latency_seconds"] = {
+                "mean": sum(latencies) / len(latencies),
+                "p50": latencies[len(latencies) // 2],
+                "p95": latencies[min(int(0.95 * len(latencies)), len(latencies) - 1)]
+            }
+        stats["uptime_seconds"] = time.time() - self.started
+        stats["batching"] = self.batcher.get_stats()
+        stats["model"] = self.translator.get_model_info()
+        return stats
+
+    def serve_forever(self):
+        """Serve requests until shutdown() is called"""
+        logger.info(f"Translation server listening on {self.url}")
+        self.httpd.serve_forever()
+
+    def start(self) -> "TranslationServer":
+        """Serve requests from a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name="translation-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def shutdown(self):
+        """Stop accepting requests, finish queued work and close the socket"""
+        self.httpd.shutdown()
+        self.batcher.close()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class TranslationClient:
+    """
+    Translator-compatible client of a running TranslationServer
+
+    Texts are sent in chunks of chunk_size, several chunks at a time;
+    refused requests are retried after the server's Retry-After delay.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        chunk_size: int = 16,
+        concurrency: int = 4,
+        timeout: float = 600.0,
+        max_wait: float = 600.0
+    ):
+        """
+        Connect to the server
+
+        Args:
+            url: Server base URL, e.g. http://127.0.0.1:8765
+            chunk_size: Texts per request
+            concurrency: Requests in flight
+            timeout: Seconds to wait for one response
+            max_wait: Seconds to keep retrying a refused request
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.url = url.rstrip("/")
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_wait = max_wait
+
+        self._session = requests.Session()
+        self._session.mount("http://", HTTPAdapter(pool_maxsize=concurrency))
+        self.stats = {"requests": 0, "refused": 0}
+
+    def health(self) -> dict:
+        """Get the server's health report"""
+        response = self._session.get(f"{self.url}/health", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _post(self, payload: dict) -> dict:
+        """Send one translate request, waiting out backpressure"""
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            response = self._session.post(f"{self.url}/translate", json=payload, timeout=self.timeout)
+            self.stats["requests"] += 1
+            if response.status_code != 503 or time.monotonic() > deadline:
+                response.raise_for_status()
+                return response.json()
+            self.stats["refused"] += 1
+            time.sleep(float(response.headers.get("Retry-After", 1)))
+
+    def translate_batch(
+        self,
+        texts: List[str],
+        source_lang: str = "en",
+        target_lang: str = "vi",
+        show_progress: bool = True,
+        field_name: Optional[str] = None
+    ) -> List[str]:
+        """
+        Translate texts on the server
+
+        Args:
+            texts: List of texts to translate
+            source_lang: Source language code
+            target_lang: Target language code
+            show_progress: Whether to show a progress bar over requests
+            field_name: Dataset field the texts belong to
+
+        Returns:
+            List of translated texts in input order
+        """
+        chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        payloads = [
+            {"texts": list(chunk), "source_lang": source_lang,
+             "target_lang": target_lang, "field_name": field_name}
+            for chunk in chunks
+        ]
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            responses = pool.map(self._post, payloads)
+            if show_progress:
+                responses = tqdm(responses, total=len(payloads), desc="Translating on server")
+            translations = []
+            for response in responses:
+                translations.extend(response["translations"])
+        return translations
+
+    def translate_single(
+        self,
+        text: str,
+        source_lang: str = "en",
+        target_lang: str = "vi",
+        field_name: Optional[str] = None
+    ) -> str:
+        """Translate a single text string on the server"""
+        return self.translate_batch(
+            [text], source_lang, target_lang, show_progress=False, field_name=field_name)[0]
+
+    def translate_dataset_field(
+        self,
+        dataset_dict: dict,
+        field_name: str,
+        output_field: Optional[str] = None,
+        source_lang: str = "en",
+        target_lang: str = "vi"
+    ) -> dict:
+        """
+        Translate a specific field in a dataset dictionary
+
+        Args:
+            dataset_dict: Dictionary containing dataset
+            field_name: Name of field to translate
+            output_field: Name of output field (default: field_name + "_vi")
+            source_lang: Source language code
+            target_lang: Target language code
+
+        Returns:
+            Updated dataset dictionary with translations
+        """
+        if field_name not in dataset_dict:
+            raise ValueError(f"Field '{field_name}' not found in dataset")
+
+        if output_field is None:
+            output_field = f"{field_name}_{target_lang}"
+
+        texts = dataset_dict[field_name]
+        if isinstance(texts, str):
+            texts = [texts]
+
+        dataset_dict[output_field] = self.translate_batch(
+            texts, source_lang, target_lang, field_name=field_name)
+        return dataset_dict
+
+    def get_model_info(self) -> dict:
+        """Get the server's translator statistics plus this client's request counts"""
+        response = self._session.get(f"{self.url}/metrics", timeout=self.timeout)
+        response.raise_for_status()
+        metrics = response.json()
+        info = dict(metrics.pop("model"))
+        info["server"] = {"url": self.url, "client": dict(self.stats), **metrics}
+        return info
+
+    def close(self):
+        """Close pooled connections"""
+        self._session.close()
@@ -0,0 +1,277 @@
+"""
+Speculative decoding
+Greedy draft-and-verify generation: a cheap proposer suggests several
+tokens, the target model checks them in one forward pass and keeps the
+longest prefix it agrees with. Output is identical to greedy decoding.
+"""
+
+from collections import deque
+from typing import Dict, List, Optional
+import logging
+import time
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+def crop_cache(cache, length: int):
+    """Drop cached positions beyond length from a HF DynamicCache"""
+    excess = cache.get_seq_length() - length
+    if excess > 0:
+        cache.crop(-excess)
+
+
+class DraftModelProposer:
+    """
+    Propose continuation tokens with a small draft model sharing the
+    target's vocabulary
+    """
+
+    name = "draft_model"
+
+    def __init__(self, draft_model, device: str):
+        """
+        Initialize the proposer
+
+        Args:
+            draft_model: Small HF causal LM with the target's tokenizer
+            device: Device of the draft model
+        """
+        self.model = draft_model
+        self.device = device
+        self._cache = None
+        self._cache_length = 0
+
+    def start(self, prompt_ids: List[int]):
+        """Reset the draft KV cache for a new sequence"""
+        self._cache = None
+        self._cache_length = 0
+
+    def propose(self, context: List[int], num_tokens: int) -> List[int]:
+        """
+        Greedily draft num_tokens tokens after context
+
+        The draft cache is cropped back to the context afterwards, so it
+        stays valid whatever the target model accepts.
+        """
+        if num_tokens <= 0:
+            return []
+
+        new_ids = context[self._cache_length:]
+        proposals = []
+        outputs = self.model(
+            input_ids=torch.tensor([new_ids], device=self.device),
+            past_key_values=self._cache,
+            use_cache=True
+        )
+        for step in range(num_tokens):
+            token = int(outputs.logits[0, -1].argmax())
+            proposals.append(token)
+            if step + 1 < num_tokens:
+                outputs = self.model(
+                    input_ids=torch.tensor([[token]], device=self.device),
+                    past_key_values=outputs.past_key_values,
+                    use_cache=True
+                )
+
+        self._cache = outputs.past_key_values
+        crop_cache(self._cache, len(context))
+        self._cache_length = len(context)
+        return proposals
+
+
+class PromptLookupProposer:
+    """
+    Propose continuation tokens by n-gram matching against the context
+
+    The most recent earlier occurrence of the trailing n-gram (longest n
+    first) is looked up in the prompt and generated text, and the tokens
+    that followed it are proposed. Suits translations that copy numbers,
+    names and formulas from the source.
+    """
+
+    name = "prompt_lookup"
+
+    def __init__(self, max_ngram_size: int = 3, min_ngram_size: int = 1):
+        """
+        Initialize the proposer
+
+        Args:
+            max_ngram_size: Longest trailing n-gram to match
+            min_ngram_size: Shortest trailing n-gram to match
+        """
+        self.max_ngram_size = max_ngram_size
+        self.min_ngram_size = min_ngram_size
+
+    def start(self, prompt_ids: List[int]):
+        """Nothing to reset; matching is done against the full context"""
+
+    def propose(self, context: List[int], num_tokens: int) -> List[int]:
+        """Propose up to num_tokens tokens copied from an earlier n-gram match"""
+        if num_tokens <= 0:
+            return []
+
+        for n in range(self.max_ngram_size, self.min_ngram_size - 1, -1):
+            if len(context) <= n:
+                continue
+            pattern = context[-n:]
+            for start in range(len(context) - n - 1, -1, -1):
+                if context[start:start + n] == pattern:
+                    return context[start + n:start + n + num_tokens]
+        return []
+
+
+class SpeculativeDecoder:
+    """
+    Greedy speculative decoding for a single sequence with acceptance
+    tracking and automatic fallback to plain decoding
+    """
+
+    def __init__(
+        self,
+        model,
+        proposer,
+        eos_token_id: int,
+        num_speculative_tokens: int = 4,
+        min_acceptance_rate: float = 0.3,
+        window_size: int = 64,
+        device: Optional[str] = None
+    ):
+        """
+        Initialize the decoder
+
+        Args:
+            model: Target HF causal LM
+            proposer: Object with start(prompt_ids) and propose(context, n)
+            eos_token_id: End-of-sequence token id
+            num_speculative_tokens: Tokens proposed per step
+            min_acceptance_rate: Speculation is switched off when the
+                acceptance rate over the last window_size steps drops below this
+            window_size: Number of recent steps used for the acceptance rate
+            device: Device of the target model
+        """
+        self.model = model
+        self.proposer = proposer
+        self.eos_token_id = eos_token_id
+        self.num_speculative_tokens = num_speculative_tokens
+        self.min_acceptance_rate = min_acceptance_rate
+        self.window_size = window_size
+        self.device = device or next(model.parameters()).device
+        self.enabled = True
+        self._window = deque(maxlen=window_size)
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset acceptance statistics"""
+        self.stats = {
+            "sequences": 0,
+            "steps": 0,
+            "generated_tokens": 0,
+            "proposed_tokens": 0,
+            "accepted_tokens": 0,
+            "fallbacks": 0,
+            "elapsed_seconds": 0.0
+        }
+
+    def generate_ids(self, prompt_ids: List[int], max_new_tokens: int) -> List[int]:
+        """
+        Generate greedily with speculation
+
+        Args:
+            prompt_ids: Token ids of the prompt
+            max_new_tokens: Maximum number of generated tokens
+
+        Returns:
+            Generated token ids (EOS excluded)
+        """
+        start_time = time.perf_counter()
+        generated: List[int] = []
+
+        with torch.no_grad():
+            outputs = self.model(
+                input_ids=torch.tensor([prompt_ids], device=self.device),
+                use_cache=True
+            )
+            cache = outputs.past_key_values
+            cache_length = len(prompt_ids)
+            next_token = int(outputs.logits[0, -1].argmax())
+            self.proposer.start(prompt_ids)
+
+            while next_token != self.eos_token_id:
+                generated.append(next_token)
+                remaining = max_new_tokens - len(generated)
+                if remaining <= 0:
+                    break
+
+                draft = []
+                if self.enabled:
+                    draft = self.proposer.propose(
+                        prompt_ids + generated,
+                        min(self.num_speculative_tokens, remaining))
+
+                # Verify the pending token and all drafted tokens in one pass
+                outputs = self.model(
+                    input_ids=torch.tensor([[next_token] + draft], device=self.device),
+                    past_key_values=cache,
+                    use_cache=True
+                )
+                cache = outputs.past_key_values
+                predictions = outputs.logits[0].argmax(dim=-1).tolist()
+
+                accepted = 0
+                while accepted < len(draft) and draft[accepted] == predictions[accepted]:
+                    accepted += 1
+
+                # Keep the cache only up to the last accepted token
+                cache_length += 1 + accepted
+                crop_cache(cache, cache_length)
+                self._record(len(draft), accepted)
+
+                accepted_tokens = draft[:accepted]
+                if self.eos_token_id in accepted_tokens:
+                    generated.extend(accepted_tokens[:accepted_tokens.index(self.eos_token_id)])
+                    break
+                generated.extend(accepted_tokens)
+                next_token = predictions[accepted]
+
+        generated = generated[:max_new_tokens]
+        self.stats["sequences"] += 1
+        self.stats["generated_tokens"] += len(generated)
+        self.stats["elapsed_seconds"] += time.perf_counter() - start_time
+        return generated
+
+    def _record(self, proposed: int, accepted: int):
+        """Track acceptance and switch speculation off if it stops paying"""
+        self.stats["steps"] += 1
+        self.stats["proposed_tokens"] += proposed
+        self.stats["accepted_tokens"] += accepted
+        if not proposed:
+            return
+
+        self._window.append((proposed, accepted))
+        if self.enabled and len(self._window) == self.window_size:
+            rate = sum(a for _, a in self._window) / sum(p for p, _ in self._window)
+            if rate < self.min_acceptance_rate:
+                self.enabled = False
+                self.stats["fallbacks"] += 1
+                logger.warning(
+                    f"Speculative acceptance rate {rate:.2f} fell below "
+                    f"{self.min_acceptance_rate:.2f}; falling back to regular decoding")
+
+    def get_stats(self) -> Dict:
+        """
+        Get speculation statistics accumulated since the last reset
+
+        Returns:
+            Dictionary with proposed/accepted counts, acceptance rate,
+            accepted tokens per step and whether speculation is still on
+        """
+        stats = dict(self.stats)
+        proposed = stats["proposed_tokens"]
+        steps = stats["steps"]
+        stats["proposer"] = self.proposer.name
+        stats["acceptance_rate"] = stats["accepted_tokens"] / proposed if proposed else 0.0
+        stats["accepted_tokens_per_step"] = stats["accepted_tokens"] / steps if steps else 0.0
+        stats["enabled"] = self.enabled
+        return stats
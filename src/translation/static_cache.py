@@ -0,0 +1,129 @@
+"""
+Static KV cache and compiled decoding
+Preallocates the KV cache of generate calls once per batch shape and
+lets generate run its decode step through torch.compile, with the
+compiled kernels cached on disk for later runs
+"""
+
+import os
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Tuple, Union
+import logging
+
+from transformers import CompileConfig, StaticCache
+
+logger = logging.getLogger(__name__)
+
+
+class StaticDecoding:
+    """
+    Static KV caches and compile settings for model.generate
+
+    A cache holds batch_size rows of max_cache_len positions, the prompt
+    length plus the output budget rounded up to a multiple of
+    length_bucket, so nearby shapes share a cache and a compiled graph.
+    Caches are reset and reused across calls; the least recently used is
+    dropped beyond max_caches shapes. Only single-beam decoding can use a
+    static cache, as beam search reorders the cache rows every step.
+
+    generate compiles the decode step only on accelerators (CUDA, XPU);
+    on CPU the static caches are still reused but decoding stays eager.
+    """
+
+    def __init__(
+        self,
+        model,
+        compile_cache_dir: Union[str, Path] = "cache/compile",
+        length_bucket: int = 64,
+        max_caches: int = 4,
+        backend: str = "inductor"
+    ):
+        """
+        Initialize static decoding
+
+        Args:
+            model: Loaded causal LM
+            compile_cache_dir: Directory of the compiled kernel cache,
+                reused by later runs to skip most of the compilation
+            length_bucket: Cache lengths are rounded up to a multiple of this
+            max_caches: Distinct cache shapes kept allocated
+            backend: torch.compile backend
+        """
+        self.model = model
+        self.length_bucket = length_bucket
+        self.max_caches = max_caches
+        self.compile_cache_dir = Path(compile_cache_dir).resolve()
+        self.compile_cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # Without CUDA graphs, whose captured buffers the reused caches would outlive
+        self.compile_config = CompileConfig(mode="default", backend=backend)
+
+        self._caches: "OrderedDict[Tuple[int, int], StaticCache]" = OrderedDict()
+        self.stats = {"calls": 0, "cache_allocations": 0, "cache_reuses": 0, "cache_evictions": 0}
+        logger.info(f"Compiled decoding with static KV caches (kernel cache: {self.compile_cache_dir})")
+
+    def cache_length(self, prompt_length: int, max_new_tokens: int) -> int:
+        """Cache positions for a prompt and output budget, rounded up to the bucket"""
+        needed = prompt_length + max_new_tokens
+        return -(-needed // self.length_bucket) * self.length_bucket
+
+    def generation_kwargs(self, batch_size: int, prompt_length: int, max_new_tokens: int) -> Dict:
+        """
+        Get the static cache and compile settings for one generate call
+
+        Args:
+            batch_size: Rows of the call (after beam expansion)
+            prompt_length: Padded prompt length
+            max_new_tokens: Output budget of the call
+
+        Returns:
+            Keyword arguments for model.generate
+        """
+        key = (batch_size, self.cache_length(prompt_length, max_new_tokens))
+        self.stats["calls"] += 1
+        cache = self._caches.get(key)
+        if cache is not None:
+            cache.reset()
+            self._caches.move_to_end(key)
+            self.stats["cache_reuses"] += 1
+        else:
+            cache = StaticCache(config=self.model.config, max_cache_len=key[1])
+            self._caches[key] = cache
+            self.stats["cache_allocations"] += 1
+            if len(self._caches) > self.max_caches:
+                self._caches.popitem(last=False)
+                self.stats["cache_evictions"] += 1
+        return {"past_key_values": cache, "compile_config": self.compile_config}
+
+    @contextmanager
+    def kernel_cache(self) -> Iterator[None]:
+        """
+        Point inductor at compile_cache_dir while the with-block runs
+
+        Inductor reads its cache location from the environment when it
+        compiles, so generate calls run inside this block; the previous
+        value is restored afterwards.
+        """
+        previous = os.environ.get("TORCHINDUCTOR_CACHE_DIR")
+        os.environ["TORCHINDUCTOR_CACHE_DIR"] = str(self.compile_cache_dir)
+        try:
+            yield
+        finally:
+            if previous is None:
+                os.environ.pop("TORCHINDUCTOR_CACHE_DIR", None)
+            else:
+                os.environ["TORCHINDUCTOR_CACHE_DIR"] = previous
+
+    def get_stats(self) -> Dict:
+        """
+        Get static decoding statistics
+
+        Returns:
+            Dictionary with call, cache allocation, reuse and eviction
+            counts and the cache shapes currently allocated
+        """
+        stats = dict(self.stats)
+        stats["cache_shapes"] = [list(key) for key in self._caches]
+        return stats
@@ -0,0 +1,240 @@
+"""
+Repetition and runaway-generation stopping
+Stops looping or overlong rows of a batched generate call individually
+instead of letting them hold the whole batch to its worst-case budget
+"""
+
+import math
+from typing import Dict, List
+import logging
+
+import torch
+from transformers import LogitsProcessor, LogitsProcessorList, StoppingCriteria
+
+logger = logging.getLogger(__name__)
+
+
+class RunawayStoppingCriteria(StoppingCriteria):
+    """
+    Per-row stopping criteria for one generate call
+
+    A row is stopped when its generated tokens end in an n-gram that
+    already occurred max_repeats times (more often than in its prompt), or
+    when it reaches its own token budget while a longer budget of another
+    row keeps the batch running. Stopped rows are recorded with the reason and length.
+    The checks run on the whole batch at once, so no step waits on the device.
+    """
+
+    REASONS = ("runaway", "repetition")
+
+    def __init__(
+        self,
+        prompt_length: int,
+        budgets: List[int],
+        eos_token_id: int,
+        ngram_size: int = 4,
+        max_repeats: int = 4
+    ):
+        """
+        Initialize the criteria
+
+        Args:
+            prompt_length: Padded prompt length of the batch
+            budgets: Expected maximum output tokens of each row (the call's
+                max_new_tokens is the largest of them)
+            eos_token_id: End-of-sequence token id
+            ngram_size: Token n-gram size of the loop check
+            max_repeats: Occurrences of the trailing n-gram that count as a loop
+        """
+        self.prompt_length = prompt_length
+        self.budgets = budgets
+        self.max_new_tokens = max(budgets)
+        self.eos_token_id = eos_token_id
+        self.ngram_size = ngram_size
+        self.max_repeats = max_repeats
+        # Per-row stop reason (index into REASONS + 1, 0 while running) and length
+        self._reason = None
+        self._length = None
+        self._budgets = None
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        generated = input_ids[:, self.prompt_length:]
+        length = generated.shape[1]
+        if self._reason is None:
+            self._reason = torch.zeros(input_ids.shape[0], dtype=torch.long, device=input_ids.device)
+            self._length = torch.zeros_like(self._reason)
+            self._budgets = torch.tensor(self.budgets, device=input_ids.device)
+
+        # Rows that emitted EOS are finished (and padded) by generate itself
+        running = (self._reason == 0) & ~(generated == self.eos_token_id).any(dim=1)
+        runaway = running & (self._budgets <= length) if length < self.max_new_tokens else None
+        looping = running & self._looping(input_ids, generated)
+        if runaway is not None:
+            looping &= ~runaway
+            self._reason.masked_fill_(runaway, 1)
+        self._reason.masked_fill_(looping, 2)
+        newly_stopped = looping if runaway is None else looping | runaway
+        self._length.masked_fill_(newly_stopped, length)
+        return self._reason > 0
+
+    def _looping(self, input_ids: torch.Tensor, generated: torch.Tensor) -> torch.Tensor:
+        """Rows whose trailing n-gram repeats more often than their prompt allows"""
+        n = self.ngram_size
+        if generated.shape[1] < n * self.max_repeats:
+            return torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+        tail = generated[:, -n:]
+        looping = self._count(generated, tail) >= self.max_repeats
+        if self.prompt_length >= n:
+            looping &= self._count(input_ids[:, :self.prompt_length], tail) < self.max_repeats
+        return looping
+
+    @staticmethod
+    def _count(ids: torch.Tensor, ngrams: torch.Tensor) -> torch.Tensor:
+        """Count occurrences of each row's n-gram in that row of ids"""
+        windows = ids.unfold(1, ngrams.shape[1], 1)
+        return (windows == ngrams[:, None, :]).all(dim=-1).sum(dim=1)
+
+    @property
+    def stopped(self) -> Dict[int, tuple]:
+        """Stopped rows mapped to (reason, generated length)"""
+        if self._reason is None:
+            return {}
+        reasons = self._reason.tolist()
+        lengths = self._length.tolist()
+        return {
+            row: (self.REASONS[reason - 1], lengths[row])
+            for row, reason in enumerate(reasons) if reason
+        }
+
+
+class GeneratedRepetitionPenaltyLogitsProcessor(LogitsProcessor):
+    """
+    Repetition penalty over the generated tokens only
+
+    Unlike generate's repetition_penalty, tokens of the prompt are not
+    penalized, so numbers and formulas can still be copied from the source.
+    """
+
+    def __init__(self, penalty: float, prompt_length: int):
+        self.penalty = penalty
+        self.prompt_length = prompt_length
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        generated = input_ids[:, self.prompt_length:]
+        if generated.shape[1] == 0:
+            return scores
+        score = scores.gather(1, generated)
+        score = torch.where(score < 0, score * self.penalty, score / self.penalty)
+        return scores.scatter(1, generated, score)
+
+
+class RunawayGuard:
+    """
+    Builds per-call stopping criteria and tracks stops, retries and
+    tokens saved across calls
+    """
+
+    def __init__(
+        self,
+        ngram_size: int = 4,
+        max_repeats: int = 4,
+        retry_repetition_penalty: float = 1.3,
+        retry_budget_scale: float = 2.0
+    ):
+        """
+        Initialize the guard
+
+        Args:
+            ngram_size: Token n-gram size of the loop check
+            max_repeats: Occurrences of the trailing n-gram that count as a loop
+            retry_repetition_penalty: Repetition penalty on the generated
+                tokens used when a looping item is translated again
+            retry_budget_scale: Factor applied to the budget of an item that
+                was stopped at its budget when it is translated again
+        """
+        self.ngram_size = ngram_size
+        self.max_repeats = max_repeats
+        self.retry_repetition_penalty = retry_repetition_penalty
+        self.retry_budget_scale = retry_budget_scale
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset stop counters"""
+        self.stats = {
+            "repetition_stops": 0,
+            "runaway_stops": 0,
+            "tokens_saved": 0,
+            "retried": 0
+        }
+
+    def criteria(self, prompt_length: int, budgets: List[int], eos_token_id: int) -> RunawayStoppingCriteria:
+        """
+        Build the stopping criteria for one generate call
+
+        Args:
+            prompt_length: Padded prompt length of the batch
+            budgets: Expected maximum output tokens of each row
+            eos_token_id: End-of-sequence token id
+
+        Returns:
+            RunawayStoppingCriteria for the call
+        """
+        return RunawayStoppingCriteria(
+            prompt_length, budgets, eos_token_id,
+            ngram_size=self.ngram_size, max_repeats=self.max_repeats)
+
+    def record(self, criteria: RunawayStoppingCriteria) -> List[int]:
+        """
+        Account for the rows a finished call stopped
+
+        Tokens saved counts, per stopped row, the decode steps left until
+        the call's max_new_tokens.
+
+        Args:
+            criteria: Criteria used for the call
+
+        Returns:
+            Indices of the stopped rows (to be retried)
+        """
+        for reason, length in criteria.stopped.values():
+            self.stats[f"{reason}_stops"] += 1
+            self.stats["tokens_saved"] += criteria.max_new_tokens - length
+        return sorted(criteria.stopped)
+
+    def retry_budgets(self, criteria: RunawayStoppingCriteria, max_budget: int) -> Dict[int, int]:
+        """
+        Budgets to translate the stopped rows of a call again with
+
+        Looping rows keep their budget; rows stopped at their budget get a
+        larger one, and are not retried when it cannot grow past max_budget.
+
+        Args:
+            criteria: Criteria used for the call
+            max_budget: Largest budget a retry may use
+
+        Returns:
+            Mapping of row index to retry budget
+        """
+        budgets = {}
+        for row, (reason, _) in criteria.stopped.items():
+            budget = criteria.budgets[row]
+            if reason == "runaway":
+                budget = min(math.ceil(budget * self.retry_budget_scale), max_budget)
+                if budget <= criteria.budgets[row]:
+                    continue
+            budgets[row] = budget
+        return budgets
+
+    def retry_kwargs(self, prompt_length: int) -> dict:
+        """Generation arguments used to translate a stopped item again"""
+        return {"logits_processor": LogitsProcessorList([
+            GeneratedRepetitionPenaltyLogitsProcessor(self.retry_repetition_penalty, prompt_length)])}
+
+    def get_stats(self) -> Dict:
+        """
+        Get stop statistics accumulated since the last reset
+
+        Returns:
+            Dictionary with stops per reason, retries and tokens saved
+        """
+        return dict(self.stats)
@@ -0,0 +1,278 @@
+"""
+Persistent translation cache
+Content-addressed on-disk translation memory backed by SQLite
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+import logging
+
+from .segmentation import TextSegmenter
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize source text for cache keys (NFC, collapsed whitespace)"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+class TranslationCache:
+    """
+    SQLite-backed translation memory keyed by a hash of the normalized
+    source text, language pair, model path and generation parameters
+    """
+
+    def __init__(
+        self,
+        db_path: str = "cache/translations.sqlite",
+        max_entries: Optional[int] = None,
+        busy_timeout: float = 30.0
+    ):
+        """
+        Initialize the translation cache
+
+        Args:
+            db_path: Path to the SQLite database file
+            max_entries: Maximum number of cached translations; least recently
+                used entries are evicted beyond this (None for unbounded)
+            busy_timeout: Seconds to wait for another process's write lock
+                before failing
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.busy_timeout = busy_timeout
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=busy_timeout, check_same_thread=False)
+        # Worker processes share the file: WAL lets readers run alongside a
+        # writer, and the busy timeout makes writers queue instead of failing
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout * 1000)}")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_last_access ON translations (last_access)")
+        self._conn.commit()
+
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(text: str, source_lang: str, target_lang: str, context: Dict) -> str:
+        """
+        Build the cache key for a source text
+
+        Args:
+            text: Source text
+            source_lang: Source language code
+            target_lang: Target language code
+            context: Model path and generation parameters
+
+        Returns:
+            Hex SHA-256 digest
+        """
+        payload = json.dumps(
+            {
+                "text": normalize_text(text),
+                "source_lang": source_lang,
+                "target_lang": target_lang,
+                "context": context
+            },
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Look up several keys at once
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Mapping of found keys to their translations
+        """
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(unique_keys), 500):
+                chunk = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, translation FROM translations WHERE key IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE translations SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+        hits = sum(1 for key in keys if key in found)
+        self.stats["hits"] += hits
+        self.stats["misses"] += len(keys) - hits
+        return found
+
+    def put_many(self, entries: Dict[str, tuple]):
+        """
+        Store several translations at once
+
+        Args:
+            entries: Mapping of key to (source text, translation)
+        """
+        if not entries:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations (key, source, translation, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                [(key, source, translation, now)
+                 for key, (source, translation) in entries.items()]
+            )
+            self._conn.commit()
+            self.stats["writes"] += len(entries)
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries beyond max_entries (lock held)"""
+        if self.max_entries is None:
+            return
+
+        excess = self._count() - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM translations WHERE key IN "
+                "(SELECT key FROM translations ORDER BY last_access ASC LIMIT ?)",
+                (excess,)
+            )
+            self._conn.commit()
+            self.stats["evictions"] += excess
+
+    def _count(self) -> int:
+        """Number of stored entries"""
+        return self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def warm_from_directory(
+        self,
+        directory: str,
+        source_lang: str,
+        target_lang: str,
+        context: Union[Dict, Callable[[str], Dict]],
+        segmenter: Optional[TextSegmenter] = None
+    ) -> int:
+        """
+        Pre-warm the cache from *_translated.json files written by TranslationPipeline
+
+        Every list field "<name>" with a matching "<name>_<target_lang>" list
+        is read as aligned source/translation pairs. The context must match
+        the settings that produced those files; pass a callable to give each
+        field its own context (fields can be decoded with different settings).
+
+        A translator with a segmenter looks up segments, not whole texts, so
+        with a segmenter both sides are segmented and paired segment by
+        segment; pairs whose sides split into different numbers of segments
+        cannot be aligned and are skipped.
+
+        Args:
+            directory: Directory to search recursively
+            source_lang: Source language code of the files
+            target_lang: Target language code of the files
+            context: Model path and generation parameters of the files, or a
+                callable returning them for a source field name
+            segmenter: Segmenter of the translator the cache serves
+
+        Returns:
+            Number of translations loaded
+        """
+        entries = {}
+        unaligned = 0
+        suffix = f"_{target_lang}"
+        for path in sorted(Path(directory).rglob("*_translated.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Skipping unreadable translation file {path}: {e}")
+                continue
+
+            if not isinstance(data, dict):
+                continue
+
+            for field, translations in data.items():
+                if not field.endswith(suffix):
+                    continue
+                source_field = field[:-len(suffix)]
+                sources = data.get(source_field)
+                if not isinstance(sources, list) or not isinstance(translations, list):
+                    continue
+                field_context = context(source_field) if callable(context) else context
+                for source, translation in zip(sources, translations):
+                    if not (isinstance(source, str) and isinstance(translation, str) and translation.strip()):
+                        continue
+                    pairs = [(source, translation)]
+                    if segmenter is not None:
+                        source_segments = segmenter.segment(source)[0]
+                        translated_segments = segmenter.segment(translation)[0]
+                        if len(source_segments) != len(translated_segments):
+                            unaligned += 1
+                            continue
+                        pairs = zip(source_segments, translated_segments)
+                    for source_unit, translated_unit in pairs:
+                        key = self.make_key(source_unit, source_lang, target_lang, field_context)
+                        entries[key] = (source_unit, translated_unit)
+
+        self.put_many(entries)
+        logger.info(f"Pre-warmed translation cache with {len(entries)} entries from {directory}"
+                    + (f" ({unaligned} texts with unaligned segments skipped)" if unaligned else ""))
+        return len(entries)
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with hit/miss/write/eviction counters, hit rate and size
+        """
+        stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        with self._lock:
+            stats["entries"] = self._count()
+        stats["max_entries"] = self.max_entries
+        return stats
+
+    def __getstate__(self):
+        """Pickle as a path so worker processes open their own connection"""
+        return {"db_path": str(self.db_path), "max_entries": self.max_entries, "busy_timeout": self.busy_timeout}
+
+    def __setstate__(self, state):
+        self.__init__(state["db_path"], max_entries=state["max_entries"], busy_timeout=state["busy_timeout"])
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
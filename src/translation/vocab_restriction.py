@@ -0,0 +1,214 @@
+"""
+Vocabulary-restricted output head
+Computes output logits only for the tokens a Vietnamese translation of
+math/science text can use (Latin and Vietnamese letters, digits, math
+symbols, special tokens) plus the tokens of the sources being
+translated; every other token gets -inf
+"""
+
+import time
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+import logging
+
+import torch
+import torch.nn.functional as F
+
+logger = logging.getLogger(__name__)
+
+# Latin, Vietnamese, Greek, punctuation and mathematical code point ranges
+ALLOWED_RANGES = [
+    (0x0009, 0x000D),    # tab, newlines
+    (0x0020, 0x007E),    # ASCII
+    (0x00A0, 0x024F),    # Latin-1 supplement, Latin extended A/B (đ, ơ, ư)
+    (0x0300, 0x036F),    # combining diacritics
+    (0x0370, 0x03FF),    # Greek
+    (0x1E00, 0x1EFF),    # Latin extended additional (ạ, ế, ữ, ...)
+    (0x2000, 0x209F),    # general punctuation, super- and subscripts
+    (0x2100, 0x23FF),    # letterlike, number forms, arrows, math operators, technical
+    (0x25A0, 0x25FF),    # geometric shapes
+    (0x27C0, 0x27EF),    # misc math symbols A
+    (0x2980, 0x2AFF),    # misc math symbols B, supplemental operators
+    (0x1D400, 0x1D7FF),  # math alphanumerics
+    (0xFFFD, 0xFFFD),    # partial UTF-8 byte tokens decode to the replacement character
+]
+
+
+def is_allowed_char(char: str) -> bool:
+    """Whether a character may appear in a Vietnamese math/science translation"""
+    code = ord(char)
+    if any(low <= code <= high for low, high in ALLOWED_RANGES):
+        return True
+    return unicodedata.category(char) == "Sm"
+
+
+def build_allowed_token_ids(tokenizer, vocab_size: Optional[int] = None) -> List[int]:
+    """
+    Ids of the tokens made only of allowed characters, plus special tokens
+
+    Args:
+        tokenizer: Tokenizer of the model
+        vocab_size: Rows of the model's output head (default: len(tokenizer))
+
+    Returns:
+        Sorted token ids
+    """
+    vocab_size = vocab_size or len(tokenizer)
+    start_time = time.perf_counter()
+    pieces = tokenizer.batch_decode([[i] for i in range(min(vocab_size, len(tokenizer)))])
+    allowed = {i for i, piece in enumerate(pieces) if all(is_allowed_char(c) for c in piece)}
+    allowed.update(i for i in tokenizer.all_special_ids if i < vocab_size)
+    logger.info(f"Allowed {len(allowed)} of {vocab_size} output tokens "
+                f"in {time.perf_counter() - start_time:.2f}s")
+    return sorted(allowed)
+
+
+def _select_rows(weight: torch.Tensor, ids: torch.Tensor) -> torch.Tensor:
+    """Rows of a float or quantized weight, kept in the weight's own format"""
+    if not weight.is_quantized or weight.qscheme() == torch.per_tensor_affine:
+        return weight.index_select(0, ids)
+    # Per-channel quantized tensors only support slicing through their integers
+    return torch._make_per_channel_quantized_tensor(
+        weight.int_repr().index_select(0, ids),
+        weight.q_per_channel_scales().index_select(0, ids),
+        weight.q_per_channel_zero_points().index_select(0, ids),
+        0
+    )
+
+
+class RestrictedLMHead(torch.nn.Module):
+    """
+    Output head evaluating a subset of the vocabulary rows
+
+    The base rows are sliced once and the rows of extra (source) tokens
+    per generate call, in the head's own format: a dynamically quantized
+    head stays int8. By default logits keep the full vocabulary layout, so
+    generate's ids need no remapping: allowed rows hold the head's logits,
+    the others -inf. Callers that only need the best token can set compact
+    to get the allowed columns alone and map them back with token_ids.
+    """
+
+    def __init__(self, lm_head: torch.nn.Module, allowed_ids: List[int]):
+        super().__init__()
+        self.quantized = isinstance(lm_head, torch.ao.nn.quantized.dynamic.Linear)
+        # Held outside the module tree: the full head stays owned by the model
+        self._source = [lm_head]
+        weight, _ = self._source_weight_bias()
+        self.vocab_size = weight.shape[0]
+        self.device = weight.device
+        self.compact = False
+
+        self.base_ids = torch.tensor(allowed_ids, dtype=torch.long, device=self.device)
+        self._base_set = set(allowed_ids)
+        self.base_head = self._slice(self.base_ids)
+        self.extra_ids = None
+        self.extra_head = None
+        self.token_ids = self.base_ids
+
+    def _source_weight_bias(self):
+        """Weight and bias of the full head (unpacked if quantized)"""
+        head = self._source[0]
+        if self.quantized:
+            return head.weight(), head.bias()
+        return head.weight.detach(), head.bias.detach() if head.bias is not None else None
+
+    def _slice(self, ids: torch.Tensor):
+        """A head over the given rows: an int8 Linear or float (weight, bias)"""
+        weight, bias = self._source_weight_bias()
+        weight_rows = _select_rows(weight, ids)
+        bias_rows = bias.index_select(0, ids) if bias is not None else None
+        if not self.quantized:
+            return weight_rows, bias_rows
+        head = torch.ao.nn.quantized.dynamic.Linear(
+            weight.shape[1], len(ids), dtype=self._source[0].weight().dtype)
+        head.set_weight_bias(weight_rows, bias_rows)
+        return head
+
+    def set_extra_ids(self, ids: Iterable[int]):
+        """Also evaluate these rows (e.g. the tokens of the sources being translated)"""
+        extra = sorted({i for i in ids if 0 <= i < self.vocab_size} - self._base_set)
+        if not extra:
+            self.extra_ids = self.extra_head = None
+            self.token_ids = self.base_ids
+            return
+        self.extra_ids = torch.tensor(extra, dtype=torch.long, device=self.device)
+        self.extra_head = self._slice(self.extra_ids)
+        self.token_ids = torch.cat([self.base_ids, self.extra_ids])
+
+    def _apply(self, head, hidden_states: torch.Tensor) -> torch.Tensor:
+        """Logits of one sliced head"""
+        if self.quantized:
+            return head(hidden_states.float())
+        weight, bias = head
+        return F.linear(hidden_states.to(weight.dtype), weight, bias)
+
+    def forward(self, hidden_states: torch.Tensor) -> torch.Tensor:
+        logits = self._apply(self.base_head, hidden_states)
+        extra = self._apply(self.extra_head, hidden_states) if self.extra_head is not None else None
+        if self.compact:
+            return logits if extra is None else torch.cat([logits, extra], dim=-1)
+
+        full = logits.new_full((*logits.shape[:-1], self.vocab_size), float("-inf"))
+        last = full.dim() - 1
+        full.index_copy_(last, self.base_ids, logits)
+        if extra is not None:
+            full.index_copy_(last, self.extra_ids, extra)
+        return full
+
+
+class VocabularyRestriction:
+    """
+    Installs a RestrictedLMHead on a model and keeps its source tokens current
+    """
+
+    def __init__(self, model, tokenizer, allowed_ids: Optional[List[int]] = None):
+        """
+        Replace the model's output head
+
+        Args:
+            model: Loaded causal LM
+            tokenizer: Its tokenizer
+            allowed_ids: Base token ids (default: build_allowed_token_ids)
+        """
+        self.model = model
+        self.tokenizer = tokenizer
+        self.original_head = model.get_output_embeddings()
+        vocab_size = model.config.get_text_config().vocab_size
+        if allowed_ids is None:
+            allowed_ids = build_allowed_token_ids(tokenizer, vocab_size)
+        self.head = RestrictedLMHead(self.original_head, allowed_ids)
+        self.install()
+        self.stats = {"calls": 0, "extra_tokens": 0}
+
+    def set_source_texts(self, texts: List[str]):
+        """Allow the tokens of the texts about to be translated"""
+        encoded = self.tokenizer(texts, add_special_tokens=False)["input_ids"]
+        ids = {i for row in encoded for i in row}
+        self.head.set_extra_ids(ids)
+        self.stats["calls"] += 1
+        self.stats["extra_tokens"] += len(self.head.extra_ids) if self.head.extra_ids is not None else 0
+
+    def install(self):
+        """Evaluate the restricted output head"""
+        self.model.set_output_embeddings(self.head)
+
+    def remove(self):
+        """Restore the full output head"""
+        self.model.set_output_embeddings(self.original_head)
+
+    def get_stats(self) -> Dict:
+        """
+        Get vocabulary restriction statistics
+
+        Returns:
+            Dictionary with the base allowed and full vocabulary sizes,
+            the fraction of head rows evaluated and the mean number of
+            extra source tokens per call
+        """
+        allowed = len(self.head.base_ids)
+        stats = dict(self.stats)
+        stats["allowed_tokens"] = allowed
+        stats["vocab_size"] = self.head.vocab_size
+        stats["allowed_fraction"] = allowed / self.head.vocab_size
+        stats["mean_extra_tokens"] = stats["extra_tokens"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
@@ -2,5 +2,6 @@
 
 from .logging_config import setup_logging
 from .translation_utils import TranslationPipeline, save_results, load_results
+from .work_queue import LeaseWorkQueue
 
-__all__ = ['setup_logging', 'TranslationPipeline', 'save_results', 'load_results']
\ No newline at end of file
+__all__ = ['setup_logging', 'TranslationPipeline', 'save_results', 'load_results', 'LeaseWorkQueue']
\ No newline at end of file
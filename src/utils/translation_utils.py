@@ -3,7 +3,9 @@ Translation utilities and pipeline management
 """
 
 import json
+import os
 import pickle
+import time
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 import logging
@@ -74,12 +76,14 @@ class TranslationPipeline:
         self.translation_stats["start_time"] = datetime.now()
         
         try:
-            # Step 1: Load dataset
+            # Step 1: Load dataset (overlaps a background model load)
             logger.info(f"Loading dataset: {dataset_name}")
+            phase_start = time.perf_counter()
             if sample_size:
                 dataset_dict = self.dataset_loader.get_sample_data(sample_size)
             else:
                 dataset_dict = self.dataset_loader.load_dataset(split)
+            logger.info(f"Startup: dataset loaded in {time.perf_counter() - phase_start:.2f}s")
             
             self.translation_stats["total_items"] = len(dataset_dict.get("questions", dataset_dict.get("problems", [])))
             
@@ -90,6 +94,15 @@ class TranslationPipeline:
             logger.info(f"Translating fields: {fields_to_translate}")
             self.translation_stats["fields_translated"] = fields_to_translate
             
+            # Tokenize the work units while the model may still be loading
+            if hasattr(self.translator, "pretokenize"):
+                phase_start = time.perf_counter()
+                for field in fields_to_translate:
+                    texts = dataset_dict.get(field)
+                    if texts:
+                        self.translator.pretokenize([texts] if isinstance(texts, str) else list(texts))
+                logger.info(f"Startup: work units pretokenized in {time.perf_counter() - phase_start:.2f}s")
+            
             # Step 3: Translate each field
             for field in fields_to_translate:
                 if field in dataset_dict:
@@ -136,16 +149,136 @@ class TranslationPipeline:
             self.translation_stats["end_time"] = datetime.now()
             raise
     
+    def run_queue_pipeline(
+        self,
+        queue,
+        dataset_name: str,
+        split: str = "train",
+        fields_to_translate: Optional[List[str]] = None,
+        sample_size: Optional[int] = None,
+        chunk_size: int = 16,
+        poll_interval: float = 5.0
+    ) -> Dict:
+        """
+        Translate a dataset as one of several workers sharing a work queue
+
+        Every worker runs the same call: the worker that claims the load
+        reads and enqueues the dataset while the others wait for it, all of
+        them lease and translate chunks (renewing their leases) until the
+        queue is drained, and the worker that claims the merge writes the
+        usual translated dataset and report.
+
+        Args:
+            queue: LeaseWorkQueue on storage shared by all workers
+            dataset_name: Name of dataset for output files
+            split: Dataset split to load
+            fields_to_translate: List of fields to translate (None for all)
+            sample_size: Limit to N samples (None for all)
+            chunk_size: Records per queued chunk
+            poll_interval: Seconds to wait while other workers hold the
+                remaining chunks (their leases may still expire)
+
+        Returns:
+            Dictionary with statistics (this worker's records, or the whole
+            dataset's for the merging worker), the worker's queue statistics
+            and, for the merging worker, the translated dataset and output path
+        """
+        self.translation_stats["start_time"] = datetime.now()
+
+        while not queue.is_enqueued():
+            if not queue.claim_enqueue():
+                time.sleep(poll_interval)
+                continue
+            logger.info(f"Loading dataset: {dataset_name}")
+            if sample_size:
+                dataset_dict = self.dataset_loader.get_sample_data(sample_size)
+            else:
+                dataset_dict = self.dataset_loader.load_dataset(split)
+            if fields_to_translate is None:
+                fields_to_translate = self.dataset_loader.get_translatable_fields()
+            queue.enqueue(dataset_dict, fields_to_translate, chunk_size=chunk_size)
+
+        while True:
+            chunk = queue.lease()
+            if chunk is None:
+                if queue.is_finished():
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            logger.info(f"Translating {chunk.field} chunk {chunk.chunk_id} ({len(chunk.texts)} records)")
+            try:
+                with queue.heartbeat(chunk):
+                    translations = self.translator.translate_batch(
+                        chunk.texts, show_progress=False, field_name=chunk.field)
+            except Exception as e:
+                logger.error(f"Error translating {chunk.field} chunk {chunk.chunk_id}: {e}")
+                queue.release(chunk, error=repr(e))
+                # A released chunk is retried unless this was its last attempt
+                if chunk.attempts >= queue.max_attempts:
+                    self.translation_stats["failed_translations"] += len(chunk.texts)
+                continue
+            if queue.commit(chunk, translations):
+                self.translation_stats["successful_translations"] += len(chunk.texts)
+
+        results = {
+            "translated_dataset": None,
+            "statistics": self.translation_stats,
+            "queue": queue.get_stats(),
+            "output_path": None
+        }
+        if queue.claim_merge():
+            dataset_dict = queue.merge()
+            records = queue.record_counts()
+            self.translation_stats["successful_translations"] = records["done"]
+            self.translation_stats["failed_translations"] = records["failed"]
+            self.translation_stats["total_items"] = len(
+                dataset_dict.get("questions", dataset_dict.get("problems", [])))
+            self.translation_stats["fields_translated"] = [
+                key[:-len("_vi")] for key in dataset_dict if key.endswith("_vi")]
+
+            # Write next to the final name first; other workers may read the directory
+            output_path = self.output_dir / f"{dataset_name}_translated.json"
+            partial_path = output_path.with_suffix(".json.partial")
+            save_results(dataset_dict, str(partial_path), format="json")
+            os.replace(partial_path, output_path)
+            self._generate_summary_report(dataset_name, dataset_dict)
+
+            results["translated_dataset"] = dataset_dict
+            results["output_path"] = str(output_path)
+
+        self.translation_stats["end_time"] = datetime.now()
+        return results
+
     def _generate_summary_report(self, dataset_name: str, dataset_dict: Dict):
         """Generate a summary report of the translation"""
+        model_info = self.translator.get_model_info()
         report = {
             "dataset_name": dataset_name,
             "timestamp": datetime.now().isoformat(),
             "statistics": self.translation_stats,
             "sample_translations": self._get_sample_translations(dataset_dict),
-            "model_info": self.translator.get_model_info()
+            "model_info": model_info
         }
         
+        # Two-tier decoding: how many items needed the expensive setting
+        adaptive = model_info.get("adaptive_decoding")
+        if adaptive:
+            report["adaptive_decoding"] = {
+                "items": adaptive["items"],
+                "escalated": adaptive["escalated"],
+                "escalation_rate": adaptive["escalation_rate"],
+                "compute_saved": adaptive["compute_saved"],
+                "flag_reasons": {
+                    reason: count for reason, count in adaptive["validator"].items()
+                    if reason not in ("checked", "flagged", "flag_rate")
+                }
+            }
+            logger.info(
+                f"Escalated {adaptive['escalated']} of {adaptive['items']} items "
+                f"({adaptive['escalation_rate']:.1%}); estimated decode compute saved: "
+                f"{adaptive['compute_saved']:.1%}")
+        
         report_path = self.output_dir / f"{dataset_name}_translation_report.json"
         save_results(report, str(report_path))
         logger.info(f"Generated translation report: {report_path}")
@@ -188,7 +321,7 @@ def save_results(data: Any, output_path: str, format: str = None):
     try:
         if format in ['.json', 'json']:
             with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+                json.dump(data, f, ensure_ascii=False, indent=2, default=str)
         
         elif format in ['.pkl', '.pickle', 'pickle']:
             with open(output_path, 'wb') as f:
@@ -0,0 +1,426 @@
+"""
+File-backed lease work queue
+Durable SQLite queue of record chunks on shared storage, so several
+machines can translate one dataset without a coordinator service
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Chunk(NamedTuple):
+    """A leased run of records of one field"""
+    field: str
+    chunk_id: int
+    texts: List[str]
+    lease_id: str
+    attempts: int
+
+
+class LeaseWorkQueue:
+    """
+    Work queue of record chunks leased to workers with a timeout
+
+    One worker claims the right to load the dataset and enqueues it,
+    splitting each field into chunks. A worker leases the oldest pending chunk (or one whose lease
+    expired because its worker crashed), translates it and commits the
+    result, renewing the lease while it works; commits of a lease that
+    expired and was handed to another worker are rejected. Chunks that fail max_attempts times are marked
+    failed. Every state change is a short IMMEDIATE transaction, so the
+    database file can live on storage shared by several machines (lease
+    expiry compares wall clocks, which must roughly agree).
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        lease_timeout: float = 600.0,
+        max_attempts: int = 3,
+        worker_id: Optional[str] = None,
+        busy_timeout: float = 60.0
+    ):
+        """
+        Open (or create) the queue
+
+        Args:
+            db_path: Path to the SQLite database file
+            lease_timeout: Seconds a leased chunk stays reserved before
+                another worker may take it over
+            max_attempts: Leases of a chunk before it is marked failed
+            worker_id: Name of this worker (default: host name and pid)
+            busy_timeout: Seconds to wait for another worker's lock
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+
+        # Autocommit mode; transactions are opened explicitly
+        self._conn = sqlite3.connect(str(self.db_path), timeout=busy_timeout, isolation_level=None)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS dataset (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                data TEXT NOT NULL,
+                fields TEXT NOT NULL,
+                created REAL NOT NULL,
+                merged_by TEXT
+            );
+            CREATE TABLE IF NOT EXISTS loader (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                worker TEXT NOT NULL,
+                expires REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                field TEXT NOT NULL,
+                chunk_id INTEGER NOT NULL,
+                start INTEGER NOT NULL,
+                texts TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_id TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                PRIMARY KEY (field, chunk_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunk_status ON chunks (status, lease_expires);
+            """
+        )
+
+        self.stats = {"leased": 0, "committed": 0, "released": 0, "rejected": 0}
+
+    def _transaction(self):
+        """Start a write transaction, taking the database lock up front"""
+        self._conn.execute("BEGIN IMMEDIATE")
+
+    def claim_enqueue(self) -> bool:
+        """
+        Claim the loading and enqueueing of the dataset
+
+        Only the claiming worker loads the dataset; the others wait for
+        is_enqueued(). A claim expires after lease_timeout, so another
+        worker takes over if the loader crashed.
+
+        Returns:
+            True if this worker should load and enqueue the dataset
+        """
+        now = time.time()
+        self._transaction()
+        try:
+            if self._conn.execute("SELECT 1 FROM dataset").fetchone():
+                self._conn.execute("COMMIT")
+                return False
+            claim = self._conn.execute("SELECT worker, expires FROM loader").fetchone()
+            if claim is not None and claim[0] != self.worker_id and claim[1] >= now:
+                self._conn.execute("COMMIT")
+                return False
+            self._conn.execute(
+                "INSERT OR REPLACE INTO loader (id, worker, expires) VALUES (0, ?, ?)",
+                (self.worker_id, now + self.lease_timeout)
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def enqueue(self, dataset_dict: Dict, fields: List[str], chunk_size: int = 16) -> bool:
+        """
+        Store the dataset and its chunks, unless a dataset was already enqueued
+
+        Args:
+            dataset_dict: Dataset dictionary of parallel lists
+            fields: Fields to translate (missing fields are skipped)
+            chunk_size: Records per chunk
+
+        Returns:
+            True if this call enqueued the dataset, False if it was already there
+        """
+        self._transaction()
+        try:
+            if self._conn.execute("SELECT 1 FROM dataset").fetchone():
+                self._conn.execute("ROLLBACK")
+                return False
+
+            fields = [field for field in fields if field in dataset_dict]
+            self._conn.execute(
+                "INSERT INTO dataset (id, data, fields, created) VALUES (0, ?, ?, ?)",
+                (json.dumps(dataset_dict, ensure_ascii=False), json.dumps(fields), time.time())
+            )
+            rows = []
+            for field in fields:
+                texts = dataset_dict[field]
+                if isinstance(texts, str):
+                    texts = [texts]
+                for chunk_id, start in enumerate(range(0, len(texts), chunk_size)):
+                    rows.append((field, chunk_id, start, json.dumps(
+                        texts[start:start + chunk_size], ensure_ascii=False)))
+            self._conn.executemany(
+                "INSERT INTO chunks (field, chunk_id, start, texts) VALUES (?, ?, ?, ?)", rows)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+        logger.info(f"Enqueued {len(rows)} chunks of fields {fields} in {self.db_path}")
+        return True
+
+    def is_enqueued(self) -> bool:
+        """Check whether a dataset has been enqueued"""
+        return self._conn.execute("SELECT 1 FROM dataset").fetchone() is not None
+
+    def lease(self) -> Optional[Chunk]:
+        """
+        Lease the next pending or abandoned chunk
+
+        Returns:
+            The leased chunk, or None if no chunk is available right now
+            (see is_finished() to tell a drained queue from one whose
+            remaining chunks are leased by other workers)
+        """
+        now = time.time()
+        self._transaction()
+        try:
+            # Abandoned chunks that used up their attempts are given up
+            self._conn.execute(
+                "UPDATE chunks SET status = 'failed', error = 'lease expired' "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts)
+            )
+            row = self._conn.execute(
+                "SELECT field, chunk_id, texts, attempts FROM chunks "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY attempts, rowid LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                self._conn.execute("COMMIT")
+                return None
+
+            field, chunk_id, texts, attempts = row
+            lease_id = uuid.uuid4().hex
+            self._conn.execute(
+                "UPDATE chunks SET status = 'leased', worker = ?, lease_id = ?, "
+                "lease_expires = ?, attempts = attempts + 1 WHERE field = ? AND chunk_id = ?",
+                (self.worker_id, lease_id, now + self.lease_timeout, field, chunk_id)
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+        self.stats["leased"] += 1
+        return Chunk(field, chunk_id, json.loads(texts), lease_id, attempts + 1)
+
+    def _update_lease(self, chunk: Chunk, assignments: str, params: tuple) -> bool:
+        """Apply an update to a chunk only while this lease still holds it"""
+        cursor = self._conn.execute(
+            f"UPDATE chunks SET {assignments} "
+            "WHERE field = ? AND chunk_id = ? AND status = 'leased' AND lease_id = ?",
+            params + (chunk.field, chunk.chunk_id, chunk.lease_id)
+        )
+        return cursor.rowcount == 1
+
+    def renew(self, chunk: Chunk) -> bool:
+        """
+        Extend a held lease by lease_timeout from now
+
+        Args:
+            chunk: Chunk returned by lease()
+
+        Returns:
+            True if renewed, False if the lease was already lost
+        """
+        return self._update_lease(chunk, "lease_expires = ?", (time.time() + self.lease_timeout,))
+
+    @contextmanager
+    def heartbeat(self, chunk: Chunk, interval: Optional[float] = None) -> Iterator[None]:
+        """
+        Keep renewing a lease while the body of the with-block runs
+
+        Renewals run in a background thread on their own connection, so a
+        chunk that takes longer than lease_timeout to translate is not
+        handed to another worker while this one is still alive.
+
+        Args:
+            chunk: Chunk returned by lease()
+            interval: Seconds between renewals (default: a third of lease_timeout)
+        """
+        interval = interval or self.lease_timeout / 3
+        done = threading.Event()
+
+        def renew_until_done():
+            queue = LeaseWorkQueue(
+                str(self.db_path), lease_timeout=self.lease_timeout, worker_id=self.worker_id)
+            try:
+                while not done.wait(interval):
+                    if not queue.renew(chunk):
+                        logger.warning(
+                            f"Lease on {chunk.field} chunk {chunk.chunk_id} was lost before renewal")
+                        break
+            finally:
+                queue.close()
+
+        thread = threading.Thread(target=renew_until_done, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+
+    def commit(self, chunk: Chunk, translations: List[str]) -> bool:
+        """
+        Store the translations of a leased chunk
+
+        Args:
+            chunk: Chunk returned by lease()
+            translations: One translation per text of the chunk
+
+        Returns:
+            True if stored, False if the lease was lost to another worker
+        """
+        if len(translations) != len(chunk.texts):
+            raise ValueError(
+                f"Expected {len(chunk.texts)} translations, got {len(translations)}")
+        committed = self._update_lease(
+            chunk, "status = 'done', result = ?, error = NULL",
+            (json.dumps(translations, ensure_ascii=False),))
+        if committed:
+            self.stats["committed"] += 1
+        else:
+            self.stats["rejected"] += 1
+            logger.warning(
+                f"Lease on {chunk.field} chunk {chunk.chunk_id} was lost; discarding result")
+        return committed
+
+    def release(self, chunk: Chunk, error: Optional[str] = None) -> bool:
+        """
+        Give a leased chunk back after a failure
+
+        Args:
+            chunk: Chunk returned by lease()
+            error: Failure description kept with the chunk
+
+        Returns:
+            True if released, False if the lease was already lost
+        """
+        self._transaction()
+        try:
+            attempts = self._conn.execute(
+                "SELECT attempts FROM chunks WHERE field = ? AND chunk_id = ?",
+                (chunk.field, chunk.chunk_id)
+            ).fetchone()[0]
+            status = "failed" if attempts >= self.max_attempts else "pending"
+            released = self._update_lease(
+                chunk, "status = ?, lease_id = NULL, lease_expires = NULL, error = ?",
+                (status, error))
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        if released:
+            self.stats["released"] += 1
+        return released
+
+    def progress(self) -> Dict[str, int]:
+        """
+        Count chunks per status
+
+        Returns:
+            Dictionary with pending, leased, done, failed and total counts
+        """
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        for status, count in self._conn.execute(
+                "SELECT status, COUNT(*) FROM chunks GROUP BY status"):
+            counts[status] = count
+        counts["total"] = sum(counts.values())
+        return counts
+
+    def record_counts(self) -> Dict[str, int]:
+        """
+        Count records per chunk status
+
+        Returns:
+            Dictionary with pending, leased, done and failed record counts
+        """
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        for status, texts in self._conn.execute("SELECT status, texts FROM chunks"):
+            counts[status] += len(json.loads(texts))
+        return counts
+
+    def is_finished(self) -> bool:
+        """Check whether every chunk is done or failed"""
+        counts = self.progress()
+        return self.is_enqueued() and counts["pending"] == 0 and counts["leased"] == 0
+
+    def merge(self, suffix: str = "_vi") -> Dict:
+        """
+        Assemble the translated dataset from the committed chunks
+
+        Args:
+            suffix: Suffix of the translated fields
+
+        Returns:
+            The enqueued dataset with a translated copy of every queued
+            field (failed chunks are left as empty strings)
+        """
+        if not self.is_finished():
+            raise RuntimeError(f"Work queue {self.db_path} still has unfinished chunks")
+
+        data, fields = self._conn.execute("SELECT data, fields FROM dataset").fetchone()
+        dataset_dict = json.loads(data)
+        for field in json.loads(fields):
+            source = dataset_dict[field]
+            translated = [""] * (1 if isinstance(source, str) else len(source))
+            rows = self._conn.execute(
+                "SELECT start, texts, result FROM chunks WHERE field = ?", (field,))
+            for start, texts, result in rows:
+                if result is not None:
+                    translated[start:start + len(json.loads(texts))] = json.loads(result)
+            dataset_dict[f"{field}{suffix}"] = translated
+        return dataset_dict
+
+    def claim_merge(self) -> bool:
+        """
+        Claim the final merge once the queue is finished
+
+        Returns:
+            True for exactly one caller across all workers
+        """
+        if not self.is_finished():
+            return False
+        cursor = self._conn.execute(
+            "UPDATE dataset SET merged_by = ? WHERE merged_by IS NULL", (self.worker_id,))
+        return cursor.rowcount == 1
+
+    def get_stats(self) -> Dict:
+        """
+        Get this worker's queue statistics and the global chunk counts
+
+        Returns:
+            Dictionary with leased/committed/released/rejected counts and
+            per-status chunk counts
+        """
+        stats = dict(self.stats)
+        stats["worker_id"] = self.worker_id
+        stats["chunks"] = self.progress()
+        return stats
+
+    def close(self):
+        """Close the database connection"""
+        self._conn.close()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test the asyncio translation API and its micro-batching
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.hunyuan_translator import HunyuanTranslator
+from translation.micro_batching import MicroBatcher
+
+
+class RecordingTranslator:
+    """Stand-in translator that records the batches it receives"""
+
+    def __init__(self):
+        self.batches = []
+        self.release = threading.Event()
+
+    def translate_batch(self, texts, source_lang="en", target_lang="vi",
+                        show_progress=True, field_name=None):
+        self.release.wait(timeout=5)
+        self.batches.append(list(texts))
+        return [f"{target_lang}:{text}" for text in texts]
+
+
+def test_identical_inflight_texts_are_coalesced():
+    """Duplicates share one future and batches group by language pair"""
+    translator = RecordingTranslator()
+    batcher = MicroBatcher(translator, max_batch_size=8, max_wait=0.5)
+
+    futures = [batcher.submit(text) for text in ["a", "b", "a", "c", "a"]]
+    other = batcher.submit("a", target_lang="fr")
+    translator.release.set()
+
+    assert [future.result(timeout=5) for future in futures] == ["vi:a", "vi:b", "vi:a", "vi:c", "vi:a"]
+    assert other.result(timeout=5) == "fr:a"
+    assert sorted(map(sorted, translator.batches)) == [["a"], ["a", "b", "c"]]
+    assert batcher.get_stats()["coalesced"] == 2
+    batcher.close()
+
+
+def test_batch_dispatches_when_full():
+    """A full batch does not wait for max_wait"""
+    translator = RecordingTranslator()
+    translator.release.set()
+    batcher = MicroBatcher(translator, max_batch_size=2, max_wait=30)
+
+    start = time.monotonic()
+    futures = [batcher.submit(text) for text in ["a", "b"]]
+    assert [future.result(timeout=5) for future in futures] == ["vi:a", "vi:b"]
+    assert time.monotonic() - start < 5
+    batcher.close()
+
+
+def test_concurrent_async_calls_match_sync(tiny_model_path):
+    """Concurrent async callers get the same translations as translate_batch"""
+    texts = ["The answer is 42.", "Hello world", "", "The answer is 42.", "Find x."]
+    translator = HunyuanTranslator(
+        model_name=tiny_model_path, device="cpu", batch_size=4, max_length=32)
+    expected = translator.translate_batch(texts, show_progress=False)
+
+    async def run():
+        single = [translator.translate_async(text) for text in texts]
+        many = translator.translate_many_async(texts)
+        return await asyncio.gather(*single), await many
+
+    single, many = asyncio.run(run())
+    stats = translator.get_model_info()["micro_batching"]
+    translator.close_async()
+
+    assert single == expected
+    assert many == expected
+    assert stats["batches"] < stats["requests"]
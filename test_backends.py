@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test the OpenAI-compatible HTTP backend against a local stub server
+"""
+
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.backends import InferenceBackend, OpenAICompatibleBackend
+from translation.hunyuan_translator import HunyuanTranslator
+from translation.decoding_policy import DecodingPolicy
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """chat/completions stub that upper-cases the segment to translate"""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.payloads.append(body)
+            fail = self.server.failures > 0
+            self.server.failures -= 1
+        if fail:
+            self._send(503, {"error": "busy"})
+            return
+
+        text = body["messages"][-1]["content"].split("\n\n", 1)[1]
+        self._send(200, {
+            "choices": [{
+                "message": {"role": "assistant", "content": text.upper()},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": len(text), "completion_tokens": len(text)}
+        })
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    """Run the stub server on a free localhost port"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.failures = 0
+    server.payloads = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_backend_reuses_connections_and_retries(stub_server):
+    """Requests share pooled keep-alive connections and 503s are retried"""
+    stub_server.failures = 2
+    backend = OpenAICompatibleBackend(
+        f"http://127.0.0.1:{stub_server.server_port}/v1", model="stub",
+        max_concurrency=2, max_retries=3, backoff=0.01)
+    texts = [f"sentence {i}" for i in range(12)]
+
+    results = backend.translate(texts, "en", "vi", {"strategy": "greedy"}, [32] * len(texts))
+    backend.close()
+
+    assert [translation for translation, _ in results] == [text.upper() for text in texts]
+    stats = backend.get_stats()
+    assert stats["retries"] == 2
+    assert stats["failures"] == 0
+    assert stub_server.connections <= 2
+    assert all(payload["temperature"] == 0.0 for payload in stub_server.payloads)
+
+
+def test_translator_uses_backend(stub_server, tiny_model_path):
+    """HunyuanTranslator sends texts to the backend with per-field budgets"""
+    backend = OpenAICompatibleBackend(
+        f"http://127.0.0.1:{stub_server.server_port}/v1", model="stub")
+    policy = DecodingPolicy(
+        strategy="greedy", length_ratio=1.0, length_margin=4,
+        fields={"choices": {"strategy": "sample", "temperature": 0.5}})
+    translator = HunyuanTranslator(
+        model_name=tiny_model_path, decoding_policy=policy, backend=backend)
+
+    assert translator.model is None
+    translations = translator.translate_batch(
+        ["Hello world", "", "Find x."], show_progress=False, field_name="choices")
+    backend.close()
+
+    assert translations == ["HELLO WORLD", "", "FIND X."]
+    assert sorted(payload["max_tokens"] for payload in stub_server.payloads) == [11, 15]
+    assert all(payload["temperature"] == 0.5 for payload in stub_server.payloads)
+    assert translator.get_model_info()["backend"]["requests"] == 2
+    assert translator.get_cache_context("choices")["model_name"] == "openai:stub"
+
+
+def test_incomplete_backend_fails_at_construction():
+    """A backend without translate() cannot be instantiated"""
+    class NoTranslate(InferenceBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        NoTranslate()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test token-budget batch scheduling
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.batch_scheduler import TokenBudgetScheduler
+
+LENGTHS = [5, 40, 6, 38, 7, 41, 5, 39]
+
+
+def test_batches_respect_budget_and_cover_items():
+    """Every item is scheduled once and no batch exceeds the padded-token budget"""
+    scheduler = TokenBudgetScheduler(max_batch_tokens=100, max_batch_size=4)
+    batches = scheduler.schedule(LENGTHS)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(LENGTHS)))
+    for batch in batches:
+        assert len(batch) <= 4
+        assert len(batch) * max(LENGTHS[i] for i in batch) <= 100
+
+
+def test_similar_lengths_are_grouped():
+    """Length bucketing pads less than batching by list position"""
+    scheduler = TokenBudgetScheduler(max_batch_size=4)
+    batches = scheduler.schedule(LENGTHS)
+    assert [sorted(LENGTHS[i] for i in batch) for batch in batches] == [
+        [38, 39, 40, 41], [5, 5, 6, 7]]
+
+    stats = scheduler.get_stats()
+    assert stats["padded_tokens"] == 4 * 41 + 4 * 7
+    assert stats["positional_padded_tokens"] == 4 * 40 + 4 * 41
+    assert stats["padded_tokens_saved"] == 4 * 40 - 4 * 7
+    assert stats["padding_waste"] < stats["positional_padding_waste"]
+
+
+def test_oversized_item_gets_own_batch():
+    """An item longer than the budget is still scheduled, alone"""
+    scheduler = TokenBudgetScheduler(max_batch_tokens=20)
+    assert scheduler.schedule([3, 50, 4]) == [[1], [2, 0]]
+
+
+def test_requires_a_limit():
+    """A scheduler without a token budget or a batch size is rejected"""
+    with pytest.raises(ValueError):
+        TokenBudgetScheduler()
+
+
+def test_translator_output_independent_of_schedule(tiny_model_path):
+    """Texts regrouped into token-budget batches come back in input order, unchanged"""
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from translation.hunyuan_translator import HunyuanTranslator
+
+    short = ["Find x.", "Say hi."]
+    long = ["Find the value of x if 2x = 8.", "Let φ be the golden ratio now."]
+    translator = HunyuanTranslator(
+        model_name=tiny_model_path, device="cpu", batch_size=2, max_length=64,
+        max_batch_tokens=1000)
+    expected_short = translator.translate_batch(short, show_progress=False)
+    expected_long = translator.translate_batch(long, show_progress=False)
+
+    # Interleaved texts are batched by length, so no row is padded
+    texts = [short[0], long[0], short[1], long[1]]
+    assert translator.translate_batch(texts, show_progress=False) == [
+        expected_short[0], expected_long[0], expected_short[1], expected_long[1]]
+    stats = translator.get_model_info()["scheduling"]
+    assert stats["items"] == 8
+    assert stats["padded_tokens"] == stats["real_tokens"]
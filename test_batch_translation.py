@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test padded batch generation against item-by-item translation
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.hunyuan_translator import HunyuanTranslator
+from translation.decoding_policy import DecodingPolicy
+
+TEXTS = [
+    "Hi",
+    "Find the value of x such that x² + 5x + 6 = 0.",
+    "Let φ be the golden ratio.",
+    "",
+    "The answer is 42."
+]
+
+
+def test_batched_output_matches_single_items(tiny_model_path):
+    """Left-padded batches decode every row as if it were translated alone"""
+    policy = DecodingPolicy(strategy="greedy", max_new_tokens=16)
+    translator = HunyuanTranslator(
+        model_name=tiny_model_path, device="cpu", batch_size=4, max_length=64,
+        decoding_policy=policy)
+
+    expected = [translator.translate_single(text) for text in TEXTS]
+    assert translator.translate_batch(TEXTS, show_progress=False) == expected
+    assert expected[3] == ""
+
+
+def test_failed_row_does_not_blank_batch(tiny_model_path, monkeypatch):
+    """A batch that fails to generate falls back to the rows one by one"""
+    policy = DecodingPolicy(strategy="greedy", max_new_tokens=16)
+    translator = HunyuanTranslator(
+        model_name=tiny_model_path, device="cpu", batch_size=4, max_length=64,
+        decoding_policy=policy)
+    expected = translator.translate_batch(TEXTS, show_progress=False)
+
+    generate_batch = translator._generate_batch
+
+    def fail_on_golden_ratio(texts, *args, **kwargs):
+        if any("golden" in text for text in texts):
+            raise RuntimeError("bad row")
+        return generate_batch(texts, *args, **kwargs)
+
+    monkeypatch.setattr(translator, "_generate_batch", fail_on_golden_ratio)
+    translated = translator.translate_batch(TEXTS, show_progress=False)
+    assert translated[2] == ""
+    assert [t for i, t in enumerate(translated) if i != 2] == [
+        t for i, t in enumerate(expected) if i != 2]
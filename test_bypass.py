@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test the model-bypass classifier
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.bypass import BypassClassifier
+
+
+def test_untranslatable_strings_are_bypassed():
+    """Numbers, formulas, URLs, code and Vietnamese text skip the model"""
+    classifier = BypassClassifier()
+    cases = {
+        "   ": "empty",
+        "3.14": "numeric",
+        "-12,5%": "numeric",
+        "√37": "symbolic",
+        "A: 400\nB: 500": "symbolic",
+        "$x^2 + y^2$": "symbolic",
+        "sin(x) + cos(AB)": "symbolic",
+        "AB = 5 cm": "symbolic",
+        "12 kg": "symbolic",
+        "https://example.com/a?b=1": "url",
+        "`print(x)`": "code",
+        "Tìm giá trị của x sao cho phương trình có nghiệm.": "target_language"
+    }
+    for text, reason in cases.items():
+        assert classifier.classify(text) == reason, text
+
+
+def test_prose_needs_the_model():
+    """English, French and Spanish prose is translated"""
+    classifier = BypassClassifier()
+    for text in [
+        "Find the value of x.",
+        "What is sin(x) when x is zero?",
+        "Le café est très bon.",
+        "El niño está aquí."
+    ]:
+        assert classifier.classify(text) is None, text
+    assert classifier.classify("Tìm giá trị của x.", target_lang="en") is None
+
+
+def test_short_acronyms_need_the_model():
+    """All-caps words outside formulas are acronyms, not point names"""
+    classifier = BypassClassifier()
+    for text in ["OK", "USA", "DNA", "DNA (USA)", "The DNA test is OK."]:
+        assert classifier.classify(text) is None, text
+
+
+def test_stats_count_saved_model_calls():
+    """Empty strings are counted but do not count as saved model calls"""
+    classifier = BypassClassifier()
+    for text in ["", "42", "https://a.io", "Find x."]:
+        classifier.classify(text)
+    stats = classifier.get_stats()
+    assert stats["checked"] == 4
+    assert stats["model_calls_saved"] == 2
+
+
+def test_translator_passes_bypassed_texts_through(tiny_model_path):
+    """Bypassed texts are returned unchanged and the rest are translated as before"""
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from translation.hunyuan_translator import HunyuanTranslator
+    from translation.decoding_policy import DecodingPolicy
+
+    texts = ["Find x.", "√37", "Xin chào các bạn, hôm nay trời đẹp.", "The answer is 42."]
+    policy = DecodingPolicy(strategy="greedy", max_new_tokens=12)
+    translator = HunyuanTranslator(
+        model_name=tiny_model_path, device="cpu", batch_size=4, max_length=64,
+        decoding_policy=policy)
+    expected = translator.translate_batch(texts, show_progress=False)
+
+    translator.bypass = BypassClassifier()
+    translated = translator.translate_batch(texts, show_progress=False)
+    assert translated == [expected[0], texts[1], texts[2], expected[3]]
+    assert translator.get_model_info()["bypass"]["model_calls_saved"] == 2
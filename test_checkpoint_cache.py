@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test converting a checkpoint once and loading it memory-mapped
+"""
+
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("accelerate")
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.hunyuan_translator import HunyuanTranslator
+from translation.checkpoint_cache import CheckpointCache, source_model_hash
+
+TEXTS = ["The answer is 42.", "Hello world", "Find x."]
+
+
+@pytest.mark.parametrize("cpu_mode", ["bf16", "int8"])
+def test_converted_checkpoint_translates_like_source(tiny_model_path, tmp_path, cpu_mode):
+    """Loading the converted checkpoint gives the source's translations"""
+    settings = dict(model_name=tiny_model_path, device="cpu", batch_size=2, max_length=32,
+                    cpu_mode=cpu_mode)
+    cache = CheckpointCache(tmp_path / "checkpoints")
+
+    cold = HunyuanTranslator(**settings, checkpoint_cache=cache)
+    assert cold.startup_stats["checkpoint"] == "source"
+    expected = cold.translate_batch(TEXTS, show_progress=False)
+
+    manifest = cache.convert(tiny_model_path, cpu_mode)
+    assert manifest["source_hash"] == source_model_hash(tiny_model_path)
+    assert cache.is_converted(tiny_model_path, cpu_mode)
+    assert not cache.is_converted(tiny_model_path, "fp32")
+
+    warm = HunyuanTranslator(**settings, checkpoint_cache=cache)
+    assert warm.startup_stats["checkpoint"] == "converted"
+    assert warm.translate_batch(TEXTS, show_progress=False) == expected
+
+
+def test_source_hash_follows_the_checkpoint(tiny_model_path, tmp_path):
+    """Changing the source config gives a different cache entry"""
+    copy = tmp_path / "model"
+    shutil.copytree(tiny_model_path, copy)
+    assert source_model_hash(str(copy)) == source_model_hash(tiny_model_path)
+
+    config = json.loads((copy / "config.json").read_text())
+    config["rms_norm_eps"] = 1e-5
+    (copy / "config.json").write_text(json.dumps(config))
+
+    cache = CheckpointCache(tmp_path / "checkpoints")
+    assert cache.path(str(copy), "bf16") != cache.path(tiny_model_path, "bf16")
+
+
+def test_checkpoint_cache_requires_cpu_mode(tiny_model_path, tmp_path):
+    """The cache holds CPU-mode checkpoints only"""
+    with pytest.raises(ValueError):
+        HunyuanTranslator(model_name=tiny_model_path, device="cpu",
+                          checkpoint_cache=CheckpointCache(tmp_path))
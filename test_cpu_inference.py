@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test the CPU execution modes on a tiny local model
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.hunyuan_translator import HunyuanTranslator
+from translation.cpu_inference import prepare_cpu_model, model_size_mb
+
+TEXTS = ["The answer is 42.", "Hello world", "Find x."]
+
+
+@pytest.mark.parametrize("cpu_mode", ["fp32", "bf16", "int8"])
+def test_cpu_modes_translate(tiny_model_path, cpu_mode):
+    """Every mode translates and reports throughput and memory"""
+    translator = HunyuanTranslator(
+        model_name=tiny_model_path, device="cpu", batch_size=2, max_length=32,
+        cpu_mode=cpu_mode, cpu_threads=1)
+    translations = translator.translate_batch(TEXTS, show_progress=False)
+    info = translator.get_model_info()
+
+    assert len(translations) == len(TEXTS)
+    assert info["cpu"]["mode"] == cpu_mode
+    assert info["cpu"]["threads"] == 1
+    assert info["cpu"]["memory"]["rss_mb"] > 0
+    assert info["generation"]["generated_tokens"] > 0
+    assert info["generation"]["tokens_per_sec"] > 0
+
+    if cpu_mode == "int8":
+        modules = list(translator.model.modules())
+        assert not any(type(module) is torch.nn.Linear for module in modules)
+        assert any(isinstance(module, torch.ao.nn.quantized.dynamic.Linear) for module in modules)
+    else:
+        expected = torch.bfloat16 if cpu_mode == "bf16" else torch.float32
+        assert next(translator.model.parameters()).dtype == expected
+
+
+def test_int8_shrinks_linear_weights():
+    """Dynamic quantization stores linear weights in a quarter of the fp32 size"""
+    model = torch.nn.Sequential(torch.nn.Linear(256, 256), torch.nn.ReLU(), torch.nn.Linear(256, 256))
+    fp32_size = model_size_mb(model)
+    int8_size = model_size_mb(prepare_cpu_model(model, "int8"))
+    assert int8_size < fp32_size / 3
+
+
+def test_cpu_mode_requires_cpu_device(tiny_model_path):
+    """CPU modes are rejected for other devices and unknown names"""
+    with pytest.raises(ValueError):
+        HunyuanTranslator(model_name=tiny_model_path, device="cuda", cpu_mode="int8")
+    with pytest.raises(ValueError):
+        HunyuanTranslator(model_name=tiny_model_path, device="cpu", cpu_mode="fp8")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test per-field decoding strategies and learned output token budgets
+"""
+
+import copy
+import math
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.decoding_policy import DecodingPolicy
+
+CONFIG = {
+    "generation": {
+        "strategy": "beam",
+        "num_beams": 4,
+        "length_ratio": 2.0,
+        "length_margin": 10,
+        "max_new_tokens": 100,
+        "fields": {"problems": {"strategy": "greedy", "prompt_lookup": True}}
+    },
+    "datasets": {
+        "gpqa": {"generation": {"strategy": "sample", "fields": {"explanations": {"length_ratio": 1.5}}}}
+    }
+}
+
+
+def test_strategies_from_config():
+    """Field and dataset sections override the default strategy"""
+    policy = DecodingPolicy.from_config(CONFIG, dataset="aime")
+    assert policy.describe() == "beam4"
+    assert policy.generation_kwargs("solutions")["num_beams"] == 4
+    assert policy.generation_kwargs("problems") == {"num_beams": 1, "do_sample": False}
+    assert policy.uses_prompt_lookup("problems")
+    assert not policy.uses_prompt_lookup("solutions")
+
+    policy = DecodingPolicy.from_config(CONFIG, dataset="gpqa")
+    assert policy.generation_kwargs("questions")["do_sample"] is True
+    assert policy.strategy("problems") == "greedy"
+
+
+def test_budget_follows_source_length():
+    """Budgets scale with the source, include the margin and respect the cap"""
+    policy = DecodingPolicy.from_config(CONFIG, dataset="gpqa")
+    assert policy.max_new_tokens(5) == 20
+    assert policy.max_new_tokens(20, "explanations") == 40
+    assert policy.max_new_tokens(1000) == 100
+
+
+def test_learned_ratio_persists(tmp_path):
+    """Observed ratios replace the configured one and carry over to the next run"""
+    stats_path = tmp_path / "length_stats.json"
+    policy = DecodingPolicy(length_ratio=2.0, length_margin=0, stats_path=str(stats_path), min_samples=5)
+    for _ in range(5):
+        policy.observe(20, 24, "problems")
+    policy.observe(2, 50, "problems")  # too short to be observed
+    assert policy.length_ratio("problems") == pytest.approx(1.2)
+    assert policy.length_ratio("solutions") == 2.0
+    policy.save()
+
+    reloaded = DecodingPolicy(length_ratio=2.0, length_margin=0, stats_path=str(stats_path), min_samples=5)
+    assert reloaded.max_new_tokens(50, "problems") == 60
+    assert list(tmp_path.iterdir()) == [stats_path]
+
+
+def test_observations_merge_across_replicas(tmp_path):
+    """Replicas hand on only their new observations, so loaded ones are not counted twice"""
+    stats_path = str(tmp_path / "length_stats.json")
+    earlier = DecodingPolicy(stats_path=stats_path)
+    earlier.observe(20, 20, "problems")
+    earlier.save()
+
+    parent = DecodingPolicy(stats_path=stats_path)
+    replicas = [copy.deepcopy(parent) for _ in range(2)]
+    replicas[0].observe(20, 30, "problems")
+    replicas[1].observe(20, 40, "problems", budget=40)
+    for replica in replicas:
+        parent.add_observations(replica.get_observations())
+
+    stats = parent.get_stats()["fields"]["problems"]
+    assert stats["observations"] == 3
+    assert stats["censored"] == 1
+
+
+def test_cut_off_outputs_are_lower_bounds():
+    """Outputs cut off at their budget keep the learned ratio from drifting down"""
+    policy = DecodingPolicy(length_ratio=2.0, length_margin=0, min_samples=5, quantile=0.8)
+    for ratio in (1.0, 1.1, 1.2, 1.3, 1.4):
+        policy.observe(100, int(ratio * 100), "problems")
+    policy.observe(100, 150, "problems", budget=150)
+    # Only uncut outputs can be the quantile; the cut one is known to be longer
+    assert policy.length_ratio("problems") == pytest.approx(1.4)
+
+    # With more cut-off outputs than the quantile allows, budgets grow past them
+    for _ in range(5):
+        policy.observe(100, 150, "problems", budget=150)
+    assert policy.length_ratio("problems") == pytest.approx(1.5 * policy.censored_growth)
+
+
+def test_learned_ratio_converges_with_truncation():
+    """Across runs, the learned ratio settles near the true quantile instead of shrinking"""
+    rng = random.Random(0)
+    policy = DecodingPolicy(length_ratio=1.478, length_margin=0, min_samples=50)
+    truncated = 0
+    for _ in range(8 * 500):
+        source = rng.randint(20, 200)
+        output = math.ceil(rng.lognormvariate(0, 0.2) * 1.1 * source)
+        budget = policy.max_new_tokens(source, "problems")
+        truncated += output >= budget
+        policy.observe(source, min(output, budget), "problems", budget)
+
+    # True 98th percentile: 1.1 * exp(0.2 * 2.054) = 1.659
+    assert policy.length_ratio("problems") == pytest.approx(1.66, abs=0.05)
+    assert truncated / (8 * 500) < 0.04
+
+
+def test_rejects_unknown_strategy():
+    """Typos in the config fail loudly"""
+    with pytest.raises(ValueError):
+        DecodingPolicy(fields={"problems": {"strategy": "beams"}})
+
+
+def main():
+    """Run all tests"""
+    test_strategies_from_config()
+    test_budget_follows_source_length()
+    print("✅ Decoding policy tests passed")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test the int8/int4 KV cache
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.hunyuan_translator import HunyuanTranslator
+from translation.kv_quantization import GroupQuantizedLayer, QuantizedKVCache, cache_bytes
+
+TEXTS = ["The answer is 42.", "Hello world", "Find x."]
+
+
+@pytest.mark.parametrize("nbits,tolerance", [(8, 0.02), (4, 0.3)])
+def test_group_quantization_round_trip(nbits, tolerance):
+    """Values come back within a fraction of their group's range"""
+    torch.manual_seed(0)
+    states = torch.randn(2, 4, 10, 128)
+    layer = GroupQuantizedLayer(nbits=nbits, q_group_size=64)
+
+    quantized = layer._quantize(states, axis=-1)
+    assert quantized["data"].numel() == states.numel() * nbits // 8
+    restored = layer._dequantize(quantized)
+    assert restored.shape == states.shape
+    assert (restored - states).abs().max() < tolerance * (states.max() - states.min())
+
+
+@pytest.mark.parametrize("nbits", [8, 4])
+def test_quantized_cache_is_smaller(tiny_model_path, nbits):
+    """A long generation holds fewer cache bytes than the full-precision cache"""
+    model = transformers.AutoModelForCausalLM.from_pretrained(tiny_model_path).eval()
+    input_ids = torch.randint(4, 100, (2, 20))
+    settings = dict(max_new_tokens=80, min_new_tokens=80, do_sample=False)
+
+    full = transformers.DynamicCache()
+    quantized = QuantizedKVCache(model.config, nbits=nbits, residual_length=16)
+    with torch.no_grad():
+        model.generate(input_ids=input_ids, past_key_values=full, **settings)
+        outputs = model.generate(input_ids=input_ids, past_key_values=quantized, **settings)
+
+    assert outputs.shape == (2, 100)
+    assert 0 < quantized.peak_bytes < cache_bytes(full)
+
+
+def test_translator_reports_kv_cache(tiny_model_path):
+    """Translations run on the quantized cache and report its peak"""
+    translator = HunyuanTranslator(
+        model_name=tiny_model_path, device="cpu", batch_size=2, max_length=32,
+        kv_cache_quantization="int8")
+    translations = translator.translate_batch(TEXTS, show_progress=False)
+    stats = translator.get_model_info()["kv_cache"]
+
+    assert len(translations) == len(TEXTS)
+    assert stats["quantization"] == "int8"
+    assert stats["calls"] == 2
+    assert stats["peak_kv_mb"] > 0
+    assert stats["peak_batch_size"] == 2
+    assert stats["peak_memory_mb"] > 0
+
+
+def test_kv_cache_options_are_validated(tiny_model_path):
+    """Unknown formats and the static cache are rejected"""
+    with pytest.raises(ValueError):
+        HunyuanTranslator(model_name=tiny_model_path, device="cpu", kv_cache_quantization="int2")
+    with pytest.raises(ValueError):
+        HunyuanTranslator(model_name=tiny_model_path, device="cpu",
+                          kv_cache_quantization="int8", compiled_decoding=True)
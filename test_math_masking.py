@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test formula/LaTeX masking and placeholder restoration
+"""
+
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.math_masking import MathSpanMasker
+
+
+def test_masks_formulas():
+    """Plain-text formulas, LaTeX, code and URLs are replaced by placeholders"""
+    masker = MathSpanMasker()
+
+    masked, spans = masker.mask("Find the remainder when 2^100 is divided by 125.")
+    assert masked == "Find the remainder when [M0] is divided by 125."
+    assert spans == ["2^100"]
+
+    masked, spans = masker.mask("We have m_a² = (2b² + 2c² - a²)/4 for the median.")
+    assert spans == ["m_a² = (2b² + 2c² - a²)/4"]
+
+    masked, spans = masker.mask("Let $x^2 + y^2 = 1$. See https://example.com/a. Use `np.sum(x)`.")
+    assert masked == "Let [M0]. See [M1]. Use [M2]."
+
+
+def test_leaves_prose_alone():
+    """Ordinary sentences and bare numbers are not masked"""
+    masker = MathSpanMasker()
+    for text in [
+        "Which of the following compounds is the most acidic?",
+        "A regular hexagon with side length 4 is inscribed in a circle (where p is prime).",
+    ]:
+        assert masker.mask(text) == (text, [])
+
+
+def test_prose_tokens_stay_outside_spans():
+    """Slash/underscore-joined words, articles and abbreviations are translated"""
+    masker = MathSpanMasker()
+    for text in [
+        "Each student brings his/her own calculator.",
+        "Use pens and/or pencils.",
+        "Set the max_length option before the run.",
+    ]:
+        assert masker.mask(text) == (text, [])
+
+    assert masker.mask("A 50/50 split is fair.") == ("A [M0] split is fair.", ["50/50"])
+    assert masker.mask("Consider e.g. x+y = 3 here.")[1] == ["x+y = 3"]
+    assert masker.mask("i.e. a*b = c holds.")[1] == ["a*b = c"]
+    # Single letters next to operators are still variables
+    assert masker.mask("Let a = 3 and x = a + 1.")[1] == ["a = 3", "x = a + 1"]
+    assert masker.mask("so a/b = m_a holds")[1] == ["a/b = m_a"]
+
+
+def test_unmask_checks_placeholders():
+    """Restoration succeeds only if every placeholder comes back once"""
+    masker = MathSpanMasker()
+    text = "Since 1000 = 2³ × 5³, we get φ(1000) = 400."
+    masked, spans = masker.mask(text)
+
+    assert masker.unmask(masked, spans) == (text, True)
+    assert masker.unmask(masked.replace("[M0]", "[ M 0 ]"), spans) == (text, True)
+    assert masker.unmask(masked.replace("[M1]", ""), spans)[1] is False
+    assert masker.get_stats()["restore_failures"] == 1
+
+
+def main():
+    """Run all tests"""
+    test_masks_formulas()
+    test_leaves_prose_alone()
+    test_prose_tokens_stay_outside_spans()
+    test_unmask_checks_placeholders()
+    print("✅ Math masking tests passed")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Test data-parallel translation with two CPU worker processes
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.decoding_policy import DecodingPolicy
+from translation.hunyuan_translator import HunyuanTranslator
+from translation.translation_cache import TranslationCache
+from translation.parallel import ParallelTranslator, merge_escalation_stats, split_cores
+
+TEXTS = [
+    "The answer is 42.",
+    "",
+    "Find x if 2x + 3 = 7.",
+    "Hello world",
+    "A triangle has three sides.",
+]
+
+
+class FieldTranslator:
+    """Stand-in translator that tags texts with their field, optionally dying once"""
+
+    def __init__(self, crash_marker=None, device=None):
+        self.crash_marker = crash_marker
+        self.items = 0
+
+    def translate_batch(self, texts, source_lang="en", target_lang="vi",
+                        show_progress=True, field_name=None):
+        if self.crash_marker and not os.path.exists(self.crash_marker):
+            open(self.crash_marker, "w").close()
+            os._exit(1)
+        self.items += len(texts)
+        return [f"{field_name}:{text}" for text in texts]
+
+    def get_model_info(self):
+        return {"adaptive_decoding": {
+            "items": self.items, "escalated": 1, "resolved": 0, "first_pass_seconds": 0.0,
+            "escalation_seconds": 0.0, "decode_cost": self.items + 4.0, "full_decode_cost": 4.0 * self.items,
+            "escalation_rate": 0.0, "compute_saved": 0.0,
+            "validator": {"checked": self.items, "flagged": 1, "flag_rate": 0.0}}}
+
+
+def test_split_cores():
+    """Cores are split evenly, or shared when there are fewer than workers"""
+    assert split_cores(2, [0, 1, 2, 3, 4]) == [[0, 1, 2], [3, 4]]
+    assert split_cores(3, [0]) == [[0], [0], [0]]
+
+
+def test_two_workers_match_single_process(tiny_model_path):
+    """Sharded translation across two workers is merged back in input order"""
+    kwargs = {"model_name": tiny_model_path, "device": "cpu", "batch_size": 2, "max_length": 32}
+    expected = HunyuanTranslator(**kwargs).translate_batch(TEXTS, show_progress=False)
+
+    with ParallelTranslator(kwargs, num_workers=2, shard_size=2) as translator:
+        dataset = translator.translate_dataset_field({"problems": TEXTS}, "problems")
+        info = translator.get_model_info()
+
+    assert dataset["problems_vi"] == expected
+    assert info["parallel"]["shards"] == 3
+    assert sum(info["parallel"]["per_worker_items"]) == len(TEXTS)
+    assert all(worker is not None for worker in info["workers"])
+
+
+def test_workers_share_weights(tiny_model_path):
+    """Workers attach to one shared copy of the weights and report their memory"""
+    kwargs = {"model_name": tiny_model_path, "device": "cpu", "batch_size": 2, "max_length": 32}
+    expected = HunyuanTranslator(**kwargs).translate_batch(TEXTS, show_progress=False)
+
+    with ParallelTranslator(kwargs, num_workers=2, shard_size=2, share_weights=True) as translator:
+        translations = translator.translate_batch(TEXTS, show_progress=False)
+        info = translator.get_model_info()
+
+    assert translations == expected
+    assert info["share_weights"]
+    for worker in info["workers"]:
+        assert worker["shared_weights"]
+        assert worker["memory"]["rss_mb"] > 0
+
+
+def test_workers_length_ratios_are_merged_and_saved(tiny_model_path, tmp_path):
+    """The pool saves every worker's observed length ratios once, in one file"""
+    stats_path = tmp_path / "length_stats.json"
+    kwargs = {"model_name": tiny_model_path, "device": "cpu", "batch_size": 2, "max_length": 32}
+    single = HunyuanTranslator(**kwargs, decoding_policy=DecodingPolicy(strategy="greedy", max_new_tokens=12))
+    single.translate_batch(TEXTS, show_progress=False, field_name="problems")
+    expected = len(single.decoding_policy.get_observations()["problems"])
+
+    policy = DecodingPolicy(strategy="greedy", max_new_tokens=12, stats_path=str(stats_path))
+    with ParallelTranslator(dict(kwargs, decoding_policy=policy), num_workers=2, shard_size=2) as translator:
+        translator.translate_batch(TEXTS, show_progress=False, field_name="problems")
+
+    saved = DecodingPolicy(stats_path=str(stats_path)).get_stats()["fields"]["problems"]
+    assert saved["observations"] == expected > 0
+    assert list(tmp_path.iterdir()) == [stats_path]
+
+
+def test_workers_warm_the_cache(tiny_model_path, tmp_path):
+    """The pool pre-warms its shared cache with entries its workers then hit"""
+    output_dir = tmp_path / "outputs"
+    output_dir.mkdir()
+    with open(output_dir / "aime_translated.json", "w", encoding="utf-8") as f:
+        json.dump({"problems": ["Find x."], "problems_vi": ["Tìm x."]}, f)
+    cache = TranslationCache(str(tmp_path / "cache.sqlite"))
+    kwargs = {"model_name": tiny_model_path, "device": "cpu", "max_length": 32, "cache": cache}
+
+    with ParallelTranslator(kwargs, num_workers=1) as translator:
+        assert translator.warm_cache(str(output_dir)) == 1
+        assert translator.translate_batch(["Find x."], show_progress=False, field_name="problems") == ["Tìm x."]
+        assert translator.get_model_info()["workers"][0]["cache"]["hits"] == 1
+
+
+def test_single_text_keeps_its_field():
+    """translate_single forwards the field, so per-field decoding applies in the workers"""
+    with ParallelTranslator({}, num_workers=1, translator_class=FieldTranslator) as translator:
+        assert translator.translate_single("x", field_name="problems") == "problems:x"
+
+
+def test_dead_worker_is_restarted_and_its_shard_redone(tmp_path):
+    """A worker dying mid-shard is replaced and every shard comes back once, in order"""
+    texts = [f"t{i}" for i in range(6)]
+    kwargs = {"crash_marker": str(tmp_path / "crashed")}
+    with ParallelTranslator(kwargs, num_workers=2, shard_size=2,
+                            translator_class=FieldTranslator) as translator:
+        translations = translator.translate_batch(texts, show_progress=False, field_name="f")
+        assert translator.translate_batch(texts[:2], show_progress=False, field_name="g") == ["g:t0", "g:t1"]
+        stats = translator.get_model_info()["parallel"]
+
+    assert translations == [f"f:{text}" for text in texts]
+    assert stats["worker_restarts"] == 1
+    assert sum(stats["per_worker_items"]) == len(texts) + 2
+
+
+def test_results_of_earlier_calls_are_not_merged():
+    """A late shard result from an earlier call is dropped, not merged by shard index"""
+    with ParallelTranslator({}, num_workers=1, shard_size=2,
+                            translator_class=FieldTranslator) as translator:
+        # Leftover task of an earlier call with the same shard index
+        translator._tasks.put(((0, 0), ["stale"], "en", "vi", "old"))
+        assert translator.translate_batch(["a", "b"], show_progress=False, field_name="f") == ["f:a", "f:b"]
+        assert translator.stats["stale_results"] == 1
+
+        # Escalation statistics of the workers reach the run report before close()
+        adaptive = translator.get_model_info()["adaptive_decoding"]
+        assert adaptive["items"] == 3
+        assert adaptive["validator"]["checked"] == 3
+
+
+def test_merge_escalation_stats():
+    """Counts and decode costs are summed and rates recomputed over all workers"""
+    infos = [
+        {"adaptive_decoding": {
+            "items": 10, "escalated": 2, "resolved": 1, "first_pass_seconds": 1.0,
+            "escalation_seconds": 0.5, "decode_cost": 26.0, "full_decode_cost": 80.0,
+            "escalation_rate": 0.2, "compute_saved": 1 - 26 / 80,
+            "validator": {"checked": 10, "flagged": 2, "empty": 1, "flag_rate": 0.2}}},
+        {"adaptive_decoding": {
+            "items": 30, "escalated": 3, "resolved": 3, "first_pass_seconds": 2.0,
+            "escalation_seconds": 1.0, "decode_cost": 54.0, "full_decode_cost": 240.0,
+            "escalation_rate": 0.1, "compute_saved": 1 - 54 / 240,
+            "validator": {"checked": 30, "flagged": 3, "empty": 0, "flag_rate": 0.1}}},
+        None
+    ]
+    merged = merge_escalation_stats(infos)
+    assert merged["items"] == 40
+    assert merged["escalated"] == 5
+    assert merged["escalation_rate"] == pytest.approx(5 / 40)
+    assert merged["compute_saved"] == pytest.approx(1 - 80 / 320)
+    assert merged["validator"] == {"checked": 40, "flagged": 5, "empty": 1, "flag_rate": 5 / 40}
+    assert merge_escalation_stats([{"adaptive_decoding": None}]) is None
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test reuse of the prompt-prefix KV cache
+"""
+
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.hunyuan_translator import HunyuanTranslator
+from translation.decoding_policy import DecodingPolicy
+
+TEXTS = [
+    "Hi",
+    "Find the value of x such that x² + 5x + 6 = 0.",
+    "Let φ be the golden ratio.",
+    "The answer is 42."
+]
+
+
+@pytest.mark.parametrize("strategy", ["greedy", "beam"])
+def test_same_output_with_and_without_prefix_cache(tiny_model_path, strategy):
+    """Prefilling only the text after a cached prefix leaves the translations unchanged"""
+    policy = DecodingPolicy(strategy=strategy, num_beams=2, max_new_tokens=12)
+    translator = HunyuanTranslator(
+        model_name=tiny_model_path, device="cpu", batch_size=4, max_length=64,
+        decoding_policy=policy)
+    expected = translator.translate_batch(TEXTS, show_progress=False)
+
+    cached = HunyuanTranslator(
+        model_name=tiny_model_path, device="cpu", batch_size=4, max_length=64,
+        decoding_policy=policy, use_prefix_cache=True)
+    assert cached.translate_batch(TEXTS, show_progress=False) == expected
+    assert cached.translate_batch(TEXTS[:2], show_progress=False) == expected[:2]
+
+    # The prefix is encoded once and served to every later item
+    stats = cached.get_model_info()["prefix_cache"]
+    assert stats["prefixes_encoded"] == 1
+    assert stats["items_served"] == len(TEXTS) + 2
+    assert stats["prefill_tokens_saved"] > 0
+
+
+@pytest.fixture
+def bpe_model_path(tiny_model_path, tmp_path):
+    """The tiny model with a SentencePiece-style BPE tokenizer whose tokens span spaces"""
+    tokenizers = pytest.importorskip("tokenizers")
+    transformers = pytest.importorskip("transformers")
+
+    path = tmp_path / "bpe_model"
+    shutil.copytree(tiny_model_path, path)
+    for name in ("tokenizer.json", "tokenizer_config.json", "special_tokens_map.json"):
+        (path / name).unlink(missing_ok=True)
+
+    tokenizer = tokenizers.Tokenizer(tokenizers.models.BPE(unk_token="<unk>"))
+    tokenizer.pre_tokenizer = tokenizers.pre_tokenizers.Metaspace(split=False)
+    tokenizer.decoder = tokenizers.decoders.Metaspace()
+    tokenizer.train_from_iterator(
+        [f"<en2vi> {text}" for text in TEXTS] * 20,
+        tokenizers.trainers.BpeTrainer(vocab_size=150, special_tokens=["<pad>", "<s>", "</s>", "<unk>"]))
+    transformers.PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        pad_token="<pad>", bos_token="<s>", eos_token="</s>", unk_token="<unk>"
+    ).save_pretrained(path)
+    return str(path)
+
+
+def test_prompts_that_tokenize_across_the_join_skip_the_cache(bpe_model_path):
+    """When prefix and text tokens merge in the whole prompt, the batch is encoded as usual"""
+    policy = DecodingPolicy(strategy="greedy", max_new_tokens=12)
+    translator = HunyuanTranslator(
+        model_name=bpe_model_path, device="cpu", batch_size=4, max_length=64,
+        decoding_policy=policy)
+    assert translator.tokenizer("<en2vi> Hi")["input_ids"] != (
+        translator.tokenizer("<en2vi>")["input_ids"]
+        + translator.tokenizer(" Hi", add_special_tokens=False)["input_ids"])
+    expected = translator.translate_batch(TEXTS, show_progress=False)
+
+    cached = HunyuanTranslator(
+        model_name=bpe_model_path, device="cpu", batch_size=4, max_length=64,
+        decoding_policy=policy, use_prefix_cache=True)
+    assert cached.translate_batch(TEXTS, show_progress=False) == expected
+    stats = cached.get_model_info()["prefix_cache"]
+    assert stats["items_not_served"] == len(TEXTS)
+    assert stats["items_served"] == 0
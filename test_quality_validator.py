@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test the heuristic validator that decides which translations are escalated
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.quality_validator import TranslationValidator, escalation_savings
+
+SOURCE = "Find the number of positive integers less than 1000 that are divisible by 7."
+GOOD = "Tìm số các số nguyên dương nhỏ hơn 1000 chia hết cho 7."
+
+
+def test_good_translation_passes():
+    """A complete Vietnamese translation raises no flags"""
+    validator = TranslationValidator()
+    assert validator.check(SOURCE, GOOD) == []
+    assert validator.check("x = 3", "x = 3") == []
+
+
+def test_suspect_translations_are_flagged():
+    """Each heuristic catches its failure mode"""
+    validator = TranslationValidator()
+    assert validator.check(SOURCE, "") == ["empty"]
+    assert "truncated" in validator.check(SOURCE, "Tìm số các số nguyên dương nhỏ hơn 1000 chia")
+    assert "length_ratio" in validator.check(SOURCE, "Tìm số.")
+    assert "no_diacritics" in validator.check(SOURCE, "Find the number of positive integers below 1000.")
+    assert "repetition" in validator.check(
+        SOURCE, "Tìm số các số các số các số các số các số các số nguyên dương chia hết cho 7.")
+
+    stats = validator.get_stats()
+    assert stats["checked"] == 5
+    assert stats["flagged"] == 5
+    assert stats["empty"] == 1
+
+
+def test_source_repetition_is_not_a_loop():
+    """N-grams repeated in the source may be repeated in the translation"""
+    validator = TranslationValidator()
+    source = "Add one more. Add one more. Add one more."
+    assert "repetition" not in validator.check(source, "Thêm một nữa. Thêm một nữa. Thêm một nữa.")
+
+
+def main():
+    """Run all tests"""
+    test_good_translation_passes()
+    test_suspect_translations_are_flagged()
+    test_source_repetition_is_not_a_loop()
+    print("✅ Quality validator tests passed")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
+
+
+def test_escalation_savings_never_negative():
+    """Escalating more work than it saves reports nothing saved"""
+    assert escalation_savings(10 + 2 * 8, 10 * 8) == pytest.approx(1 - 26 / 80)
+    assert escalation_savings(10 + 10, 10) == 0.0
+    assert escalation_savings(0, 0) == 0.0
+
+
+class FlagNothing(TranslationValidator):
+    """Validator that accepts every first-pass translation"""
+
+    def check(self, source, translation, target_lang="vi"):
+        self.stats["checked"] += 1
+        return []
+
+
+@pytest.mark.parametrize("validator_class, escalation_options, expected", [
+    # Each item costs beams x budget scale at the escalation setting
+    (FlagNothing, {"strategy": "beam", "num_beams": 2, "budget_scale": 2.0}, 1 - 1 / 4),
+    # Greedy escalation at the first pass's budget cannot save anything
+    (TranslationValidator, {"strategy": "greedy", "budget_scale": 1.0}, 0.0)
+])
+def test_compute_saved_weighs_beams_and_budget(tiny_model_path, validator_class, escalation_options, expected):
+    """compute_saved compares both passes with escalating every item"""
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from translation.hunyuan_translator import HunyuanTranslator
+    from translation.decoding_policy import DecodingPolicy
+
+    translator = HunyuanTranslator(
+        model_name=tiny_model_path, device="cpu", batch_size=2, max_length=64,
+        decoding_policy=DecodingPolicy(max_new_tokens=8), validator=validator_class(),
+        escalation_options=escalation_options)
+    translator.translate_batch(
+        ["Find the value of x if 2x = 8.", "Let φ be the golden ratio now."], show_progress=False)
+    stats = translator.get_escalation_stats()
+    assert stats["items"] == 2
+    assert stats["compute_saved"] == pytest.approx(expected)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test sentence segmentation and reassembly of long dataset fields
+"""
+
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.segmentation import TextSegmenter
+
+
+SAMPLE_TEXTS = [
+    "We need to find the number of positive integers n ≤ 1000 that are relatively prime to 1000. "
+    "Since 1000 = 2³ × 5³, we use Euler's totient function: φ(1000) = 400.",
+    "In triangle ABC, AB = 8. Find the median, e.g. from A to BC. The value is 3.14 approx. "
+    "Then $x = 1. Y$ holds!\n\nNew paragraph here. Yes it is.\n",
+    "  Leading and trailing whitespace is kept.  ",
+    "",
+]
+
+
+def test_round_trip():
+    """Reassembling untranslated segments reproduces the input"""
+    segmenter = TextSegmenter()
+    for text in SAMPLE_TEXTS:
+        segments, separators = segmenter.segment(text)
+        assert len(separators) == len(segments) + 1
+        assert segmenter.reassemble(segments, separators) == text
+
+
+def test_sentence_boundaries():
+    """Abbreviations, decimals and math spans do not end sentences"""
+    segmenter = TextSegmenter(min_segment_chars=0)
+    segments, _ = segmenter.segment(SAMPLE_TEXTS[1])
+    assert segments == [
+        "In triangle ABC, AB = 8.",
+        "Find the median, e.g. from A to BC.",
+        "The value is 3.14 approx. Then $x = 1. Y$ holds!",
+        "New paragraph here.",
+        "Yes it is.",
+    ]
+
+
+def test_long_sentences_are_split():
+    """Sentences over max_segment_chars are split at clause boundaries"""
+    segmenter = TextSegmenter(max_segment_chars=50)
+    text = "alpha beta gamma, " * 10
+    segments, separators = segmenter.segment(text)
+    assert len(segments) > 1
+    assert all(len(segment) <= 50 for segment in segments)
+    assert segmenter.reassemble(segments, separators) == text
+
+
+def test_long_sentences_keep_math_spans_whole():
+    """Clause and space splits never fall inside $...$"""
+    segmenter = TextSegmenter(max_segment_chars=50)
+    formula = "$\\{a_1, a_2, a_3, a_4, a_5, a_6\\}$"
+    text = f"Consider the set {formula} of integers, and the sum of all of its elements, each counted once."
+    segments, separators = segmenter.segment(text)
+    assert len(segments) > 1
+    assert any(formula in segment for segment in segments)
+    assert segmenter.reassemble(segments, separators) == text
+
+
+def main():
+    """Run all tests"""
+    test_round_trip()
+    test_sentence_boundaries()
+    test_long_sentences_are_split()
+    test_long_sentences_keep_math_spans_whole()
+    print("✅ Segmentation tests passed")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test loading the model in the background while work is prepared
+"""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.hunyuan_translator import HunyuanTranslator
+from translation.segmentation import TextSegmenter
+
+TEXTS = ["The answer is 42.", "", "Hello world. Find x.", "The answer is 42."]
+
+
+def test_background_load_matches_synchronous_load(tiny_model_path):
+    """Pretokenized work translates as with a synchronously loaded model"""
+    settings = dict(model_name=tiny_model_path, device="cpu", batch_size=2, max_length=32)
+    expected = HunyuanTranslator(**settings).translate_batch(TEXTS, show_progress=False)
+
+    translator = HunyuanTranslator(**settings, load_in_background=True)
+    assert translator.tokenizer is not None
+    assert translator.pretokenize(TEXTS) == 2
+    assert translator.pretokenize(TEXTS) == 0
+
+    assert translator.translate_batch(TEXTS, show_progress=False) == expected
+    assert translator.is_ready()
+    startup = translator.get_model_info()["startup"]
+    assert startup["model_seconds"] > 0
+    assert startup["tokenizer_seconds"] > 0
+
+
+def test_threads_wait_for_the_same_load(tiny_model_path):
+    """Concurrent callers all wait for the background load and none of them fails"""
+    translator = HunyuanTranslator(
+        model_name=tiny_model_path, device="cpu", max_length=32, load_in_background=True)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: translator.wait_until_ready(), range(8)))
+    assert translator.is_ready()
+    assert translator.model is not None
+    translator.wait_until_ready()
+
+
+def test_pretokenize_uses_segments(tiny_model_path):
+    """With a segmenter the memoized units are the segments"""
+    translator = HunyuanTranslator(
+        model_name=tiny_model_path, device="cpu", max_length=32,
+        segmenter=TextSegmenter(), load_in_background=True)
+    translator.pretokenize(["Hello world. Find x."])
+    translator.wait_until_ready()
+
+    segments = translator.segmenter.segment("Hello world. Find x.")[0]
+    assert {key[0] for key in translator._prompt_length_memo} == set(segments)
+    assert translator._prompt_lengths(segments, "en", "vi") == [
+        translator._prompt_length_memo[(segment, "en", "vi")] for segment in segments]
+
+
+def test_background_load_error_is_raised_on_use(tiny_model_path, tmp_path):
+    """A failed background load surfaces when translation starts"""
+    # A tokenizer alone: the model load fails in the background
+    for name in Path(tiny_model_path).iterdir():
+        if "token" in name.name:
+            (tmp_path / name.name).write_bytes(name.read_bytes())
+    translator = HunyuanTranslator(model_name=str(tmp_path), device="cpu", load_in_background=True)
+    with pytest.raises(Exception):
+        translator.translate_batch(["Hello"], show_progress=False)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test generation with preallocated static KV caches and compiled decoding
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.hunyuan_translator import HunyuanTranslator
+from translation.decoding_policy import DecodingPolicy
+from translation.static_cache import StaticDecoding
+
+TEXTS = ["The answer is 42.", "Hello world", "Find x.", "Solve 2x = 4."]
+
+
+def test_static_cache_matches_dynamic_cache(tiny_model_path, tmp_path):
+    """Static caches give the eager translations and are reused per shape"""
+    policy = DecodingPolicy(strategy="greedy", length_ratio=0.0, length_margin=12)
+    settings = dict(model_name=tiny_model_path, device="cpu", batch_size=2, max_length=32,
+                    decoding_policy=policy)
+    expected = HunyuanTranslator(**settings).translate_batch(TEXTS, show_progress=False)
+
+    translator = HunyuanTranslator(
+        **settings, compiled_decoding=True, compile_cache_dir=str(tmp_path / "compile"))
+    assert translator.static_decoding is not None
+    # The eager backend keeps the test fast; inductor is exercised by the benchmark
+    translator.static_decoding = StaticDecoding(
+        translator.model, tmp_path / "compile", backend="eager")
+
+    assert translator.translate_batch(TEXTS, show_progress=False) == expected
+    assert translator.translate_batch(TEXTS, show_progress=False) == expected
+    stats = translator.get_model_info()["compiled_decoding"]
+    assert stats["calls"] == 4
+    assert stats["cache_reuses"] >= 2
+    assert all(length % 64 == 0 for _, length in stats["cache_shapes"])
+
+
+def test_beam_fields_keep_the_dynamic_cache(tiny_model_path, tmp_path):
+    """Beam search reorders cache rows, so it does not use a static cache"""
+    translator = HunyuanTranslator(
+        model_name=tiny_model_path, device="cpu", max_length=32,
+        decoding_policy=DecodingPolicy(strategy="beam", num_beams=2, max_new_tokens=8),
+        compiled_decoding=True, compile_cache_dir=str(tmp_path / "compile"))
+    translator.translate_batch(TEXTS[:2], show_progress=False)
+    assert translator.static_decoding.get_stats()["calls"] == 0
+
+
+def test_least_recently_used_cache_is_dropped(tiny_model_path, tmp_path):
+    """Shapes beyond max_caches evict the least recently used cache"""
+    translator = HunyuanTranslator(model_name=tiny_model_path, device="cpu", max_length=32)
+    decoding = StaticDecoding(translator.model, tmp_path, length_bucket=16, max_caches=2)
+
+    assert decoding.cache_length(10, 6) == 16
+    assert decoding.cache_length(10, 7) == 32
+    first = decoding.generation_kwargs(1, 10, 6)["past_key_values"]
+    decoding.generation_kwargs(2, 10, 6)
+    assert decoding.generation_kwargs(1, 8, 8)["past_key_values"] is first
+    decoding.generation_kwargs(3, 10, 6)
+
+    stats = decoding.get_stats()
+    assert stats["cache_shapes"] == [[1, 16], [3, 16]]
+    assert stats["cache_evictions"] == 1
+
+
+def test_kernel_cache_dir_is_scoped_to_generate(tiny_model_path, tmp_path, monkeypatch):
+    """The inductor cache location is set around generate calls and restored after"""
+    monkeypatch.setenv("TORCHINDUCTOR_CACHE_DIR", str(tmp_path / "previous"))
+    translator = HunyuanTranslator(
+        model_name=tiny_model_path, device="cpu", max_length=32,
+        decoding_policy=DecodingPolicy(strategy="greedy", max_new_tokens=8))
+    decoding = StaticDecoding(translator.model, tmp_path / "compile", backend="eager")
+    assert os.environ["TORCHINDUCTOR_CACHE_DIR"] == str(tmp_path / "previous")
+
+    with decoding.kernel_cache():
+        assert os.environ["TORCHINDUCTOR_CACHE_DIR"] == str((tmp_path / "compile").resolve())
+    assert os.environ["TORCHINDUCTOR_CACHE_DIR"] == str(tmp_path / "previous")
+
+    monkeypatch.delenv("TORCHINDUCTOR_CACHE_DIR")
+    translator.static_decoding = decoding
+    translator.translate_batch(TEXTS[:2], show_progress=False)
+    assert decoding.get_stats()["calls"] == 1
+    assert "TORCHINDUCTOR_CACHE_DIR" not in os.environ
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test per-row repetition and runaway stopping criteria
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.stopping import GeneratedRepetitionPenaltyLogitsProcessor, RunawayGuard
+
+PROMPT = [5, 6, 7, 8]
+
+
+def _call(criteria, rows):
+    """Run the criteria on prompt + generated rows"""
+    input_ids = torch.tensor([PROMPT + row for row in rows])
+    return criteria(input_ids, None).tolist()
+
+
+def test_stops_looping_row_only():
+    """A row repeating an n-gram is stopped while the others continue"""
+    guard = RunawayGuard(ngram_size=2, max_repeats=3)
+    criteria = guard.criteria(len(PROMPT), [20, 20], eos_token_id=2)
+    assert _call(criteria, [[9, 10, 9, 10, 9, 10], [9, 10, 11, 12, 13, 14]]) == [True, False]
+
+    assert guard.record(criteria) == [0]
+    stats = guard.get_stats()
+    assert stats["repetition_stops"] == 1
+    assert stats["tokens_saved"] == 14
+
+
+def test_prompt_repetition_is_allowed():
+    """N-grams the source repeats as often are not treated as loops"""
+    guard = RunawayGuard(ngram_size=2, max_repeats=3)
+    prompt = [9, 10, 9, 10, 9, 10]
+    criteria = guard.criteria(len(prompt), [20], eos_token_id=2)
+    assert criteria(torch.tensor([prompt + prompt]), None).tolist() == [False]
+
+
+def test_stops_row_past_its_own_budget():
+    """A short source's row stops at its budget while a longer row continues"""
+    guard = RunawayGuard()
+    criteria = guard.criteria(len(PROMPT), [3, 10], eos_token_id=2)
+    assert _call(criteria, [[11, 12, 13], [14, 15, 16]]) == [True, False]
+    # Finished (EOS) rows are left to generate
+    assert _call(criteria, [[11, 12, 13, 0], [2, 0, 0, 0]]) == [True, False]
+
+    guard.record(criteria)
+    assert guard.get_stats()["runaway_stops"] == 1
+
+
+def test_retry_budgets():
+    """Rows stopped at their budget are retried with a larger one, loops with theirs"""
+    guard = RunawayGuard(ngram_size=2, max_repeats=3, retry_budget_scale=2.0)
+    criteria = guard.criteria(len(PROMPT), [3, 10, 20], eos_token_id=2)
+    _call(criteria, [[11, 12, 13], [9, 10, 9], [14, 15, 16]])
+    _call(criteria, [[11, 12, 13, 0, 0, 0], [9, 10, 9, 10, 9, 10], [14, 15, 16, 17, 18, 19]])
+
+    assert guard.retry_budgets(criteria, max_budget=20) == {0: 6, 1: 10}
+    # A budget that cannot grow is not worth a retry
+    assert guard.retry_budgets(criteria, max_budget=3) == {1: 10}
+
+
+def test_retry_penalty_skips_prompt():
+    """The retry penalty leaves tokens copied from the source alone"""
+    processor = GeneratedRepetitionPenaltyLogitsProcessor(2.0, prompt_length=2)
+    scores = torch.full((1, 6), 4.0)
+    penalized = processor(torch.tensor([[1, 2, 3, 3]]), scores).tolist()[0]
+    assert penalized == [4.0, 4.0, 4.0, 2.0, 4.0, 4.0]
+
+
+def test_translator_retries_runaway_rows_with_larger_budget(tiny_model_path):
+    """A short row stopped at its budget comes back longer than that budget"""
+    from translation.hunyuan_translator import HunyuanTranslator
+    from translation.decoding_policy import DecodingPolicy
+
+    guard = RunawayGuard()
+    policy = DecodingPolicy(
+        strategy="greedy", length_ratio=1.0, length_margin=2, max_new_tokens=64, min_samples=10**6)
+    translator = HunyuanTranslator(
+        model_name=tiny_model_path, device="cpu", batch_size=2, max_length=128,
+        decoding_policy=policy, runaway_guard=guard)
+    translations = translator.translate_batch(
+        ["Hi", "A much longer sentence to translate here."], show_progress=False)
+
+    stats = guard.get_stats()
+    assert stats["runaway_stops"] == 1
+    assert stats["retried"] == 1
+    # "Hi" has a budget of 4 tokens; the retry doubles it
+    assert 4 < len(translator.tokenizer(translations[0], add_special_tokens=False)["input_ids"]) <= 8
+
+
+def main():
+    """Run all tests"""
+    test_stops_looping_row_only()
+    test_prompt_repetition_is_allowed()
+    test_stops_row_past_its_own_budget()
+    test_retry_budgets()
+    test_retry_penalty_skips_prompt()
+    print("✅ Stopping criteria tests passed")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
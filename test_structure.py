@@ -18,16 +18,40 @@ def test_file_structure():
         "config.yaml",  
         "setup.py",
         "run_translation.py",
+        "run_server.py",
+        "convert_checkpoint.py",
         "USAGE.md",
         "src/__init__.py",
         "src/translation/__init__.py",
         "src/translation/hunyuan_translator.py",
+        "src/translation/batch_scheduler.py",
+        "src/translation/continuous_batching.py",
+        "src/translation/translation_cache.py",
+        "src/translation/segmentation.py",
+        "src/translation/math_masking.py",
+        "src/translation/bypass.py",
+        "src/translation/prefix_cache.py",
+        "src/translation/speculative.py",
+        "src/translation/decoding_policy.py",
+        "src/translation/quality_validator.py",
+        "src/translation/stopping.py",
+        "src/translation/parallel.py",
+        "src/translation/memory.py",
+        "src/translation/backends.py",
+        "src/translation/micro_batching.py",
+        "src/translation/server.py",
+        "src/translation/cpu_inference.py",
+        "src/translation/checkpoint_cache.py",
+        "src/translation/static_cache.py",
+        "src/translation/kv_quantization.py",
+        "src/translation/vocab_restriction.py",
         "src/datasets/__init__.py",
         "src/datasets/gpqa_loader.py",
         "src/datasets/aime_loader.py", 
         "src/utils/__init__.py",
         "src/utils/logging_config.py",
         "src/utils/translation_utils.py",
+        "src/utils/work_queue.py",
         "examples/__init__.py",
         "examples/simple_translation_demo.py",
         "examples/translate_gpqa.py",
@@ -95,10 +119,32 @@ def test_import_structure():
         
         modules_to_test = [
             "translation.hunyuan_translator",
+            "translation.batch_scheduler",
+            "translation.continuous_batching",
+            "translation.translation_cache",
+            "translation.segmentation",
+            "translation.math_masking",
+            "translation.bypass",
+            "translation.prefix_cache",
+            "translation.speculative",
+            "translation.decoding_policy",
+            "translation.quality_validator",
+            "translation.stopping",
+            "translation.parallel",
+            "translation.memory",
+            "translation.backends",
+            "translation.micro_batching",
+            "translation.server",
+            "translation.cpu_inference",
+            "translation.checkpoint_cache",
+            "translation.static_cache",
+            "translation.kv_quantization",
+            "translation.vocab_restriction",
             "datasets.gpqa_loader", 
             "datasets.aime_loader",
             "utils.logging_config",
-            "utils.translation_utils"
+            "utils.translation_utils",
+            "utils.work_queue"
         ]
         
         for module_name in modules_to_test:
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test the persistent translation cache
+"""
+
+import json
+import pickle
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.segmentation import TextSegmenter
+from translation.translation_cache import TranslationCache
+
+CONTEXT = {"model": "tiny", "strategy": "greedy"}
+
+
+def test_hits_and_misses(tmp_path):
+    """Stored translations are found again under normalized text, and only under their context"""
+    cache = TranslationCache(str(tmp_path / "cache.sqlite"))
+    key = TranslationCache.make_key("Find x.", "en", "vi", CONTEXT)
+    cache.put_many({key: ("Find x.", "Tìm x.")})
+
+    same = TranslationCache.make_key("  Find x.  ", "en", "vi", CONTEXT)
+    other = TranslationCache.make_key("Find x.", "en", "vi", {"model": "tiny", "strategy": "beam"})
+    assert cache.get_many([same, other]) == {same: "Tìm x."}
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["writes"]) == (1, 1, 1)
+
+    # Entries survive reopening the database
+    cache.close()
+    assert TranslationCache(str(tmp_path / "cache.sqlite")).get_many([key]) == {key: "Tìm x."}
+
+
+def test_cache_file_is_shared_safely(tmp_path):
+    """The database runs in WAL mode with a busy timeout, also after pickling to a worker"""
+    cache = pickle.loads(pickle.dumps(TranslationCache(str(tmp_path / "cache.sqlite"), busy_timeout=5.0)))
+    assert cache._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert cache._conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    """Beyond max_entries the entries read or written longest ago are dropped"""
+    cache = TranslationCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    keys = [TranslationCache.make_key(text, "en", "vi", CONTEXT) for text in "abc"]
+    cache.put_many({keys[0]: ("a", "A")})
+    cache.put_many({keys[1]: ("b", "B")})
+    cache.get_many([keys[0]])
+    cache.put_many({keys[2]: ("c", "C")})
+
+    assert cache.get_many(keys) == {keys[0]: "A", keys[2]: "C"}
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2
+
+
+def test_warm_from_translated_files(tmp_path):
+    """Aligned source/translation lists of earlier outputs are loaded, blanks skipped"""
+    output_dir = tmp_path / "outputs" / "gpqa"
+    output_dir.mkdir(parents=True)
+    with open(output_dir / "gpqa_translated.json", "w", encoding="utf-8") as f:
+        json.dump({"questions": ["One?", "Two?"], "questions_vi": ["Một?", ""], "id": [1, 2]}, f)
+    (output_dir / "broken_translated.json").write_text("{", encoding="utf-8")
+
+    cache = TranslationCache(str(tmp_path / "cache.sqlite"))
+    assert cache.warm_from_directory(str(tmp_path / "outputs"), "en", "vi", CONTEXT) == 1
+    keys = [TranslationCache.make_key(text, "en", "vi", CONTEXT) for text in ("One?", "Two?")]
+    assert cache.get_many(keys) == {keys[0]: "Một?"}
+
+
+def test_warm_uses_per_field_context(tiny_model_path, tmp_path):
+    """Pre-warmed entries of a field decoded differently from the default are hit"""
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from translation.hunyuan_translator import HunyuanTranslator
+    from translation.decoding_policy import DecodingPolicy
+
+    output_dir = tmp_path / "outputs"
+    output_dir.mkdir()
+    with open(output_dir / "aime_problems_translated.json", "w", encoding="utf-8") as f:
+        json.dump({"problems": ["Find x."], "problems_vi": ["Tìm x."]}, f)
+
+    cache = TranslationCache(str(tmp_path / "cache.sqlite"))
+    policy = DecodingPolicy(strategy="beam", fields={"problems": {"strategy": "greedy"}})
+    translator = HunyuanTranslator(
+        model_name=tiny_model_path, device="cpu", max_length=32,
+        decoding_policy=policy, cache=cache)
+
+    assert cache.warm_from_directory(str(output_dir), "en", "vi", translator.get_cache_context) == 1
+    assert translator.translate_batch(["Find x."], show_progress=False, field_name="problems") == ["Tìm x."]
+    # Single texts go through the cache too
+    assert translator.translate_single("Find x.", field_name="problems") == "Tìm x."
+    stats = cache.get_stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 0
+
+
+def test_warm_per_segment(tmp_path):
+    """With a segmenter, aligned sentences are loaded one by one and unaligned texts skipped"""
+    output_dir = tmp_path / "outputs"
+    output_dir.mkdir()
+    with open(output_dir / "aime_translated.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "solutions": ["First we note that x is even. Then x equals four.", "Short one. Split two."],
+            "solutions_vi": ["Đầu tiên ta thấy x chẵn. Khi đó x bằng bốn.", "Một câu gộp lại."]
+        }, f)
+
+    cache = TranslationCache(str(tmp_path / "cache.sqlite"))
+    segmenter = TextSegmenter(min_segment_chars=5)
+    assert cache.warm_from_directory(str(output_dir), "en", "vi", CONTEXT, segmenter=segmenter) == 2
+    keys = [TranslationCache.make_key(text, "en", "vi", CONTEXT)
+            for text in ("First we note that x is even.", "Then x equals four.", "Short one. Split two.")]
+    assert cache.get_many(keys) == {keys[0]: "Đầu tiên ta thấy x chẵn.", keys[1]: "Khi đó x bằng bốn."}
+
+
+def test_translator_warms_its_own_lookups(tiny_model_path, tmp_path):
+    """A segmenting translator's warmed entries are hit segment by segment"""
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from translation.hunyuan_translator import HunyuanTranslator
+
+    output_dir = tmp_path / "outputs"
+    output_dir.mkdir()
+    with open(output_dir / "aime_translated.json", "w", encoding="utf-8") as f:
+        json.dump({"problems": ["Find all x. Then add them."], "problems_vi": ["Tìm mọi x. Rồi cộng lại."]}, f)
+
+    cache = TranslationCache(str(tmp_path / "cache.sqlite"))
+    translator = HunyuanTranslator(
+        model_name=tiny_model_path, device="cpu", max_length=32, cache=cache,
+        segmenter=TextSegmenter(min_segment_chars=5))
+    assert translator.warm_cache(str(output_dir)) == 2
+    assert translator.translate_batch(
+        ["Then add them. Find all x."], show_progress=False, field_name="problems") == ["Rồi cộng lại. Tìm mọi x."]
+    assert cache.get_stats()["misses"] == 0
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test the localhost translation server and its client
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+requests = pytest.importorskip("requests")
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.hunyuan_translator import HunyuanTranslator
+from translation.decoding_policy import DecodingPolicy
+from translation.server import TranslationServer, TranslationClient
+
+TEXTS = ["The answer is 42.", "", "Hello world", "The answer is 42.", "Find x."]
+
+
+class BlockingTranslator:
+    """Stand-in translator that holds every batch until released"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def translate_batch(self, texts, source_lang="en", target_lang="vi",
+                        show_progress=True, field_name=None):
+        self.release.wait(timeout=10)
+        return [text.upper() for text in texts]
+
+    def get_model_info(self):
+        return {"model_name": "blocking"}
+
+
+class FieldTranslator:
+    """Stand-in translator that tags texts with their field"""
+
+    def translate_batch(self, texts, source_lang="en", target_lang="vi",
+                        show_progress=True, field_name=None):
+        return [f"{field_name}:{text}" for text in texts]
+
+    def get_model_info(self):
+        return {"model_name": "field"}
+
+
+def _wait_for(condition, timeout=10.0):
+    """Poll until condition() holds"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def test_client_matches_local_translation(tiny_model_path):
+    """Work sent through the server comes back as translated locally"""
+    # A flat token budget keeps outputs independent of how texts are batched
+    policy = DecodingPolicy(strategy="greedy", length_ratio=0.0, length_margin=8)
+    translator = HunyuanTranslator(
+        model_name=tiny_model_path, device="cpu", batch_size=2, max_length=32,
+        decoding_policy=policy)
+    expected = translator.translate_batch(TEXTS, show_progress=False)
+
+    server = TranslationServer(translator, port=0, max_wait=0.01).start()
+    client = TranslationClient(server.url, chunk_size=2, concurrency=3)
+    try:
+        dataset = client.translate_dataset_field({"problems": TEXTS}, "problems")
+        health = client.health()
+        info = client.get_model_info()
+    finally:
+        client.close()
+        server.shutdown()
+
+    assert dataset["problems_vi"] == expected
+    assert health["status"] == "ok"
+    assert info["server"]["requests"] == 3
+    assert info["server"]["batching"]["batches"] >= 1
+    assert "decoding_policy" in info
+
+
+def test_full_queue_is_refused_with_retry_after():
+    """Requests beyond max_pending get 503 and Retry-After, then succeed"""
+    translator = BlockingTranslator()
+    server = TranslationServer(
+        translator, port=0, max_batch_size=1, max_wait=0, max_pending=1, retry_after=1).start()
+    try:
+        # One text is being translated, one waits in the queue
+        results = []
+
+        def send(text):
+            results.append(requests.post(f"{server.url}/translate", json={"text": text}, timeout=30))
+
+        senders = []
+        for text, condition in [("a", "batches"), ("b", "queued")]:
+            senders.append(threading.Thread(target=send, args=(text,)))
+            senders[-1].start()
+            _wait_for(lambda: server.batcher.get_stats()[condition] == 1)
+
+        refused = requests.post(f"{server.url}/translate", json={"texts": ["c"]}, timeout=30)
+        assert refused.status_code == 503
+        assert refused.headers["Retry-After"] == "1"
+
+        translator.release.set()
+        for sender in senders:
+            sender.join()
+        assert sorted(response.json()["translation"] for response in results) == ["A", "B"]
+
+        too_large = requests.post(f"{server.url}/translate", json={"texts": ["x", "y"]}, timeout=30)
+        assert too_large.status_code == 413
+        assert server.metrics()["rejected"] == 1
+    finally:
+        translator.release.set()
+        server.shutdown()
+
+
+def test_client_forwards_field_name():
+    """Single texts keep their field, so per-field decoding applies on the server"""
+    server = TranslationServer(FieldTranslator(), port=0, max_wait=0).start()
+    client = TranslationClient(server.url)
+    try:
+        assert client.translate_single("x", field_name="problems") == "problems:x"
+    finally:
+        client.close()
+        server.shutdown()
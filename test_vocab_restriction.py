@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test the vocabulary-restricted output head
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from translation.hunyuan_translator import HunyuanTranslator
+from translation.decoding_policy import DecodingPolicy
+from translation.vocab_restriction import (
+    RestrictedLMHead, VocabularyRestriction, build_allowed_token_ids, is_allowed_char)
+
+VALIDATION_TEXTS = [
+    "The answer is 42.",
+    "Find the value of x such that x² + 5x + 6 = 0.",
+    "Let φ be the golden ratio.",
+    "Hello world",
+    "Compute √2 × π ≤ 5."
+]
+
+
+def test_allowed_characters():
+    """Latin, Vietnamese, digits and math symbols are allowed, other scripts are not"""
+    for char in "aZ7 .đơưạếữ∑√≤αφ²→\n":
+        assert is_allowed_char(char), char
+    for char in "中文字한글ру":
+        assert not is_allowed_char(char), char
+
+
+def test_allowed_token_ids_include_special_tokens(tiny_model_path):
+    """Every character token of the test vocabulary is allowed, as are special tokens"""
+    translator = HunyuanTranslator(model_name=tiny_model_path, device="cpu", max_length=32)
+    allowed = build_allowed_token_ids(translator.tokenizer)
+    assert set(translator.tokenizer.all_special_ids) <= set(allowed)
+    assert len(allowed) == len(translator.tokenizer)
+
+
+def test_restricted_head_matches_full_head_on_allowed_rows():
+    """Allowed rows get the full head's logits, the others -inf"""
+    torch.manual_seed(0)
+    head = torch.nn.Linear(16, 10, bias=False)
+    restricted = RestrictedLMHead(head, [0, 2, 5])
+    restricted.set_extra_ids([7, 5])
+    hidden = torch.randn(2, 3, 16)
+
+    logits = restricted(hidden)
+    expected = head(hidden)
+    allowed = [0, 2, 5, 7]
+    assert torch.allclose(logits[..., allowed], expected[..., allowed], atol=1e-6)
+    blocked = [i for i in range(10) if i not in allowed]
+    assert torch.isinf(logits[..., blocked]).all()
+
+
+def test_quantized_head_stays_int8():
+    """An int8 head is sliced into int8 heads without a float copy of its weight"""
+    torch.manual_seed(0)
+    head = torch.ao.quantization.quantize_dynamic(
+        torch.nn.Sequential(torch.nn.Linear(16, 10)), {torch.nn.Linear}, dtype=torch.qint8)[0]
+    restricted = RestrictedLMHead(head, [1, 4, 6])
+    restricted.set_extra_ids([8])
+    hidden = torch.randn(2, 16)
+
+    assert isinstance(restricted.base_head, torch.ao.nn.quantized.dynamic.Linear)
+    assert not [t for t in vars(restricted).values() if torch.is_tensor(t) and t.is_floating_point()]
+    logits = restricted(hidden)
+    expected = head(hidden)
+    assert torch.allclose(logits[..., [1, 4, 6, 8]], expected[..., [1, 4, 6, 8]], atol=1e-5)
+
+    # Compact logits hold the allowed columns only, in token_ids order
+    restricted.compact = True
+    compact = restricted(hidden)
+    assert compact.shape == (2, 4)
+    assert torch.equal(restricted.token_ids[compact.argmax(-1)], logits.argmax(-1))
+
+
+def test_continuous_batching_uses_compact_logits(tiny_model_path):
+    """The continuous batching engine gives the same greedy output with compact logits"""
+    policy = DecodingPolicy(strategy="greedy", max_new_tokens=16)
+    translator = HunyuanTranslator(
+        model_name=tiny_model_path, device="cpu", batch_size=2, max_length=64,
+        decoding_policy=policy, restrict_vocabulary=True)
+    expected = translator.translate_batch(VALIDATION_TEXTS, show_progress=False)
+
+    translator.use_continuous_batching = True
+    assert translator.translate_batch(VALIDATION_TEXTS, show_progress=False) == expected
+    assert translator.engine.get_stats()["requests"] == len(VALIDATION_TEXTS)
+    assert translator.vocab_restriction.head.compact is False
+
+
+def test_greedy_output_unchanged_on_validation_set(tiny_model_path):
+    """Restricting to the tokens greedy decoding uses leaves the translations unchanged"""
+    policy = DecodingPolicy(strategy="greedy", max_new_tokens=24)
+    translator = HunyuanTranslator(
+        model_name=tiny_model_path, device="cpu", batch_size=2, max_length=64,
+        decoding_policy=policy, restrict_vocabulary=True)
+    restriction = translator.vocab_restriction
+    restriction.remove()
+    expected = translator.translate_batch(VALIDATION_TEXTS, show_progress=False)
+
+    # The tiny vocabulary is all allowed characters, so narrow the base set to
+    # the tokens of the full-head translations: slicing must not change them
+    used = {i for text in expected for i in translator.tokenizer(text, add_special_tokens=False)["input_ids"]}
+    base = sorted(used | set(translator.tokenizer.all_special_ids))
+    narrow = VocabularyRestriction(translator.model, translator.tokenizer, allowed_ids=base)
+    translator.vocab_restriction = narrow
+
+    assert translator.translate_batch(VALIDATION_TEXTS, show_progress=False) == expected
+    stats = translator.get_model_info()["vocab_restriction"]
+    assert stats["allowed_tokens"] < stats["vocab_size"]
+    assert stats["calls"] == 3
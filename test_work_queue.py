@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test the file-backed lease work queue with several local worker processes
+"""
+
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pandas")
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from utils.translation_utils import TranslationPipeline
+from utils.work_queue import LeaseWorkQueue
+
+PROBLEMS = [f"Problem {i}" for i in range(11)]
+SOLUTIONS = [f"Solution {i}" for i in range(11)]
+
+
+class UpperTranslator:
+    """Stand-in translator that upper-cases texts"""
+
+    def translate_batch(self, texts, source_lang="en", target_lang="vi",
+                        show_progress=True, field_name=None):
+        time.sleep(0.01)
+        return [text.upper() for text in texts]
+
+    def get_model_info(self):
+        return {"model_name": "upper"}
+
+
+class ListLoader:
+    """Stand-in dataset loader"""
+
+    def load_dataset(self, split="train"):
+        return {"problems": list(PROBLEMS), "solutions": list(SOLUTIONS)}
+
+    def get_translatable_fields(self):
+        return ["problems", "solutions"]
+
+
+def _run_worker(db_path, output_dir, results):
+    """Run the queue pipeline as one worker process"""
+    queue = LeaseWorkQueue(db_path, lease_timeout=0.5)
+    pipeline = TranslationPipeline(UpperTranslator(), ListLoader(), output_dir=output_dir)
+    result = pipeline.run_queue_pipeline(queue, "toy", chunk_size=3, poll_interval=0.1)
+    results.put((result["output_path"], result["queue"]["committed"]))
+
+
+def _crash_worker(db_path):
+    """Lease a chunk and die without committing it"""
+    LeaseWorkQueue(db_path, lease_timeout=0.5).lease()
+    os._exit(1)
+
+
+def test_lost_lease_is_released_and_rejected(tmp_path):
+    """An expired lease is handed to another worker and the late commit is rejected"""
+    db_path = str(tmp_path / "queue.sqlite")
+    slow = LeaseWorkQueue(db_path, lease_timeout=0.05, worker_id="slow")
+    fast = LeaseWorkQueue(db_path, lease_timeout=60, worker_id="fast")
+    assert slow.enqueue({"problems": ["a", "b"]}, ["problems"], chunk_size=2)
+    assert not fast.enqueue({"problems": ["c"]}, ["problems"])
+
+    chunk = slow.lease()
+    assert fast.lease() is None
+    time.sleep(0.1)
+    retaken = fast.lease()
+    assert retaken.texts == ["a", "b"]
+
+    assert not slow.commit(chunk, ["x", "y"])
+    assert fast.commit(retaken, ["A", "B"])
+    assert fast.is_finished()
+    assert fast.merge()["problems_vi"] == ["A", "B"]
+
+
+def test_failed_chunk_gives_up_after_max_attempts(tmp_path):
+    """A chunk released max_attempts times is marked failed and merged empty"""
+    queue = LeaseWorkQueue(str(tmp_path / "queue.sqlite"), max_attempts=2)
+    queue.enqueue({"problems": ["a"]}, ["problems"])
+    queue.release(queue.lease(), error="boom")
+    queue.release(queue.lease(), error="boom")
+
+    assert queue.lease() is None
+    assert queue.progress()["failed"] == 1
+    assert queue.merge()["problems_vi"] == [""]
+
+
+def test_heartbeat_keeps_lease_of_slow_chunk(tmp_path):
+    """A chunk translated for longer than the lease timeout keeps its lease"""
+    db_path = str(tmp_path / "queue.sqlite")
+    slow = LeaseWorkQueue(db_path, lease_timeout=0.2, worker_id="slow")
+    other = LeaseWorkQueue(db_path, lease_timeout=0.2, worker_id="other")
+    slow.enqueue({"problems": ["a"]}, ["problems"])
+
+    chunk = slow.lease()
+    with slow.heartbeat(chunk):
+        time.sleep(0.6)
+        assert other.lease() is None
+    assert slow.commit(chunk, ["A"])
+
+
+def test_only_one_worker_loads_dataset(tmp_path):
+    """The load is claimed by one worker; another takes over once the claim expires"""
+    db_path = str(tmp_path / "queue.sqlite")
+    first = LeaseWorkQueue(db_path, lease_timeout=0.1, worker_id="first")
+    second = LeaseWorkQueue(db_path, lease_timeout=0.1, worker_id="second")
+
+    assert first.claim_enqueue()
+    assert not second.claim_enqueue()
+    time.sleep(0.2)
+    assert second.claim_enqueue()
+    assert second.enqueue({"problems": ["a"]}, ["problems"])
+    assert not first.claim_enqueue()
+
+
+class FlakyTranslator(UpperTranslator):
+    """Stand-in translator whose first call fails"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def translate_batch(self, texts, source_lang="en", target_lang="vi",
+                        show_progress=True, field_name=None):
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("transient")
+        return super().translate_batch(texts)
+
+
+def test_retried_chunk_is_not_counted_failed(tmp_path):
+    """A chunk that fails once and then succeeds counts as successful only"""
+    queue = LeaseWorkQueue(str(tmp_path / "queue.sqlite"))
+    pipeline = TranslationPipeline(FlakyTranslator(), ListLoader(), output_dir=str(tmp_path / "output"))
+    result = pipeline.run_queue_pipeline(queue, "toy", chunk_size=11, poll_interval=0.1)
+
+    assert result["statistics"]["failed_translations"] == 0
+    assert result["statistics"]["successful_translations"] == 22
+
+
+def test_workers_drain_queue_after_crash(tmp_path):
+    """Several processes drain one queue, recover a crashed lease and merge once"""
+    db_path = str(tmp_path / "queue.sqlite")
+    output_dir = str(tmp_path / "output")
+    LeaseWorkQueue(db_path).enqueue(ListLoader().load_dataset(), ["problems", "solutions"], chunk_size=3)
+
+    context = mp.get_context("spawn")
+    crashed = context.Process(target=_crash_worker, args=(db_path,))
+    crashed.start()
+    crashed.join(timeout=60)
+    assert crashed.exitcode == 1
+
+    results = context.Queue()
+    workers = [
+        context.Process(target=_run_worker, args=(db_path, output_dir, results))
+        for _ in range(3)
+    ]
+    for worker in workers:
+        worker.start()
+    outcomes = [results.get(timeout=120) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=30)
+
+    merged = [path for path, _ in outcomes if path]
+    assert len(merged) == 1
+    assert sum(committed for _, committed in outcomes) == 8
+
+    with open(merged[0], encoding="utf-8") as f:
+        dataset = json.load(f)
+    assert dataset["problems_vi"] == [text.upper() for text in PROBLEMS]
+    assert dataset["solutions_vi"] == [text.upper() for text in SOLUTIONS]